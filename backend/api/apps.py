@@ -6,3 +6,13 @@ class ApiConfig(AppConfig):
     name = 'api'
     verbose_name = "Управление API Foodgram"
     description = "Приложение для управления API проекта Foodgram."
+
+    def ready(self):
+        """
+        Подключает обработчики сигналов приложения
+        и регистрирует шрифты для PDF.
+        """
+        from api import signals  # noqa: F401
+        from api.utils import register_fonts
+
+        register_fonts()
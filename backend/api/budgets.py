@@ -0,0 +1,100 @@
+"""
+Бюджеты SQL-запросов для представлений API.
+
+Бюджет — максимальное число запросов к базе, которое может выполнить
+действие. Он задается словарем query_budgets представления
+(«действие» → число) или декоратором query_budget на методе действия.
+Бюджет не должен зависеть от размера страницы: рост числа запросов
+вместе с числом объектов — признак N+1. В бюджет входят все запросы
+обработки: поиск токена аутентификации и запросы, которые потоковый
+ответ выполняет при отдаче содержимого после выхода из dispatch.
+
+При превышении бюджета QueryBudgetMixin пишет предупреждение в лог,
+а при QUERY_BUDGET_STRICT = True выбрасывает QueryBudgetExceeded,
+чтобы регрессия не прошла незамеченной в тестах и при отладке.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import connection
+
+from api.middleware import QueryCounter
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Действие выполнило больше запросов, чем позволяет бюджет.
+    """
+
+
+def query_budget(limit):
+    """
+    Декоратор, задающий бюджет запросов для метода действия.
+    """
+    def decorator(method):
+        method.query_budget = limit
+        return method
+    return decorator
+
+
+class QueryBudgetMixin:
+    """
+    Миксин, проверяющий число запросов действия по его бюджету.
+    """
+
+    # Бюджеты действий: {имя действия: число запросов}
+    query_budgets = {}
+
+    def get_budget_action(self):
+        """
+        Возвращает имя действия ViewSet или метод HTTP для APIView.
+        """
+        return getattr(self, 'action', None) or self.request.method.lower()
+
+    def get_query_budget(self):
+        """
+        Возвращает бюджет текущего действия или None.
+        """
+        action = self.get_budget_action()
+        budget = getattr(getattr(self, action, None), 'query_budget', None)
+        if budget is None:
+            budget = self.query_budgets.get(action)
+        return budget
+
+    def dispatch(self, request, *args, **kwargs):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = super().dispatch(request, *args, **kwargs)
+        if response.streaming:
+            response.streaming_content = self.count_streaming(
+                response.streaming_content, counter
+            )
+        else:
+            self.check_query_budget(counter.count)
+        return response
+
+    def count_streaming(self, content, counter):
+        """
+        Отдает содержимое потокового ответа, продолжая счет запросов,
+        и проверяет бюджет после последней части.
+        """
+        with connection.execute_wrapper(counter):
+            yield from content
+        self.check_query_budget(counter.count)
+
+    def check_query_budget(self, count):
+        """
+        Сообщает о превышении бюджета текущего действия.
+        """
+        budget = self.get_query_budget()
+        if budget is not None and count > budget:
+            message = (
+                f'{type(self).__name__}.{self.get_budget_action()}: '
+                f'{count} запросов при бюджете {budget}'
+            )
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
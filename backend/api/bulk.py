@@ -0,0 +1,154 @@
+"""
+Пакетное добавление и удаление рецептов в избранном и корзине,
+а также пакетная подписка на авторов.
+
+Каждая операция выполняется в одной транзакции: одна вставка
+INSERT ... ON CONFLICT DO NOTHING RETURNING или одно удаление
+по фильтру и одно обновление счетчиков. Вставка возвращает только
+действительно добавленные строки, поэтому параллельные запросы
+с теми же идентификаторами не увеличивают счетчики дважды.
+Результат возвращается для каждого идентификатора отдельно.
+"""
+
+from django.db import connection, transaction
+
+from api.counters import change_counter, manual_counters
+from recipes.models import Recipe
+from users.models import Subscription, User
+
+# Максимальное количество идентификаторов в одном запросе
+MAX_BULK_IDS = 100
+
+# Результаты обработки идентификатора
+ADDED = 'added'
+EXISTS = 'exists'
+REMOVED = 'removed'
+MISSING = 'missing'
+NOT_FOUND = 'not_found'
+SELF_SUBSCRIPTION = 'self_subscription'
+
+
+def existing_ids(model, ids):
+    """
+    Возвращает множество идентификаторов из ids, которые есть в базе.
+    """
+    return set(model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+
+
+def insert_new(model, user, field, ids):
+    """
+    Вставляет записи пользователя со ссылками field на ids,
+    пропуская уже существующие.
+
+    :return: Множество идентификаторов действительно вставленных строк.
+    """
+    if not ids:
+        return set()
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    user_column = quote(model._meta.get_field('user').column)
+    column = quote(model._meta.get_field(field).column)
+    values = ', '.join(['(%s, %s)'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({user_column}, {column}) VALUES {values} '
+            f'ON CONFLICT ({user_column}, {column}) DO NOTHING '
+            f'RETURNING {column}',
+            [value for pk in ids for value in (user.pk, pk)],
+        )
+        return {pk for pk, in cursor.fetchall()}
+
+
+@transaction.atomic
+def add_recipes(model, user, recipe_ids):
+    """
+    Добавляет рецепты в избранное или корзину пользователя.
+
+    :return: Словарь «идентификатор рецепта» → результат.
+    """
+    found = existing_ids(Recipe, recipe_ids)
+    added = insert_new(model, user, 'recipe', found)
+    change_counter(Recipe, added, model.counter_field, 1)
+    return {
+        recipe_id: (
+            NOT_FOUND if recipe_id not in found
+            else ADDED if recipe_id in added
+            else EXISTS
+        )
+        for recipe_id in recipe_ids
+    }
+
+
+@transaction.atomic
+def remove_recipes(model, user, recipe_ids):
+    """
+    Удаляет рецепты из избранного или корзины пользователя.
+
+    :return: Словарь «идентификатор рецепта» → результат.
+    """
+    records = model.objects.filter(user=user, recipe_id__in=recipe_ids)
+    # Блокировка строк не дает параллельному запросу
+    # уменьшить счетчики второй раз.
+    removed = set(
+        records.select_for_update().values_list('recipe_id', flat=True)
+    )
+    if removed:
+        with manual_counters():
+            records.delete()
+    change_counter(Recipe, removed, model.counter_field, -1)
+    found = existing_ids(Recipe, set(recipe_ids) - removed) | removed
+    return {
+        recipe_id: (
+            REMOVED if recipe_id in removed
+            else MISSING if recipe_id in found
+            else NOT_FOUND
+        )
+        for recipe_id in recipe_ids
+    }
+
+
+@transaction.atomic
+def subscribe(user, author_ids):
+    """
+    Подписывает пользователя на авторов.
+
+    :return: Словарь «идентификатор автора» → результат.
+    """
+    found = existing_ids(User, author_ids)
+    added = insert_new(Subscription, user, 'author', found - {user.pk})
+    change_counter(User, added, 'subscribers_count', 1)
+    return {
+        author_id: (
+            NOT_FOUND if author_id not in found
+            else SELF_SUBSCRIPTION if author_id == user.pk
+            else ADDED if author_id in added
+            else EXISTS
+        )
+        for author_id in author_ids
+    }
+
+
+@transaction.atomic
+def unsubscribe(user, author_ids):
+    """
+    Отписывает пользователя от авторов.
+
+    :return: Словарь «идентификатор автора» → результат.
+    """
+    records = Subscription.objects.filter(user=user, author_id__in=author_ids)
+    removed = set(
+        records.select_for_update().values_list('author_id', flat=True)
+    )
+    if removed:
+        with manual_counters():
+            records.delete()
+    change_counter(User, removed, 'subscribers_count', -1)
+    found = existing_ids(User, set(author_ids) - removed) | removed
+    return {
+        author_id: (
+            REMOVED if author_id in removed
+            else MISSING if author_id in found
+            else NOT_FOUND
+        )
+        for author_id in author_ids
+    }
@@ -0,0 +1,103 @@
+"""
+Модуль кеширования справочников (теги, ингредиенты).
+
+Каждый справочник имеет версию, которая хранится в общем кеше
+(бэкенд задается алиасом CATALOG_CACHE_ALIAS в CACHES) и меняется
+при любом изменении данных. Готовый JSON справочника кешируется
+под ключом с версией: в общем кеше для всех процессов
+и в памяти текущего процесса.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from recipes.models import Tag
+
+
+TAGS_CATALOG = 'tags'
+INGREDIENTS_CATALOG = 'ingredients'
+
+# Локальная копия справочников процесса:
+# {(имя, часть): (версия, данные)}.
+_local_catalogs = {}
+_local_lock = threading.Lock()
+
+
+def get_catalog_cache():
+    """
+    Возвращает кеш, в котором хранятся справочники.
+    """
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def _version_key(name):
+    return f'catalog:{name}:version'
+
+
+def _data_key(name, version, part=None):
+    if part is None:
+        return f'catalog:{name}:{version}'
+    return f'catalog:{name}:{part}:{version}'
+
+
+def get_catalog_version(name):
+    """
+    Возвращает текущую версию справочника.
+    При первом обращении версия создается.
+    """
+    cache = get_catalog_cache()
+    version = cache.get(_version_key(name))
+    if version is None:
+        cache.add(_version_key(name), time.time_ns(), timeout=None)
+        version = cache.get(_version_key(name))
+    return version
+
+
+def bump_catalog_version(name):
+    """
+    Помечает справочник измененным и возвращает новую версию.
+    Старые закешированные данные перестают использоваться.
+    """
+    version = time.time_ns()
+    get_catalog_cache().set(_version_key(name), version, timeout=None)
+    return version
+
+
+def get_catalog_data(name, build, part=None):
+    """
+    Возвращает данные справочника из кеша.
+
+    При промахе вызывает build() и сохраняет результат
+    в общем кеше и в памяти процесса. Параметр part позволяет
+    хранить под той же версией разные данные справочника.
+    """
+    version = get_catalog_version(name)
+    local = _local_catalogs.get((name, part))
+    if local is not None and local[0] == version:
+        return local[1]
+
+    cache = get_catalog_cache()
+    data = cache.get(_data_key(name, version, part))
+    if data is None:
+        data = build()
+        cache.set(
+            _data_key(name, version, part), data,
+            timeout=settings.CATALOG_CACHE_TIMEOUT
+        )
+    with _local_lock:
+        _local_catalogs[(name, part)] = (version, data)
+    return data
+
+
+def get_tag_ids():
+    """
+    Возвращает словарь «слаг тега» → id из кеша справочника тегов.
+    """
+    return get_catalog_data(
+        TAGS_CATALOG,
+        lambda: dict(Tag.objects.values_list('slug', 'id')),
+        part='ids',
+    )
@@ -0,0 +1,112 @@
+"""
+Денормализованные счетчики рецептов и пользователей.
+
+Счетчики изменяются атомарно выражениями F() в тех же транзакциях,
+что и связанные записи. По умолчанию их меняют обработчики
+post_save и post_delete (api.signals), поэтому админка, каскадное
+удаление и ORM не оставляют счетчики неверными. Быстрые пути API,
+которые пишут записи без сигналов (сырой SQL, bulk_create) или
+удаляют их пачкой, меняют счетчики сами одним запросом и отключают
+обработчики через manual_counters. Загрузка данных через bulk_create
+завершается пересчетом recount_counters.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription, User
+
+# Счетчик: модель со счетчиком, поле счетчика,
+# считаемая модель и ее внешний ключ на модель со счетчиком.
+COUNTERS = (
+    (Recipe, Favorite.counter_field, Favorite, 'recipe'),
+    (Recipe, ShoppingCart.counter_field, ShoppingCart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'subscribers_count', Subscription, 'author'),
+)
+
+
+_state = threading.local()
+
+
+@contextmanager
+def manual_counters():
+    """
+    Отключает изменение счетчиков обработчиками сигналов:
+    код внутри блока меняет их сам.
+    """
+    previous = counters_are_manual()
+    _state.manual = True
+    try:
+        yield
+    finally:
+        _state.manual = previous
+
+
+def counters_are_manual():
+    """
+    Проверяет, что счетчики сейчас меняются вручную.
+    """
+    return getattr(_state, 'manual', False)
+
+
+def change_counter(model, pks, field, delta):
+    """
+    Атомарно изменяет счетчик field на delta у объектов model.
+
+    Счетчик не опускается ниже нуля: записи, созданные в обход API
+    (админка, bulk_create), его не увеличивают, и вычитание
+    нарушило бы ограничение PositiveIntegerField.
+    """
+    return model.objects.filter(pk__in=pks).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def actual_count(related_model, related_field):
+    """
+    Возвращает подзапрос с фактическим количеством связанных записей.
+    """
+    return Coalesce(
+        Subquery(
+            related_model.objects
+            .filter(**{related_field: OuterRef('pk')})
+            .order_by()
+            .values(related_field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def recount_counters(dry_run=False):
+    """
+    Пересчитывает счетчики и исправляет расхождения.
+
+    Обновляются только строки, где сохраненное значение
+    отличается от фактического.
+
+    :return: Словарь «модель.поле» → количество исправленных строк.
+    """
+    drift = {}
+    for model, field, related_model, related_field in COUNTERS:
+        count = actual_count(related_model, related_field)
+        drifted = (
+            model.objects
+            .annotate(actual=count)
+            .exclude(**{field: F('actual')})
+            .values('pk')
+        )
+        name = f'{model.__name__}.{field}'
+        if dry_run:
+            drift[name] = drifted.count()
+        else:
+            drift[name] = model.objects.filter(pk__in=drifted).update(
+                **{field: count}
+            )
+    return drift
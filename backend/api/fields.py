@@ -0,0 +1,220 @@
+"""
+Дополнительные поля сериализаторов: связанные объекты,
+получаемые одним запросом, изображения в base64 и варианты
+изображений рецептов.
+"""
+
+import binascii
+import io
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from PIL import Image
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+from recipes.images import variant_urls
+
+
+def resolve_pks(queryset, values, message='Объекты с id {} не найдены.'):
+    """
+    Получает объекты queryset по списку первичных ключей одним
+    запросом id__in и сообщает сразу обо всех ненайденных ключах.
+
+    :return: Объекты в порядке ключей values.
+    """
+    pks = []
+    for value in values:
+        try:
+            if isinstance(value, bool):
+                raise TypeError
+            pks.append(int(value))
+        except (TypeError, ValueError):
+            raise serializers.ValidationError(
+                f'Некорректный id: {value!r}.'
+            )
+    objects = queryset.in_bulk(pks)
+    missing = [pk for pk in dict.fromkeys(pks) if pk not in objects]
+    if missing:
+        raise serializers.ValidationError(
+            message.format(', '.join(map(str, missing)))
+        )
+    return [objects[pk] for pk in pks]
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """
+    Список связанных объектов, которые проверяются
+    одним запросом, а не запросом на каждый элемент.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        return resolve_pks(self.child_relation.get_queryset(), data)
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Поле первичного ключа, которое при many=True
+    получает все объекты одним запросом.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    Адреса уменьшенных вариантов изображения рецепта
+    по именам вариантов и форматам.
+    """
+
+    def to_representation(self, value):
+        return variant_urls(value or {}, self.context.get('request'))
+
+
+class StreamingBase64ImageField(serializers.FileField):
+    """
+    Изображение в base64 (строка data:image/...;base64,...),
+    которое декодируется по частям.
+
+    Размер файла оценивается по длине строки еще до декодирования,
+    а формат и разрешение проверяются по заголовку, как только
+    декодированы его первые байты. Данные пишутся во временный файл,
+    который переходит с памяти на диск после SPOOL_SIZE байт,
+    и проверяются Pillow прямо в нем.
+    """
+
+    # Размер порции base64. Переносы строк из порции удаляются,
+    # а остаток до кратной 4 длины переходит в следующую порцию.
+    CHUNK_SIZE = 64 * 1024
+    # Сколько байт изображения ждать, пока не прочитается заголовок
+    HEADER_LIMIT = 256 * 1024
+    SPOOL_SIZE = 1024 * 1024
+    # Формат Pillow → расширение файла
+    FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+
+    default_error_messages = {
+        'invalid_image': 'Загрузите корректное изображение в base64.',
+        'unsupported_format': 'Формат изображения {format} не поддерживается.',
+        'too_large': 'Размер изображения превышает {max_size} байт.',
+        'too_many_pixels': (
+            'Разрешение изображения превышает {max_pixels} пикселей.'
+        ),
+    }
+
+    def __init__(self, **kwargs):
+        self.max_size = kwargs.pop('max_size', settings.RECIPE_IMAGE_MAX_SIZE)
+        self.max_pixels = kwargs.pop(
+            'max_pixels', settings.RECIPE_IMAGE_MAX_PIXELS
+        )
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str) or not data:
+            self.fail('invalid_image')
+        # Пропускаем префикс data:image/...;base64, без копирования строки.
+        start = data.find(',', 0, 100) + 1 if data.startswith('data:') else 0
+        # Переносы строк (base64.encodebytes, MIME) в размер не входят.
+        length = (
+            len(data) - start
+            - data.count('\n', start) - data.count('\r', start)
+        )
+        padding = data[max(start, len(data) - 4):].count('=')
+        if length * 3 // 4 - padding > self.max_size:
+            self.fail('too_large', max_size=self.max_size)
+
+        file = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_SIZE)
+        try:
+            image_format, size = self.decode(data, start, file)
+            self.verify(file)
+        except serializers.ValidationError:
+            file.close()
+            raise
+        extension = self.FORMATS[image_format]
+        return super().to_internal_value(InMemoryUploadedFile(
+            file,
+            field_name=self.field_name,
+            name=f'{uuid.uuid4()}.{extension}',
+            content_type=Image.MIME[image_format],
+            size=size,
+            charset=None,
+        ))
+
+    def decode(self, data, start, file):
+        """
+        Декодирует base64 порциями в file, проверяя заголовок
+        изображения по первым декодированным байтам.
+
+        :return: Формат Pillow и размер файла в байтах.
+        """
+        head, image_format, size, rest = b'', None, 0, ''
+        for position in range(start, len(data), self.CHUNK_SIZE):
+            part = rest + ''.join(
+                data[position:position + self.CHUNK_SIZE].split()
+            )
+            cut = len(part) - len(part) % 4
+            part, rest = part[:cut], part[cut:]
+            try:
+                chunk = binascii.a2b_base64(part)
+            except (binascii.Error, ValueError):
+                self.fail('invalid_image')
+            file.write(chunk)
+            size += len(chunk)
+            # Оценка по длине строки не учитывает прочие пробелы.
+            if size > self.max_size:
+                self.fail('too_large', max_size=self.max_size)
+            if image_format is None:
+                head += chunk
+                image_format = self.check_header(head)
+                if image_format is not None:
+                    head = b''
+        if rest or image_format is None:
+            self.fail('invalid_image')
+        return image_format, size
+
+    def verify(self, file):
+        """
+        Проверяет файл целиком прямо во временном файле: проверка
+        ImageField из django.forms сначала скопировала бы его в память.
+        """
+        try:
+            file.seek(0)
+            with Image.open(file) as image:
+                image.verify()
+        except Exception:
+            self.fail('invalid_image')
+        file.seek(0)
+
+    def check_header(self, head):
+        """
+        Проверяет формат и разрешение по началу файла.
+
+        :return: Формат Pillow или None, если заголовок
+        еще не прочитан целиком.
+        """
+        try:
+            with Image.open(io.BytesIO(head)) as image:
+                width, height = image.size
+                image_format = image.format
+        except Image.DecompressionBombError:
+            self.fail('too_many_pixels', max_pixels=self.max_pixels)
+        except Exception:
+            if len(head) < self.HEADER_LIMIT:
+                return None
+            self.fail('invalid_image')
+        if image_format not in self.FORMATS:
+            self.fail('unsupported_format', format=image_format)
+        if width * height > self.max_pixels:
+            self.fail('too_many_pixels', max_pixels=self.max_pixels)
+        return image_format
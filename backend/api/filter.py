@@ -1,6 +1,25 @@
+from django.db.models import Count, Exists, OuterRef, Subquery
 from django_filters import FilterSet
 from django_filters import rest_framework as filters
-from recipes.models import Recipe, Tag
+
+from api.cache import get_tag_ids
+from recipes.models import Recipe
+from recipes.search import search_recipes
+
+# Режимы фильтра по тегам: хотя бы один из тегов / все теги
+TAGS_ANY = 'any'
+TAGS_ALL = 'all'
+TAGS_MODES = (
+    (TAGS_ANY, 'Любой из тегов'),
+    (TAGS_ALL, 'Все теги'),
+)
+
+
+def tag_choices():
+    """
+    Возвращает допустимые слаги тегов из кеша справочника.
+    """
+    return [(slug, slug) for slug in get_tag_ids()]
 
 
 class RecipesFilter(FilterSet):
@@ -8,12 +27,19 @@ class RecipesFilter(FilterSet):
     Фильтр для модели Recipe.
 
     Позволяет фильтровать рецепты по названию, автору,
-    тегам и времени приготовления.
+    тегам и времени приготовления, а также искать их
+    по названию, описанию и ингредиентам.
     """
 
+    # Полнотекстовый поиск с сортировкой по релевантности
+    search = filters.CharFilter(
+        method='filter_search',
+        label='Поиск'
+    )
+
     # Фильтр по названию рецепта (регистронезависимый поиск)
     title = filters.CharFilter(
-        field_name='title',
+        field_name='name',
         lookup_expr='icontains',
         label='Название рецепта'
     )
@@ -24,14 +50,20 @@ class RecipesFilter(FilterSet):
         label='ID автора'
     )
 
-    # Фильтр по тегам (поиск по связанным тегам)
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
-        queryset=Tag.objects.all(),
+    # Фильтр по тегам (слаги проверяются по кешу справочника тегов)
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_choices,
+        method='filter_tags',
         label='Теги'
     )
 
+    # Режим фильтра по тегам, учитывается в filter_tags
+    tags_mode = filters.ChoiceFilter(
+        choices=TAGS_MODES,
+        method='filter_tags_mode',
+        label='Режим фильтра по тегам'
+    )
+
     # Фильтр по минимальному времени приготовления
     cooking_time_min = filters.NumberFilter(
         field_name='cooking_time',
@@ -49,9 +81,47 @@ class RecipesFilter(FilterSet):
     class Meta:
         model = Recipe
         fields = [
+            'search',
             'title',
             'author',
             'tags',
+            'tags_mode',
             'cooking_time_min',
             'cooking_time_max',
         ]
+
+    def filter_search(self, queryset, name, value):
+        """
+        Оставляет найденные рецепты, самые релевантные — первыми.
+        При пагинации по курсору порядок задает курсор.
+        """
+        return search_recipes(queryset, value).order_by(
+            '-search_rank', '-pub_date', '-id'
+        )
+
+    def filter_tags(self, queryset, name, value):
+        """
+        Оставляет рецепты с любым из тегов или со всеми тегами.
+
+        Теги проверяются подзапросом к таблице связей, поэтому
+        рецепты не дублируются и DISTINCT не нужен.
+        """
+        tag_ids = get_tag_ids()
+        ids = {tag_ids[slug] for slug in value if slug in tag_ids}
+        tagged = Recipe.tags.through.objects.filter(
+            recipe_id=OuterRef('pk'), tag_id__in=ids
+        )
+        if self.form.cleaned_data.get('tags_mode') == TAGS_ALL:
+            return queryset.alias(tags_matched=Subquery(
+                tagged.values('recipe_id')
+                .annotate(total=Count('*'))
+                .values('total')
+            )).filter(tags_matched=len(ids))
+        return queryset.filter(Exists(tagged))
+
+    def filter_tags_mode(self, queryset, name, value):
+        """
+        Ничего не фильтрует: режим применяется в filter_tags,
+        который читает его из cleaned_data.
+        """
+        return queryset
@@ -0,0 +1,148 @@
+"""
+Модуль индекса для автодополнения ингредиентов.
+
+Индекс хранит названия ингредиентов в отсортированном списке
+и отвечает на регистронезависимые запросы по префиксу бинарным
+поиском, не обращаясь к базе данных. Совпадения по началу
+названия идут первыми, затем — совпадения по подстроке.
+"""
+
+import threading
+from bisect import bisect_left, insort
+
+from api.cache import INGREDIENTS_CATALOG, get_catalog_version
+from recipes.models import Ingredient
+
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+
+def normalize(name):
+    """
+    Приводит название к виду, по которому ведется поиск.
+    """
+    return name.strip().casefold()
+
+
+class IngredientIndex:
+    """
+    Отсортированный индекс названий ингредиентов.
+    """
+
+    def __init__(self, ingredients=(), version=None):
+        self.version = version
+        self._lock = threading.Lock()
+        self._keys = []
+        self._rows = {}
+        for pk, name, measurement_unit in ingredients:
+            self._rows[pk] = self._make_row(pk, name, measurement_unit)
+            self._keys.append((normalize(name), pk))
+        self._keys.sort()
+
+    @classmethod
+    def build(cls):
+        """
+        Строит индекс по всем ингредиентам из базы данных.
+        """
+        version = get_catalog_version(INGREDIENTS_CATALOG)
+        ingredients = Ingredient.objects.values_list(
+            'id', 'name', 'measurement_unit'
+        )
+        return cls(ingredients, version=version)
+
+    @staticmethod
+    def _make_row(pk, name, measurement_unit):
+        return {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        Возвращает до limit ингредиентов, название которых
+        начинается с query, а затем содержащих query.
+        """
+        query = normalize(query)
+        with self._lock:
+            keys = self._keys
+            start = bisect_left(keys, (query,))
+            end = start
+            while (
+                end < len(keys) and end - start < limit
+                and keys[end][0].startswith(query)
+            ):
+                end += 1
+            found = [pk for _, pk in keys[start:end]]
+            if query and len(found) < limit:
+                for name, pk in keys:
+                    if query in name and not name.startswith(query):
+                        found.append(pk)
+                        if len(found) == limit:
+                            break
+            return [self._rows[pk] for pk in found]
+
+    def update(self, pk, name, measurement_unit, version=None):
+        """
+        Добавляет ингредиент в индекс или обновляет его.
+        """
+        with self._lock:
+            self._remove(pk)
+            self._rows[pk] = self._make_row(pk, name, measurement_unit)
+            insort(self._keys, (normalize(name), pk))
+            if version is not None:
+                self.version = version
+
+    def remove(self, pk, version=None):
+        """
+        Удаляет ингредиент из индекса.
+        """
+        with self._lock:
+            self._remove(pk)
+            if version is not None:
+                self.version = version
+
+    def _remove(self, pk):
+        row = self._rows.pop(pk, None)
+        if row is None:
+            return
+        key = (normalize(row['name']), pk)
+        position = bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_ingredient_index():
+    """
+    Возвращает индекс текущего процесса.
+
+    Индекс перестраивается целиком, если версия справочника
+    ингредиентов изменилась в другом процессе.
+    """
+    global _index
+    version = get_catalog_version(INGREDIENTS_CATALOG)
+    index = _index
+    if index is None or index.version != version:
+        with _index_lock:
+            index = _index
+            if index is None or index.version != version:
+                index = _index = IngredientIndex.build()
+    return index
+
+
+def apply_ingredient_change(pk, version, name=None, measurement_unit=None):
+    """
+    Точечно обновляет индекс процесса после изменения ингредиента.
+    Если name не передан, ингредиент считается удаленным.
+    """
+    index = _index
+    if index is None:
+        return
+    if name is None:
+        index.remove(pk, version=version)
+    else:
+        index.update(pk, name, measurement_unit, version=version)
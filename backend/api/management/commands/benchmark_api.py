@@ -0,0 +1,227 @@
+import json
+import platform
+import statistics
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.management.commands.seed_data import add_scale_arguments
+from api.request_stats import percentile
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+# Количество тегов в замерах фильтра по тегам
+TAG_COUNTS = (1, 2, 4, 8, 16)
+
+
+class Command(BaseCommand):
+    """
+    Команда для замера производительности основных эндпоинтов API.
+
+    Запросы выполняются внутри процесса через тестовый клиент DRF.
+    Для каждого эндпоинта сохраняются перцентили задержки и число
+    SQL-запросов. Результаты записываются в JSON и могут сравниваться
+    с предыдущим запуском (--baseline).
+    """
+
+    help = 'Замеряет задержку и число запросов основных эндпоинтов API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', action='store_true',
+            help='Перед замером заполнить базу командой seed_data.'
+        )
+        add_scale_arguments(parser)
+        parser.add_argument(
+            '--fast-passwords', action='store_true',
+            help='Передать --fast-passwords в seed_data.'
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=50,
+            help='Количество замеров на эндпоинт.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Количество прогревочных запросов на эндпоинт.'
+        )
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Файл для записи результатов.'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Файл с результатами предыдущего запуска для сравнения.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый относительный рост p50 по сравнению с baseline.'
+        )
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            call_command(
+                'seed_data',
+                users=options['users'],
+                recipes_per_user=options['recipes_per_user'],
+                tags=options['tags'],
+                tags_per_recipe=options['tags_per_recipe'],
+                ingredients_per_recipe=options['ingredients_per_recipe'],
+                favorites_per_user=options['favorites_per_user'],
+                carts_per_user=options['carts_per_user'],
+                subscriptions_per_user=options['subscriptions_per_user'],
+                random_seed=options['random_seed'],
+                fast_passwords=options['fast_passwords'],
+                stdout=self.stdout,
+            )
+
+        # Предпочитаем пользователя с подписками и корзиной,
+        # чтобы соответствующие эндпоинты не отдавали пустой ответ.
+        user = (
+            User.objects
+            .filter(subscriber__isnull=False, shoppingcart__isnull=False)
+            .order_by('id')
+            .first()
+        ) or User.objects.order_by('id').first()
+        recipe = Recipe.objects.order_by('id').first()
+        if user is None or recipe is None:
+            raise CommandError(
+                'В базе нет данных для замера: запустите команду с --seed.'
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+        results = {}
+        for name, url in self.get_scenarios(user, recipe):
+            results[name] = self.measure(
+                url, options['iterations'], options['warmup']
+            )
+            self.stdout.write(
+                f'{name:<28} p50={results[name]["p50_ms"]:>8.2f} мс '
+                f'p95={results[name]["p95_ms"]:>8.2f} мс '
+                f'запросов={results[name]["queries"]}'
+            )
+
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'iterations': options['iterations'],
+                'users': User.objects.count(),
+                'recipes': Recipe.objects.count(),
+            },
+            'endpoints': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(
+            self.style.SUCCESS(f'Результаты записаны в {options["output"]}')
+        )
+
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['tolerance'])
+
+    def get_scenarios(self, user, recipe):
+        """
+        Возвращает пары (имя, URL) замеряемых запросов.
+        """
+        slugs = list(Tag.objects.order_by('id').values_list('slug', flat=True))
+        ingredient = Ingredient.objects.order_by('id').first()
+        filters = f'?author={recipe.author_id}&cooking_time_max=120'
+        if slugs:
+            filters += f'&tags={slugs[0]}'
+        prefix = ingredient.name[:3] if ingredient else 'а'
+        return self.get_tag_scenarios(slugs) + [
+            ('recipes_list', '/api/recipes/'),
+            ('recipes_list_filtered', f'/api/recipes/{filters}'),
+            ('recipes_list_cursor', '/api/recipes/?cursor='),
+            ('recipe_detail', f'/api/recipes/{recipe.pk}/'),
+            ('ingredient_search', f'/api/ingredients/?name={prefix}'),
+            ('tags', '/api/tags/'),
+            ('subscriptions', '/api/users/subscriptions/'),
+            ('download_shopping_cart',
+             '/api/recipes/download_shopping_cart/'),
+            ('download_shopping_cart_txt',
+             '/api/recipes/download_shopping_cart/?format=txt'),
+        ]
+
+    def get_tag_scenarios(self, slugs):
+        """
+        Возвращает замеры фильтра по тегам с растущим числом тегов
+        в режимах any и all.
+        """
+        scenarios = []
+        for count in TAG_COUNTS:
+            if count > len(slugs):
+                break
+            tags = '&'.join(f'tags={slug}' for slug in slugs[:count])
+            for mode in ('any', 'all'):
+                scenarios.append((
+                    f'recipes_tags_{mode}_{count}',
+                    f'/api/recipes/?{tags}&tags_mode={mode}',
+                ))
+        return scenarios
+
+    def request(self, url):
+        """
+        Выполняет запрос и дочитывает потоковый ответ.
+        """
+        response = self.client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        if response.status_code != 200:
+            raise CommandError(f'{url}: статус {response.status_code}')
+        return response
+
+    def measure(self, url, iterations, warmup):
+        """
+        Возвращает статистику задержки и числа запросов для URL.
+        """
+        for _ in range(warmup):
+            self.request(url)
+        timings, queries = [], []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                self.request(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured.captured_queries))
+        return {
+            'url': url,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p90_ms': round(percentile(timings, 90), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'queries': max(queries),
+        }
+
+    def compare(self, results, baseline_path, tolerance):
+        """
+        Сравнивает результаты с baseline и сообщает о регрессиях.
+        """
+        with open(baseline_path, encoding='utf-8') as file:
+            baseline = json.load(file)['endpoints']
+        regressions = []
+        for name, current in results.items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            change = current['p50_ms'] / previous['p50_ms'] - 1
+            self.stdout.write(
+                f'{name:<28} p50 {previous["p50_ms"]:.2f} → '
+                f'{current["p50_ms"]:.2f} мс ({change:+.0%}), запросов '
+                f'{previous["queries"]} → {current["queries"]}'
+            )
+            if change > tolerance or current['queries'] > previous['queries']:
+                regressions.append(name)
+        if regressions:
+            raise CommandError(
+                'Регрессия производительности: ' + ', '.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий не обнаружено.'))
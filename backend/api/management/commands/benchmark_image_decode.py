@@ -0,0 +1,93 @@
+import base64
+import io
+import math
+import os
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+from rest_framework import serializers
+
+from api.fields import StreamingBase64ImageField
+
+
+class Command(BaseCommand):
+    """
+    Команда для замера пиковой памяти при декодировании
+    изображений рецептов из base64.
+
+    Сравнивает Base64ImageField из drf-extra-fields
+    и StreamingBase64ImageField на изображении заданного размера,
+    а также отказ для слишком большого файла и слишком большого
+    разрешения. Память считается через tracemalloc: учитываются
+    только выделения Python, без исходной строки base64.
+    """
+
+    help = 'Замеряет память при декодировании изображений из base64.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size-mb', type=float, default=10,
+            help='Примерный размер тестового PNG в мегабайтах.'
+        )
+
+    def handle(self, *args, **options):
+        data = self.make_payload(int(options['size_mb'] * 1024 * 1024))
+        self.stdout.write(f'Строка base64: {len(data) / 2 ** 20:.1f} МБ')
+
+        self.report('Base64ImageField', Base64ImageField(), data)
+        self.report(
+            'StreamingBase64ImageField', StreamingBase64ImageField(), data
+        )
+        self.report(
+            'StreamingBase64ImageField, лимит размера',
+            StreamingBase64ImageField(max_size=len(data) // 2),
+            data,
+        )
+        # Однобитный PNG огромного разрешения весит несколько килобайт.
+        buffer = io.BytesIO()
+        Image.new('1', (20000, 20000)).save(buffer, 'PNG')
+        self.report(
+            'StreamingBase64ImageField, лимит разрешения',
+            StreamingBase64ImageField(),
+            self.encode(buffer.getvalue()),
+        )
+
+    @staticmethod
+    def encode(content):
+        return 'data:image/png;base64,' + base64.b64encode(content).decode()
+
+    def make_payload(self, size):
+        """
+        Возвращает PNG из случайных пикселей (почти не сжимается)
+        размером около size байт в виде строки data URI.
+        """
+        side = int(math.sqrt(size / 3))
+        image = Image.frombytes(
+            'RGB', (side, side), os.urandom(side * side * 3)
+        )
+        buffer = io.BytesIO()
+        image.save(buffer, 'PNG', compress_level=1)
+        return self.encode(buffer.getvalue())
+
+    def report(self, title, field, data):
+        """
+        Декодирует data полем field и выводит пиковую память и время.
+        """
+        tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            result = field.to_internal_value(data)
+            outcome = f'принято ({result.size / 2 ** 20:.1f} МБ)'
+            result.close()
+        except serializers.ValidationError as error:
+            outcome = f'отклонено: {error.detail[0]}'
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.stdout.write(
+            f'{title}: пик {peak / 2 ** 20:.1f} МБ, '
+            f'{elapsed * 1000:.0f} мс, {outcome}'
+        )
@@ -0,0 +1,135 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.counters import recount_counters
+from api.management.utils import explicit_pub_date
+from api.pagination import RecipePagination
+from recipes.models import Recipe
+from users.models import User
+
+
+BENCH_USERNAME = 'benchmark_author'
+
+
+class Command(BaseCommand):
+    """
+    Команда для сравнения постраничной и keyset-пагинации
+    ленты рецептов на больших объемах данных.
+    """
+
+    help = (
+        'Заполняет таблицу рецептов до нужного размера и сравнивает '
+        'время выдачи страниц в режимах page и cursor.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipes', type=int, default=1_000_000,
+            help='Сколько рецептов должно быть в таблице.'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=6,
+            help='Размер страницы.'
+        )
+        parser.add_argument(
+            '--pages', type=int, nargs='+', default=[1, 100, 10_000],
+            help='Номера страниц для замера.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Сколько раз повторять каждый замер.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=10_000,
+            help='Размер пачки при заполнении таблицы.'
+        )
+
+    def handle(self, *args, **options):
+        self.seed(options['recipes'], options['batch_size'])
+        total = Recipe.objects.count()
+        limit = options['limit']
+        last_page = max(1, (total + limit - 1) // limit)
+        pages = sorted({min(page, last_page) for page in options['pages']})
+        if last_page not in pages:
+            pages.append(last_page)
+
+        self.stdout.write(f'Рецептов в таблице: {total}, limit={limit}')
+        self.stdout.write(
+            f'{"страница":>10} {"page, мс":>12} {"cursor, мс":>12}'
+        )
+        for page in pages:
+            page_ms = self.measure(
+                {'page': page, 'limit': limit}, options['repeat']
+            )
+            cursor = self.cursor_for_page(page, limit)
+            cursor_ms = self.measure(
+                {'cursor': cursor, 'limit': limit}, options['repeat']
+            )
+            self.stdout.write(
+                f'{page:>10} {page_ms:>12.2f} {cursor_ms:>12.2f}'
+            )
+        self.stdout.write(self.style.SUCCESS('Замер завершен.'))
+
+    def seed(self, target, batch_size):
+        """
+        Досоздает рецепты пачками до target штук.
+        """
+        missing = target - Recipe.objects.count()
+        if missing <= 0:
+            return
+        author, _ = User.objects.get_or_create(
+            username=BENCH_USERNAME,
+            defaults={'email': f'{BENCH_USERNAME}@example.com'},
+        )
+        start = timezone.now() - timedelta(seconds=missing)
+        self.stdout.write(f'Создаю {missing} рецептов...')
+        with transaction.atomic(), explicit_pub_date():
+            for offset in range(0, missing, batch_size):
+                Recipe.objects.bulk_create(
+                    Recipe(
+                        name=f'Рецепт {number}',
+                        author=author,
+                        image='recipes/images/benchmark.png',
+                        text='Сгенерировано для замера пагинации.',
+                        cooking_time=1 + number % 120,
+                        pub_date=start + timedelta(seconds=number),
+                    )
+                    for number in range(
+                        offset, min(offset + batch_size, missing)
+                    )
+                )
+        # bulk_create не изменяет счетчик рецептов автора.
+        recount_counters()
+
+    def cursor_for_page(self, page, limit):
+        """
+        Возвращает курсор, указывающий на начало страницы page.
+        """
+        if page == 1:
+            return ''
+        anchor = Recipe.objects.order_by(
+            *RecipePagination.ordering
+        ).only('pub_date')[(page - 1) * limit - 1]
+        return RecipePagination().encode_cursor(anchor, reverse=False)
+
+    def measure(self, params, repeat):
+        """
+        Возвращает медианное время выдачи страницы в миллисекундах.
+        """
+        factory = APIRequestFactory()
+        timings = []
+        for _ in range(repeat):
+            request = Request(factory.get('/api/recipes/', params))
+            paginator = RecipePagination()
+            started = time.perf_counter()
+            paginator.paginate_queryset(Recipe.objects.all(), request)
+            paginator.get_paginated_response([])
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
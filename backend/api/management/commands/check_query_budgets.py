@@ -0,0 +1,314 @@
+import base64
+import io
+import tempfile
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLResolver, reverse
+from djoser.utils import encode_uid
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+import api.urls
+from api.budgets import QueryBudgetExceeded, QueryBudgetMixin
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+# Порядок методов внутри маршрута: POST создает то, что удаляет DELETE.
+METHODS = ('get', 'post', 'put', 'patch', 'delete')
+
+# Размер страницы для списков: число запросов не должно от него зависеть
+PAGE_QUERY = 'limit=100&page_size=100'
+
+# Пароль проверяющего пользователя: его требуют смена пароля
+# и email, а также удаление пользователя
+PASSWORD = 'budget-check-password'
+
+
+class Command(BaseCommand):
+    """
+    Команда для проверки бюджетов SQL-запросов всех маршрутов API.
+
+    Обходит маршруты api/urls.py (включая users/urls.py), выполняет
+    для каждого метода запрос через тестовый клиент DRF в режиме
+    QUERY_BUDGET_STRICT и сообщает о превышениях бюджета, а также
+    о действиях без бюджета. Запросы аутентифицируются токеном, как
+    у настоящих клиентов, поэтому поиск токена входит в число
+    запросов. GET-запросы к спискам выполняются с максимальным
+    размером страницы. Все изменения, включая токен, пароль и права
+    персонала у проверяющего пользователя, выполняются
+    в транзакции, которая откатывается, файлы пишутся во временный
+    каталог. Методы, для которых здесь нет примера тела запроса
+    (например, активация и сброс пароля djoser по письму),
+    пропускаются.
+
+    Проверять нужно на базе, заполненной seed_data.
+    """
+
+    help = 'Проверяет бюджеты SQL-запросов всех маршрутов API.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            problems = self.check_routes()
+            transaction.set_rollback(True)
+        if problems:
+            raise CommandError('\n'.join(problems))
+        self.stdout.write(
+            self.style.SUCCESS('Все маршруты укладываются в бюджеты.')
+        )
+
+    def check_routes(self):
+        """
+        Проверяет все маршруты и возвращает найденные проблемы.
+        """
+        self.prepare()
+        problems = []
+        checked = set()
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            QUERY_BUDGET_STRICT=True, MEDIA_ROOT=media_root
+        ):
+            for name, view, actions, kwargs in self.iter_routes(
+                api.urls.urlpatterns
+            ):
+                # Корень API есть и в users/urls.py, и в api/urls.py
+                if name in checked:
+                    continue
+                checked.add(name)
+                problems += self.check_route(name, view, actions, kwargs)
+        return problems
+
+    def prepare(self):
+        """
+        Выбирает пользователя и объекты для запросов.
+        """
+        self.user = (
+            User.objects
+            .filter(
+                recipes__isnull=False,
+                subscriber__isnull=False,
+                shoppingcart__isnull=False,
+            )
+            .order_by('id')
+            .first()
+        ) or User.objects.filter(recipes__isnull=False).order_by('id').first()
+        if self.user is None:
+            raise CommandError(
+                'В базе нет данных: заполните ее командой seed_data.'
+            )
+        # Статистика запросов и изменение других пользователей
+        # доступны только персоналу.
+        self.user.is_staff = True
+        self.user.set_password(PASSWORD)
+        self.user.save(update_fields=['is_staff', 'password'])
+        self.recipe = self.user.recipes.order_by('id').first()
+        # Рецепт и автор, которых еще нет в списках пользователя
+        self.free_recipe = Recipe.objects.exclude(
+            favorite__user=self.user
+        ).exclude(shoppingcart__user=self.user).order_by('id').first()
+        self.free_author = User.objects.exclude(pk=self.user.pk).exclude(
+            subscribed__user=self.user
+        ).order_by('id').first()
+        if self.free_recipe is None or self.free_author is None:
+            raise CommandError(
+                f'У пользователя {self.user} в избранном все рецепты '
+                'или в подписках все авторы.'
+            )
+        self.recipe_ids = list(
+            Recipe.objects.order_by('id').values_list('id', flat=True)[:10]
+        )
+        self.author_ids = list(
+            User.objects.exclude(pk=self.user.pk)
+            .order_by('id').values_list('id', flat=True)[:10]
+        )
+        self.tag_ids = list(
+            Tag.objects.order_by('id').values_list('id', flat=True)[:2]
+        )
+        self.ingredient_ids = list(
+            Ingredient.objects.order_by('id').values_list('id', flat=True)[:3]
+        )
+        self.image = self.get_image()
+        token, _ = Token.objects.get_or_create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def iter_routes(self, patterns, namespace='api'):
+        """
+        Возвращает маршруты: имя, класс представления,
+        словарь «метод» → действие и аргументы для reverse.
+        """
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from self.iter_routes(pattern.url_patterns, namespace)
+                continue
+            groups = pattern.pattern.regex.groupindex
+            if 'format' in groups:
+                # Дубли маршрутов с суффиксом формата (.json)
+                continue
+            callback = pattern.callback
+            view = getattr(callback, 'cls', None) or getattr(
+                callback, 'view_class', None
+            )
+            actions = getattr(callback, 'actions', None) or {
+                method: method for method in METHODS
+                if hasattr(view, method)
+            }
+            name = f'{namespace}:{pattern.name}'
+            kwargs = {group: self.get_object_id(name) for group in groups}
+            yield name, view, actions, kwargs
+
+    def get_object_id(self, name):
+        """
+        Возвращает идентификатор объекта для маршрута с pk/id.
+        """
+        if name in ('api:recipes-favorite', 'api:recipes-shopping-cart'):
+            return self.free_recipe.pk
+        if name.startswith('api:recipes-'):
+            return self.recipe.pk
+        if name.startswith('api:tags-'):
+            return self.tag_ids[0]
+        if name.startswith('api:ingredients-'):
+            return self.ingredient_ids[0]
+        return self.free_author.pk
+
+    def check_route(self, name, view, actions, kwargs):
+        """
+        Выполняет запросы маршрута и возвращает найденные проблемы.
+        """
+        url = reverse(name, kwargs=kwargs)
+        if not issubclass(view, QueryBudgetMixin):
+            self.stdout.write(f'{url}: {view.__name__} без QueryBudgetMixin')
+            return []
+        problems = []
+        with transaction.atomic():
+            for method in METHODS:
+                action = actions.get(method)
+                if action is None:
+                    continue
+                data = self.get_payload(name, method)
+                if method != 'get' and data is None:
+                    self.stdout.write(f'{method.upper()} {url}: нет примера')
+                    continue
+                problem = self.check_request(
+                    view, action, method, url, data
+                )
+                if problem:
+                    problems.append(f'{method.upper()} {url}: {problem}')
+            transaction.set_rollback(True)
+        return problems
+
+    def check_request(self, view, action, method, url, data):
+        """
+        Выполняет запрос и возвращает описание проблемы или None.
+        """
+        if method == 'get':
+            url = f'{url}?{PAGE_QUERY}'
+        handler = getattr(view, action, None)
+        budget = getattr(handler, 'query_budget', None)
+        if budget is None:
+            budget = view.query_budgets.get(action)
+        try:
+            with CaptureQueriesContext(connection) as captured:
+                response = getattr(self.client, method)(
+                    url, data, format='json'
+                )
+                if response.streaming:
+                    b''.join(response.streaming_content)
+        except QueryBudgetExceeded as error:
+            return str(error)
+        if response.status_code >= 400:
+            return f'статус {response.status_code}'
+        if budget is None:
+            return f'у действия {action} нет бюджета ({len(captured)})'
+        self.stdout.write(
+            f'{method.upper():6} {url}: {len(captured)} из {budget}'
+        )
+        return None
+
+    def get_payload(self, name, method):
+        """
+        Возвращает тело изменяющего запроса или None.
+        """
+        recipe = {
+            'name': 'Проверка бюджета',
+            'text': 'Рецепт для проверки бюджета запросов.',
+            'cooking_time': 10,
+            'image': self.image,
+            'tags': self.tag_ids,
+            'ingredients': [
+                {'id': pk, 'amount': 5} for pk in self.ingredient_ids
+            ],
+        }
+        # Маршруты djoser для смены email называются по username.
+        new_login = f'new_{User.USERNAME_FIELD}'
+        payloads = {
+            ('api:recipes-list', 'post'): recipe,
+            ('api:recipes-detail', 'put'): recipe,
+            ('api:recipes-detail', 'patch'): {
+                'name': 'Проверка бюджета',
+                'ingredients': recipe['ingredients'][:2],
+            },
+            ('api:recipes-detail', 'delete'): {},
+            ('api:recipes-favorite', 'post'): {},
+            ('api:recipes-favorite', 'delete'): {},
+            ('api:recipes-shopping-cart', 'post'): {},
+            ('api:recipes-shopping-cart', 'delete'): {},
+            ('api:recipes-favorite-bulk', 'post'): {'ids': self.recipe_ids},
+            ('api:recipes-favorite-bulk', 'delete'): {
+                'ids': self.recipe_ids
+            },
+            ('api:recipes-shopping-cart-bulk', 'post'): {
+                'ids': self.recipe_ids
+            },
+            ('api:recipes-shopping-cart-bulk', 'delete'): {
+                'ids': self.recipe_ids
+            },
+            ('api:users-list', 'post'): {
+                'email': 'budget-check@example.com',
+                'username': 'budget-check',
+                'first_name': 'Проверка',
+                'last_name': 'Бюджета',
+                'password': 'budget-check-password',
+            },
+            ('api:users-detail', 'put'): {
+                'email': 'budget-check-edit@example.com',
+                'username': 'budget-check-edit',
+                'first_name': 'Проверка',
+                'last_name': 'Бюджета',
+            },
+            ('api:users-detail', 'patch'): {'first_name': 'Проверка'},
+            ('api:users-detail', 'delete'): {'current_password': PASSWORD},
+            ('api:users-set-password', 'post'): {
+                'current_password': PASSWORD,
+                'new_password': 'budget-check-new-password',
+            },
+            ('api:users-set-username', 'post'): {
+                'current_password': PASSWORD,
+                new_login: 'budget-check-new@example.com',
+            },
+            ('api:users-reset-username-confirm', 'post'): {
+                'uid': encode_uid(self.user.pk),
+                'token': default_token_generator.make_token(self.user),
+                new_login: 'budget-check-new@example.com',
+            },
+            ('api:users-subscribe', 'post'): {},
+            ('api:users-subscribe', 'delete'): {},
+            ('api:users-subscribe-bulk', 'post'): {'ids': self.author_ids},
+            ('api:users-subscribe-bulk', 'delete'): {
+                'ids': self.author_ids
+            },
+            ('api:request-stats', 'delete'): {},
+        }
+        return payloads.get((name, method))
+
+    @staticmethod
+    def get_image():
+        """
+        Возвращает маленькое PNG-изображение в base64.
+        """
+        buffer = io.BytesIO()
+        Image.new('RGB', (8, 8), 'white').save(buffer, 'PNG')
+        encoded = base64.b64encode(buffer.getvalue()).decode()
+        return f'data:image/png;base64,{encoded}'
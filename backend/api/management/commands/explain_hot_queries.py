@@ -0,0 +1,164 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe, Tag
+from users.models import User
+
+# Маленькие справочники, которые допустимо читать целиком
+SMALL_TABLES = {'recipes_tag'}
+
+SQLITE_SCAN = re.compile(r'^SCAN (\S+)( USING .*)?$')
+SQLITE_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+SQLITE_COROUTINE = re.compile(r'^(?:CO-ROUTINE|MATERIALIZE) (\S+)')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\S+)')
+
+
+class Command(BaseCommand):
+    """
+    Команда для проверки планов запросов основных эндпоинтов.
+
+    Запросы выполняются через тестовый клиент DRF, выполненный SQL
+    перехватывается, и для каждого SELECT запрашивается план EXPLAIN.
+    Если таблица в плане читается целиком (Seq Scan в PostgreSQL,
+    SCAN без индекса в SQLite, а также SCAN по индексу с последующей
+    сортировкой результата), команда завершается с ошибкой.
+
+    Проверять имеет смысл на базе, заполненной seed_data:
+    на маленьких таблицах PostgreSQL выбирает Seq Scan независимо
+    от индексов. COUNT(*) без WHERE (число всех рецептов для
+    пагинации) читает всю таблицу по определению и пропускается.
+    """
+
+    help = 'Проверяет, что запросы основных эндпоинтов используют индексы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--show-plans', action='store_true',
+            help='Выводить планы всех запросов.'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(
+                f'База {connection.vendor} не поддерживается.'
+            )
+        user = (
+            User.objects
+            .filter(subscriber__isnull=False, shoppingcart__isnull=False)
+            .order_by('id')
+            .first()
+        ) or User.objects.order_by('id').first()
+        recipe = Recipe.objects.order_by('id').first()
+        if user is None or recipe is None:
+            raise CommandError(
+                'В базе нет данных: заполните ее командой seed_data.'
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+        problems = []
+        for url in self.get_urls(recipe):
+            for sql in self.capture(url):
+                if self.is_full_count(sql):
+                    continue
+                plan = self.explain(sql)
+                scans = self.find_full_scans(plan)
+                if options['show_plans'] or scans:
+                    self.stdout.write(f'{url}\n  {sql[:120]}')
+                    for line in plan:
+                        self.stdout.write(f'    {line}')
+                if scans:
+                    problems.append(f'{url}: {", ".join(scans)}')
+
+        if problems:
+            raise CommandError(
+                'Полное чтение таблиц:\n' + '\n'.join(problems)
+            )
+        self.stdout.write(
+            self.style.SUCCESS('Все запросы используют индексы.')
+        )
+
+    def get_urls(self, recipe):
+        """
+        Возвращает адреса проверяемых запросов.
+        """
+        slugs = list(
+            Tag.objects.order_by('id').values_list('slug', flat=True)[:2]
+        )
+        tags = '&'.join(f'tags={slug}' for slug in slugs)
+        return [
+            '/api/recipes/',
+            '/api/recipes/?cursor=',
+            f'/api/recipes/?author={recipe.author_id}',
+            f'/api/recipes/?author={recipe.author_id}&cursor=',
+            '/api/recipes/?cooking_time_min=5&cooking_time_max=15',
+            f'/api/recipes/?{tags}',
+            f'/api/recipes/?{tags}&tags_mode=all',
+            '/api/recipes/?search=суп',
+            f'/api/recipes/{recipe.pk}/',
+            '/api/users/subscriptions/',
+            '/api/recipes/download_shopping_cart/?format=txt',
+        ]
+
+    def capture(self, url):
+        """
+        Выполняет запрос и возвращает SQL выполненных SELECT.
+        """
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        if response.status_code != 200:
+            raise CommandError(f'{url}: статус {response.status_code}')
+        return [
+            query['sql'] for query in captured.captured_queries
+            if query['sql'].startswith('SELECT')
+        ]
+
+    @staticmethod
+    def is_full_count(sql):
+        """
+        Проверяет, что запрос считает все строки таблицы.
+        """
+        return sql.startswith('SELECT COUNT(*)') and ' WHERE ' not in sql
+
+    def explain(self, sql):
+        """
+        Возвращает строки плана запроса.
+        """
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('EXPLAIN ' + sql)
+                return [row[0] for row in cursor.fetchall()]
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def find_full_scans(self, plan):
+        """
+        Возвращает таблицы, которые читаются целиком.
+        """
+        if connection.vendor == 'postgresql':
+            tables = [
+                match.group(1) for line in plan
+                for match in [POSTGRES_SCAN.search(line)] if match
+            ]
+        else:
+            # Подзапросы SQLite читаются как сопрограммы — это не таблицы.
+            coroutines = {
+                match.group(1) for line in plan
+                for match in [SQLITE_COROUTINE.match(line)] if match
+            }
+            scans = [
+                match.groups() for line in plan
+                for match in [SQLITE_SCAN.match(line)] if match
+                and match.group(1) not in coroutines
+            ]
+            tables = [table for table, index in scans if index is None]
+            if SQLITE_SORT in plan:
+                # Обход всего индекса с сортировкой — то же полное чтение.
+                tables += [table for table, index in scans if index]
+        return [table for table in tables if table not in SMALL_TABLES]
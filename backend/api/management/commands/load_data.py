@@ -1,78 +1,186 @@
+import csv
 import json
 import os
+import time
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from django.db.utils import IntegrityError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
+from api.cache import INGREDIENTS_CATALOG, bump_catalog_version
+from api.management.utils import batched
 from recipes.models import Ingredient
 
 
-class Command(BaseCommand):
+def iter_json_array(file, chunk_size=64 * 1024):
     """
-    Команда Django для загрузки данных из JSON-файлов в базу данных.
-    Поддерживает загрузку ингредиентов.
+    Построчно (по элементам) читает JSON-массив из файла,
+    не загружая весь файл в память.
     """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    for chunk in iter(lambda: file.read(chunk_size), ''):
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            # Пропускаем пробелы и запятые между элементами.
+            while position < len(buffer) and (
+                buffer[position].isspace()
+                or started and buffer[position] == ','
+            ):
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != '[':
+                    raise json.JSONDecodeError(
+                        'Ожидался JSON-массив', buffer, position
+                    )
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Элемент еще не прочитан целиком — нужен следующий фрагмент.
+                break
+            yield item
+    raise json.JSONDecodeError('Неожиданный конец файла', buffer, position)
 
-    help = "Загружает данные из JSON-файлов в базу данных."
 
-    def handle(self, *args, **options):
-        """
-        Основной метод, который выполняется при вызове команды.
-        """
-        # Путь к файлу ингредиентов
-        ingredients_file = os.path.join(
-            settings.BASE_DIR.parent, "data", "ingredients.json")
+def iter_csv_rows(file):
+    """
+    Читает CSV-файл вида «название,единица измерения» без заголовка.
+    """
+    for row in csv.reader(file):
+        if row:
+            yield {'name': row[0], 'measurement_unit': row[1]}
+
 
-        # Загрузка ингредиентов
-        self.import_ingredients(ingredients_file)
+class Command(BaseCommand):
+    """
+    Команда Django для загрузки ингредиентов в базу данных.
 
-        self.stdout.write(self.style.SUCCESS("Данные успешно загружены!"))
+    Читает JSON- или CSV-файл потоком и записывает ингредиенты
+    пачками через bulk_create в одной транзакции. Существующие
+    ингредиенты пропускаются, а с флагом --update у них обновляется
+    единица измерения.
+    """
 
-    def import_ingredients(self, ingredients_file):
-        """
-        Загружает ингредиенты из JSON-файла в базу данных.
+    help = "Загружает ингредиенты из JSON- или CSV-файла в базу данных."
 
-        :param ingredients_file: Путь к файлу с ингредиентами.
+    readers = {
+        '.json': iter_json_array,
+        '.csv': iter_csv_rows,
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default=os.path.join(
+                settings.BASE_DIR.parent, 'data', 'ingredients.json'
+            ),
+            help='Путь к файлу ингредиентов (.json или .csv).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество ингредиентов в одной пачке.'
+        )
+        parser.add_argument(
+            '--update', action='store_true',
+            help='Обновлять единицу измерения у существующих ингредиентов.'
+        )
+
+    def handle(self, *args, **options):
         """
+        Основной метод, который выполняется при вызове команды.
+        """
+        ingredients_file = options['file']
         if not os.path.exists(ingredients_file):
-            self.stdout.write(
-                self.style.ERROR(f"Файл {ingredients_file} не найден!")
+            raise CommandError(f"Файл {ingredients_file} не найден!")
+        extension = os.path.splitext(ingredients_file)[1].lower()
+        if extension not in self.readers:
+            raise CommandError(
+                f"Неподдерживаемый формат файла: {ingredients_file}"
             )
-            return
 
+        started = time.perf_counter()
         try:
             with open(ingredients_file, "r", encoding="utf-8") as file:
-                ingredients_data = json.load(file)
-                for ingredient_data in ingredients_data:
-                    self.create_ingredient(ingredient_data)
-        except json.JSONDecodeError:
-            self.stdout.write(
-                self.style.ERROR(
-                    f"Файл {ingredients_file} содержит некорректный JSON!"
+                inserted, updated, total = self.import_ingredients(
+                    self.readers[extension](file),
+                    options['batch_size'],
+                    options['update'],
                 )
+        except json.JSONDecodeError:
+            raise CommandError(
+                f"Файл {ingredients_file} содержит некорректный JSON!"
             )
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Данные успешно загружены! Обработано строк: {total}, "
+            f"добавлено: {inserted}, обновлено: {updated}, "
+            f"скорость: {total / elapsed if elapsed else total:.0f} строк/с."
+        ))
 
-    def create_ingredient(self, ingredient_data):
+    @transaction.atomic
+    def import_ingredients(self, rows, batch_size, update):
         """
-        Создает ингредиент в базе данных.
+        Записывает ингредиенты пачками.
 
-        :param ingredient_data: Данные ингредиента
-        (словарь с ключами 'name' и 'measurement_unit').
+        :return: Количество добавленных, обновленных
+        и всех прочитанных строк.
         """
-        try:
-            Ingredient.objects.create(
-                name=ingredient_data["name"],
-                measurement_unit=ingredient_data["measurement_unit"],
-            )
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"Ингредиент '{ingredient_data['name']}' успешно создан!"
-                )
-            )
-        except IntegrityError:
-            self.stdout.write(
-                self.style.WARNING(
-                    f"Ингредиент '{ingredient_data['name']}' уже существует!"
-                )
-            )
+        inserted = updated = total = 0
+        for batch in batched(rows, batch_size):
+            total += len(batch)
+            batch_inserted, batch_updated = self.import_batch(batch, update)
+            inserted += batch_inserted
+            updated += batch_updated
+
+        # bulk_create не отправляет сигналы, поэтому сбрасываем кеш сами.
+        transaction.on_commit(
+            lambda: bump_catalog_version(INGREDIENTS_CATALOG)
+        )
+        return inserted, updated, total
+
+    def import_batch(self, batch, update):
+        """
+        Записывает одну пачку ингредиентов.
+        """
+        # Повторы внутри пачки схлопываем: побеждает последняя запись.
+        units = {
+            row['name']: row['measurement_unit'] for row in batch
+        }
+        existing = dict(
+            Ingredient.objects
+            .filter(name__in=units)
+            .values_list('name', 'measurement_unit')
+        )
+        new = [name for name in units if name not in existing]
+        changed = [
+            name for name in units
+            if name in existing and existing[name] != units[name]
+        ]
+
+        if update:
+            names, options = new + changed, {
+                'update_conflicts': True,
+                'unique_fields': ['name'],
+                'update_fields': ['measurement_unit'],
+            }
+        else:
+            names, options = new, {'ignore_conflicts': True}
+        Ingredient.objects.bulk_create(
+            [
+                Ingredient(name=name, measurement_unit=units[name])
+                for name in names
+            ],
+            **options,
+        )
+        return len(new), len(changed) if update else 0
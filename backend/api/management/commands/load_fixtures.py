@@ -0,0 +1,66 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.management.fixtures import STAGES, FixtureLoader
+from api.management.utils import iter_records
+
+
+class Command(BaseCommand):
+    """
+    Команда для загрузки больших объемов тестовых данных.
+
+    Читает из каталога файлы users, tags, recipes, recipe_ingredients,
+    favorites, shopping_carts и subscriptions (JSONL или CSV с заголовком)
+    и записывает их через FixtureLoader в порядке зависимостей.
+    Форматы записей описаны в api/management/fixtures.py.
+    """
+
+    help = 'Загружает тестовые данные из каталога с JSONL/CSV-файлами.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directory',
+            help='Каталог с файлами данных.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество записей в одной пачке.'
+        )
+        parser.add_argument(
+            '--fast-passwords', action='store_true',
+            help=(
+                'Хешировать пароли быстрым MD5. Доступно только '
+                'с настройками foodgram.settings_test.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        if not os.path.isdir(directory):
+            raise CommandError(f'Каталог {directory} не найден!')
+        loader = FixtureLoader(
+            options['batch_size'], options['fast_passwords']
+        )
+        for stage in STAGES:
+            path = self.find_file(directory, stage)
+            if path is None:
+                continue
+            count, elapsed = loader.load(stage, iter_records(path))
+            self.stdout.write(
+                f'{stage}: {count} записей за {elapsed:.1f} с '
+                f'({count / elapsed if elapsed else count:.0f} записей/с)'
+            )
+        loader.finish()
+        self.stdout.write(self.style.SUCCESS('Данные успешно загружены!'))
+
+    @staticmethod
+    def find_file(directory, stage):
+        """
+        Ищет файл этапа с расширением .jsonl или .csv.
+        """
+        for extension in ('.jsonl', '.csv'):
+            path = os.path.join(directory, stage + extension)
+            if os.path.exists(path):
+                return path
+        return None
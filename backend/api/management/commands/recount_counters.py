@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.counters import recount_counters
+
+
+class Command(BaseCommand):
+    """
+    Команда для пересчета денормализованных счетчиков.
+
+    Сравнивает favorites_count, in_cart_count, recipes_count
+    и subscribers_count с фактическим количеством записей
+    и исправляет расхождения.
+    """
+
+    help = 'Пересчитывает счетчики рецептов и пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать количество расхождений.'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drift = recount_counters(dry_run=options['dry_run'])
+        for name, count in drift.items():
+            self.stdout.write(f'{name}: расхождений {count}')
+        if options['dry_run']:
+            return
+        self.stdout.write(self.style.SUCCESS('Счетчики пересчитаны!'))
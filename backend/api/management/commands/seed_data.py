@@ -0,0 +1,202 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.management.fixtures import STAGES, FixtureLoader
+from recipes.models import Ingredient
+
+
+# Дата публикации первого сгенерированного рецепта
+SEED_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+# Общий пароль сгенерированных пользователей: хешируется один раз
+SEED_PASSWORD = 'seed-password'
+
+
+def add_scale_arguments(parser):
+    """
+    Добавляет параметры масштаба генерируемых данных.
+    Используется также командой benchmark_api.
+    """
+    parser.add_argument(
+        '--users', type=int, default=1000,
+        help='Количество пользователей.'
+    )
+    parser.add_argument(
+        '--recipes-per-user', type=int, default=10,
+        help='Количество рецептов у каждого пользователя.'
+    )
+    parser.add_argument(
+        '--tags', type=int, default=8,
+        help='Количество тегов.'
+    )
+    parser.add_argument(
+        '--tags-per-recipe', type=int, default=2,
+        help='Количество тегов у рецепта.'
+    )
+    parser.add_argument(
+        '--ingredients-per-recipe', type=int, default=6,
+        help='Количество ингредиентов в рецепте.'
+    )
+    parser.add_argument(
+        '--favorites-per-user', type=int, default=20,
+        help='Количество рецептов в избранном у пользователя.'
+    )
+    parser.add_argument(
+        '--carts-per-user', type=int, default=5,
+        help='Количество рецептов в корзине у пользователя.'
+    )
+    parser.add_argument(
+        '--subscriptions-per-user', type=int, default=10,
+        help='Количество авторов, на которых подписан пользователь.'
+    )
+    parser.add_argument(
+        '--random-seed', type=int, default=42,
+        help='Начальное значение генератора случайных чисел.'
+    )
+
+
+class Command(BaseCommand):
+    """
+    Команда для генерации синтетических данных заданного масштаба.
+
+    Данные воспроизводимы: при одинаковых параметрах и --random-seed
+    генерируется один и тот же набор. Ингредиенты должны быть
+    загружены заранее командой load_data. Команду следует запускать
+    на пустой базе.
+    """
+
+    help = 'Заполняет базу синтетическими данными для нагрузочных замеров.'
+
+    def add_arguments(self, parser):
+        add_scale_arguments(parser)
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Префикс имен пользователей и слагов тегов.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество записей в одной пачке.'
+        )
+        parser.add_argument(
+            '--fast-passwords', action='store_true',
+            help=(
+                'Хешировать пароли быстрым MD5. Доступно только '
+                'с настройками foodgram.settings_test.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.ingredients = list(
+            Ingredient.objects.order_by('name').values_list('name', flat=True)
+        )
+        if len(self.ingredients) < options['ingredients_per_recipe']:
+            raise CommandError(
+                'Недостаточно ингредиентов: сначала выполните load_data.'
+            )
+        if options['tags'] < options['tags_per_recipe']:
+            raise CommandError('Тегов меньше, чем тегов на рецепт.')
+
+        self.total_users = options['users']
+        self.total_recipes = options['users'] * options['recipes_per_user']
+        loader = FixtureLoader(
+            options['batch_size'], options['fast_passwords']
+        )
+        for stage in STAGES:
+            # У каждого вида свой генератор, чтобы набор не зависел
+            # от того, сколько чисел потребили предыдущие этапы.
+            self.random = random.Random(f'{options["random_seed"]}:{stage}')
+            records = getattr(self, f'generate_{stage}')()
+            count, elapsed = loader.load(stage, records)
+            self.stdout.write(f'{stage}: {count} записей за {elapsed:.1f} с')
+        loader.finish()
+        self.stdout.write(self.style.SUCCESS('Данные успешно созданы!'))
+
+    def username(self, number):
+        return f'{self.options["prefix"]}_user_{number}'
+
+    def tag_slug(self, number):
+        return f'{self.options["prefix"]}-tag-{number}'
+
+    def generate_users(self):
+        for number in range(self.total_users):
+            username = self.username(number)
+            yield {
+                'username': username,
+                'email': f'{username}@example.com',
+                'first_name': 'Имя',
+                'last_name': f'Фамилия {number}',
+                'password': SEED_PASSWORD,
+            }
+
+    def generate_tags(self):
+        for number in range(self.options['tags']):
+            yield {
+                'name': f'{self.options["prefix"]} тег {number}',
+                'slug': self.tag_slug(number),
+            }
+
+    def generate_recipes(self):
+        recipes_per_user = self.options['recipes_per_user']
+        slugs = [
+            self.tag_slug(number) for number in range(self.options['tags'])
+        ]
+        for number in range(self.total_recipes):
+            yield {
+                'ref': number,
+                'author': self.username(number // recipes_per_user),
+                'name': f'Рецепт {number}',
+                'text': f'Описание рецепта {number}.',
+                'cooking_time': self.random.randint(1, 180),
+                'image': 'recipes/images/seed.png',
+                'pub_date': (
+                    SEED_START + timedelta(seconds=number)
+                ).isoformat(),
+                'tags': self.random.sample(
+                    slugs, self.options['tags_per_recipe']
+                ),
+            }
+
+    def generate_recipe_ingredients(self):
+        for number in range(self.total_recipes):
+            for name in self.random.sample(
+                self.ingredients, self.options['ingredients_per_recipe']
+            ):
+                yield {
+                    'recipe': number,
+                    'ingredient': name,
+                    'amount': self.random.randint(1, 500),
+                }
+
+    def generate_user_recipes(self, per_user):
+        per_user = min(per_user, self.total_recipes)
+        for number in range(self.total_users):
+            for recipe in self.random.sample(
+                range(self.total_recipes), per_user
+            ):
+                yield {'user': self.username(number), 'recipe': recipe}
+
+    def generate_favorites(self):
+        return self.generate_user_recipes(self.options['favorites_per_user'])
+
+    def generate_shopping_carts(self):
+        return self.generate_user_recipes(self.options['carts_per_user'])
+
+    def generate_subscriptions(self):
+        per_user = min(
+            self.options['subscriptions_per_user'], self.total_users - 1
+        )
+        for number in range(self.total_users):
+            authors = [
+                author
+                for author in self.random.sample(
+                    range(self.total_users), per_user + 1
+                )
+                if author != number
+            ][:per_user]
+            for author in authors:
+                yield {
+                    'user': self.username(number),
+                    'author': self.username(author),
+                }
@@ -0,0 +1,295 @@
+"""
+Загрузчик больших объемов тестовых данных.
+
+Записи каждого вида сохраняются через bulk_create пачками в порядке
+зависимостей. Внешние ключи разрешаются в памяти: пользователи —
+по username, теги — по slug, ингредиенты — по названию, рецепты —
+по полю ref из записей рецептов.
+
+Форматы записей:
+- users: username, email, first_name, last_name, password
+  (пароль или готовый хеш Django, который сохраняется как есть);
+- tags: name, slug;
+- recipes: ref, author, name, text, cooking_time, image,
+  pub_date (необязательно), tags (список или slug через «;»);
+- recipe_ingredients: recipe, ingredient, amount;
+- favorites, shopping_carts: user, recipe;
+- subscriptions: user, author.
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.cache import TAGS_CATALOG, bump_catalog_version
+from api.counters import recount_counters
+from api.management.utils import batched, explicit_pub_date
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from recipes.search import update_search_documents
+from users.models import Subscription, User
+
+FAST_HASHER = 'django.contrib.auth.hashers.MD5PasswordHasher'
+# Виды записей в порядке зависимостей
+STAGES = (
+    'users',
+    'tags',
+    'recipes',
+    'recipe_ingredients',
+    'favorites',
+    'shopping_carts',
+    'subscriptions',
+)
+
+
+class FixtureLoader:
+    """
+    Пакетная запись тестовых данных с разрешением ссылок в памяти.
+    """
+
+    def __init__(self, batch_size=5000, fast_passwords=False):
+        if fast_passwords and FAST_HASHER not in settings.PASSWORD_HASHERS:
+            raise CommandError(
+                'Быстрое хеширование паролей доступно только '
+                'с тестовыми настройками: --settings=foodgram.settings_test.'
+            )
+        self.batch_size = batch_size
+        self.hasher = 'md5' if fast_passwords else 'default'
+        self.password_hashes = {}
+        self.user_ids = {}
+        self.tag_ids = {}
+        self.ingredient_ids = {}
+        self.recipe_ids = {}
+
+    def load(self, stage, records):
+        """
+        Записывает записи одного вида в отдельной транзакции.
+
+        :return: Количество записей и затраченное время в секундах.
+        """
+        started = time.perf_counter()
+        with transaction.atomic():
+            count = getattr(self, f'load_{stage}')(records)
+        return count, time.perf_counter() - started
+
+    def finish(self):
+        """
+        Пересчитывает счетчики и текст для поиска после загрузки:
+        bulk_create не вызывает save() и сигналы.
+        """
+        recount_counters()
+        update_search_documents()
+
+    def hash_password(self, password):
+        """
+        Возвращает хеш пароля для записи пользователя.
+
+        Готовый хеш Django сохраняется как есть. Остальные пароли
+        хешируются один раз для всех пользователей с таким паролем:
+        хеширование медленное намеренно, и на больших наборах
+        с разными паролями нужны готовые хеши или fast_passwords.
+        """
+        if not password:
+            return make_password(None)
+        if password not in self.password_hashes:
+            try:
+                identify_hasher(password)
+            except ValueError:
+                self.password_hashes[password] = make_password(
+                    password, hasher=self.hasher
+                )
+            else:
+                self.password_hashes[password] = password
+        return self.password_hashes[password]
+
+    def resolve_users(self, usernames):
+        """
+        Догружает в память id пользователей, которых там еще нет.
+        """
+        missing = set(usernames) - self.user_ids.keys()
+        if missing:
+            self.user_ids.update(
+                User.objects
+                .filter(username__in=missing)
+                .values_list('username', 'id')
+            )
+
+    def resolve_ingredients(self, names):
+        """
+        Догружает в память id ингредиентов, которых там еще нет.
+        """
+        missing = set(names) - self.ingredient_ids.keys()
+        if missing:
+            self.ingredient_ids.update(
+                Ingredient.objects
+                .filter(name__in=missing)
+                .values_list('name', 'id')
+            )
+
+    @staticmethod
+    def lookup(mapping, key, kind):
+        """
+        Возвращает id по ключу или сообщает, какой ссылки не хватает.
+        """
+        try:
+            return mapping[key]
+        except KeyError:
+            raise CommandError(f'Не найден {kind}: {key}')
+
+    def load_users(self, records):
+        count = 0
+        for batch in batched(records, self.batch_size):
+            User.objects.bulk_create(
+                [
+                    User(
+                        username=record['username'],
+                        email=record['email'],
+                        first_name=record.get('first_name', ''),
+                        last_name=record.get('last_name', ''),
+                        password=self.hash_password(record.get('password')),
+                    )
+                    for record in batch
+                ],
+                ignore_conflicts=True,
+            )
+            count += len(batch)
+        return count
+
+    def load_tags(self, records):
+        tags = [
+            Tag(name=record['name'], slug=record['slug'])
+            for record in records
+        ]
+        Tag.objects.bulk_create(tags, ignore_conflicts=True)
+        # bulk_create не отправляет сигналы, поэтому сбрасываем кеш сами.
+        transaction.on_commit(lambda: bump_catalog_version(TAGS_CATALOG))
+        return len(tags)
+
+    def load_recipes(self, records):
+        self.tag_ids = dict(Tag.objects.values_list('slug', 'id'))
+        through = Recipe.tags.through
+        count = 0
+        with explicit_pub_date():
+            for batch in batched(records, self.batch_size):
+                self.resolve_users(record['author'] for record in batch)
+                now = timezone.now()
+                recipes = [
+                    Recipe(
+                        author_id=self.lookup(
+                            self.user_ids, record['author'], 'автор'
+                        ),
+                        name=record['name'],
+                        text=record.get('text', ''),
+                        cooking_time=int(record['cooking_time']),
+                        image=record.get('image', ''),
+                        pub_date=(
+                            parse_datetime(record['pub_date'])
+                            if record.get('pub_date') else now
+                        ),
+                    )
+                    for record in batch
+                ]
+                Recipe.objects.bulk_create(recipes)
+
+                links = []
+                for record, recipe in zip(batch, recipes):
+                    self.recipe_ids[str(record['ref'])] = recipe.pk
+                    tags = record.get('tags') or []
+                    if isinstance(tags, str):
+                        tags = [slug for slug in tags.split(';') if slug]
+                    links.extend(
+                        through(
+                            recipe_id=recipe.pk,
+                            tag_id=self.lookup(self.tag_ids, slug, 'тег'),
+                        )
+                        for slug in tags
+                    )
+                through.objects.bulk_create(links, ignore_conflicts=True)
+                count += len(batch)
+        return count
+
+    def load_recipe_ingredients(self, records):
+        count = 0
+        for batch in batched(records, self.batch_size):
+            self.resolve_ingredients(record['ingredient'] for record in batch)
+            IngredientInRecipe.objects.bulk_create(
+                [
+                    IngredientInRecipe(
+                        recipe_id=self.lookup(
+                            self.recipe_ids, str(record['recipe']), 'рецепт'
+                        ),
+                        ingredient_id=self.lookup(
+                            self.ingredient_ids, record['ingredient'],
+                            'ингредиент'
+                        ),
+                        amount=int(record['amount']),
+                    )
+                    for record in batch
+                ],
+                ignore_conflicts=True,
+            )
+            count += len(batch)
+        return count
+
+    def load_user_recipes(self, model, records):
+        count = 0
+        for batch in batched(records, self.batch_size):
+            self.resolve_users(record['user'] for record in batch)
+            model.objects.bulk_create(
+                [
+                    model(
+                        user_id=self.lookup(
+                            self.user_ids, record['user'], 'пользователь'
+                        ),
+                        recipe_id=self.lookup(
+                            self.recipe_ids, str(record['recipe']), 'рецепт'
+                        ),
+                    )
+                    for record in batch
+                ],
+                ignore_conflicts=True,
+            )
+            count += len(batch)
+        return count
+
+    def load_favorites(self, records):
+        return self.load_user_recipes(Favorite, records)
+
+    def load_shopping_carts(self, records):
+        return self.load_user_recipes(ShoppingCart, records)
+
+    def load_subscriptions(self, records):
+        count = 0
+        for batch in batched(records, self.batch_size):
+            self.resolve_users(
+                username for record in batch
+                for username in (record['user'], record['author'])
+            )
+            Subscription.objects.bulk_create(
+                [
+                    Subscription(
+                        user_id=self.lookup(
+                            self.user_ids, record['user'], 'пользователь'
+                        ),
+                        author_id=self.lookup(
+                            self.user_ids, record['author'], 'автор'
+                        ),
+                    )
+                    for record in batch
+                    if record['user'] != record['author']
+                ],
+                ignore_conflicts=True,
+            )
+            count += len(batch)
+        return count
@@ -0,0 +1,50 @@
+"""
+Вспомогательные функции для команд загрузки и генерации данных.
+"""
+
+import csv
+import json
+from contextlib import contextmanager
+from itertools import islice
+
+from recipes.models import Recipe
+
+
+@contextmanager
+def explicit_pub_date():
+    """
+    Временно отключает auto_now_add у pub_date,
+    чтобы загружаемые рецепты сохранили свои даты публикации.
+    """
+    field = Recipe._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def iter_records(path):
+    """
+    Потоком читает записи из файла JSONL (объект на строку)
+    или CSV с заголовком.
+    """
+    with open(path, encoding='utf-8', newline='') as file:
+        if path.endswith('.csv'):
+            yield from csv.DictReader(file)
+            return
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def batched(iterable, size):
+    """
+    Разбивает поток на списки длиной не больше size.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
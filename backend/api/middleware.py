@@ -0,0 +1,98 @@
+"""
+Промежуточный слой для замера времени и числа SQL-запросов.
+"""
+
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from api.request_stats import record
+
+
+class QueryCounter:
+    """
+    Обертка выполнения SQL, которая считает запросы и их время.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class RequestTimingMiddleware:
+    """
+    Замеряет для каждого запроса общее время, время и число
+    SQL-запросов, время рендеринга ответа (сериализации в JSON)
+    и остальное время приложения — в основном работу сериализаторов.
+
+    Время SQL — это время вызова execute: строки, которые драйвер
+    дочитывает позже (например, в SQLite), попадают во время
+    приложения. Запросы потоковых ответов, выполненные после
+    возврата из view, не учитываются.
+
+    Результат добавляется в статистику маршрута (api.request_stats)
+    и, если REQUEST_TIMING_HEADER включен, отдается в заголовке
+    Server-Timing. При REQUEST_TIMING_ENABLED = False слой
+    не подключается вовсе.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        request._timing_render = [0.0, 0.0]
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        render_started, render_finished = request._timing_render
+        render = max(render_finished - render_started, 0.0)
+        app = max(total - counter.duration - render, 0.0)
+        match = request.resolver_match
+        if match is not None:
+            record(
+                f'{request.method} {match.view_name}',
+                total * 1000,
+                counter.duration * 1000,
+                render * 1000,
+                app * 1000,
+                counter.count,
+            )
+        if settings.REQUEST_TIMING_HEADER:
+            response['Server-Timing'] = (
+                f'db;dur={counter.duration * 1000:.2f};'
+                f'desc="{counter.count} queries", '
+                f'render;dur={render * 1000:.2f}, '
+                f'app;dur={app * 1000:.2f}, '
+                f'total;dur={total * 1000:.2f}'
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        """
+        Запоминает начало и конец рендеринга ответа DRF.
+        """
+        request._timing_render[0] = time.perf_counter()
+
+        def finished(response):
+            request._timing_render[1] = time.perf_counter()
+
+        response.add_post_render_callback(finished)
+        return response
@@ -1,6 +1,21 @@
-from rest_framework import mixins, viewsets
+import hashlib
+from functools import partial
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import mixins, status, viewsets
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
+from api.cache import get_catalog_data, get_catalog_version
+from api.response_cache import get_or_build, make_key
+
+# Заголовки условного запроса, при которых валидаторы
+# считаются до обработки запроса
+CONDITIONAL_HEADERS = ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+
 
 class ReadOnlyViewSet(
     mixins.ListModelMixin,        # Миксин для получения списка объектов
@@ -50,3 +65,224 @@ class ReadOnlyViewSet(
         instance = self.get_object()
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
+
+
+class ConditionalGetMixin:
+    """
+    Миксин условных GET-запросов: заголовки ETag и Last-Modified
+    и ответ 304 Not Modified.
+
+    Валидаторы возвращает метод get_validators(instance) — пару
+    (значения, из которых строится ETag; Last-Modified в секундах
+    или None). Они должны считаться дешево: из версий справочников
+    или полей изменения объекта, без сериализации. Если клиент
+    прислал If-None-Match или If-Modified-Since и данные не менялись,
+    ответ 304 возвращается без вызова обработчика. Иначе валидаторы
+    считаются после обработчика по уже загруженному объекту
+    (instance), без дополнительных запросов.
+    """
+    conditional_actions = ('list', 'retrieve')
+    conditional_vary = ('Accept',)
+
+    def list(self, request, *args, **kwargs):
+        if self.action not in self.conditional_actions:
+            return super().list(request, *args, **kwargs)
+        return self.conditional_get(
+            request, partial(super().list, request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.action not in self.conditional_actions:
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_get(
+            request, partial(super().retrieve, request, *args, **kwargs)
+        )
+
+    def get_object(self):
+        """
+        Запоминает загруженный объект для расчета валидаторов.
+        """
+        self.conditional_object = super().get_object()
+        return self.conditional_object
+
+    def conditional_get(self, request, handler):
+        """
+        Возвращает 304, если ответ не изменился, иначе результат
+        handler() с заголовками ETag и Last-Modified.
+        """
+        validators = response = None
+        if any(header in request.META for header in CONDITIONAL_HEADERS):
+            validators = self.get_response_validators(None)
+            etag, last_modified = validators
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+        if response is None:
+            response = handler()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            validators = validators or self.get_response_validators(
+                getattr(self, 'conditional_object', None)
+            )
+        etag, last_modified = validators
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, self.conditional_vary)
+        return response
+
+    def get_response_validators(self, instance):
+        """
+        Возвращает ETag в кавычках и Last-Modified для ответа.
+        Формат ответа входит в ETag: JSON и, например, HTML
+        одного адреса — разные представления.
+        """
+        values, last_modified = self.get_validators(instance)
+        source = '\n'.join(
+            str(value)
+            for value in (self.request.accepted_renderer.format, *values)
+        )
+        etag = hashlib.md5(source.encode()).hexdigest()
+        return quote_etag(etag), last_modified
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Миксин кеша готовых ответов для анонимных пользователей
+    (api.response_cache).
+
+    Кешируются GET-запросы действий response_cache_actions.
+    Части ключа, зависящие от данных (поколения и версии),
+    возвращает get_response_cache_parts(). Из параметров запроса
+    допускаются только response_cache_params: ссылки пагинации
+    в ответе строятся из полной строки запроса, поэтому запрос
+    с другими параметрами или с повторенным одиночным параметром
+    не кешируется. Значения response_cache_multi_params
+    сортируются. Кешируются только ответы в JSON: HTML
+    браузерного API содержит CSRF-токен и данные сессии.
+    """
+    response_cache_actions = ('list', 'retrieve')
+    response_cache_params = ()
+    response_cache_multi_params = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, partial(super().list, request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, partial(super().retrieve, request, *args, **kwargs)
+        )
+
+    def cached_response(self, request, handler):
+        """
+        Возвращает ответ из кеша или результат handler().
+        По ETag и Last-Modified закешированного ответа
+        отвечает 304 без обращения к базе.
+        """
+        key = self.get_response_cache_key(request)
+        if key is None:
+            return handler()
+
+        def build():
+            response = self.finalize_response(request, handler())
+            if hasattr(response, 'render'):
+                response.render()
+            return response
+
+        response = get_or_build(key, build)
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(response.get('Last-Modified')),
+            response=response,
+        ) or response
+
+    def get_response_cache_key(self, request):
+        """
+        Возвращает ключ кеша ответа или None, если ответ
+        кешировать нельзя.
+        """
+        if (
+            not settings.RECIPE_RESPONSE_CACHE_ENABLED
+            or request.method != 'GET'
+            or self.action not in self.response_cache_actions
+            or request.user.is_authenticated
+            or request.accepted_renderer.format != JSONRenderer.format
+        ):
+            return None
+        params = []
+        for name, values in request.query_params.lists():
+            if name not in self.response_cache_params:
+                return None
+            if name in self.response_cache_multi_params:
+                values = sorted(values)
+            elif len(values) > 1:
+                return None
+            params.append((name, values))
+        parts = self.get_response_cache_parts()
+        if parts is None:
+            return None
+        return make_key(
+            self.action,
+            request.accepted_renderer.format,
+            request.scheme,
+            request.get_host(),
+            *parts,
+            *sorted(params),
+        )
+
+    def get_response_cache_parts(self):
+        """
+        Возвращает части ключа, которые меняются вместе с данными,
+        или None, если ответ кешировать нельзя.
+        """
+        raise NotImplementedError
+
+
+class CachedCatalogMixin:
+    """
+    Миксин для справочников, которые отдаются целиком.
+
+    Готовый JSON списка берется из кеша справочников, поэтому
+    при попадании в кеш не выполняются ни запросы к БД,
+    ни сериализация. Запросы с фильтрами обрабатываются как обычно.
+    """
+    catalog_name = None
+
+    def list(self, request, *args, **kwargs):
+        """
+        Возвращает закешированный список, если запрос без фильтров.
+        """
+        if not self.is_catalog_request(request):
+            return super().list(request, *args, **kwargs)
+        data = get_catalog_data(self.catalog_name, self.render_catalog)
+        return HttpResponse(
+            data, content_type=request.accepted_renderer.media_type
+        )
+
+    def is_catalog_request(self, request):
+        """
+        Проверяет, что запрошен полный список в формате JSON.
+        """
+        params = set(request.query_params) - {'format'}
+        return (
+            not params
+            and request.accepted_renderer.format == JSONRenderer.format
+        )
+
+    def get_validators(self, instance=None):
+        """
+        Возвращает валидаторы ответа по версии справочника.
+        Версия — время изменения в наносекундах.
+        """
+        version = get_catalog_version(self.catalog_name)
+        return (self.catalog_name, version), version // 10 ** 9
+
+    def render_catalog(self):
+        """
+        Сериализует полный список в байты JSON.
+        """
+        serializer = self.get_serializer(self.get_queryset(), many=True)
+        return JSONRenderer().render(serializer.data)
@@ -0,0 +1,131 @@
+"""
+Пагинация ленты рецептов: постраничная и keyset по курсору.
+"""
+
+import base64
+import binascii
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class RecipePagination(PageNumberPagination):
+    """
+    Пагинация ленты рецептов.
+
+    По умолчанию работает постранично (page/limit). Если в запросе
+    передан параметр cursor (в том числе пустой — первая страница),
+    включается keyset-пагинация по паре (pub_date, id): без COUNT(*)
+    и без OFFSET, поэтому глубокие страницы не замедляются.
+    """
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering = ('-pub_date', '-id')
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(), self.page_query_param
+        )
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        if position is None:
+            reverse = False
+        else:
+            reverse, pub_date, pk = position
+            if reverse:
+                queryset = queryset.filter(
+                    Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=pk)
+                ).reverse()
+            else:
+                queryset = queryset.filter(
+                    Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+                )
+
+        # Берем на одну запись больше, чтобы узнать, есть ли продолжение.
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page_results = results
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if not self.has_next or not self.page_results:
+            return None
+        return self.build_cursor_link(self.page_results[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.use_cursor:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page_results:
+            return None
+        return self.build_cursor_link(self.page_results[0], reverse=True)
+
+    def build_cursor_link(self, recipe, reverse):
+        """
+        Формирует ссылку на соседнюю страницу относительно рецепта.
+        """
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(recipe, reverse),
+        )
+
+    def encode_cursor(self, recipe, reverse):
+        """
+        Кодирует позицию (направление, pub_date, id) в строку курсора.
+        """
+        raw = '|'.join((
+            'p' if reverse else 'n',
+            recipe.pub_date.isoformat(),
+            str(recipe.pk),
+        ))
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, request):
+        """
+        Разбирает курсор из запроса.
+        Пустой курсор означает первую страницу.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode()).decode()
+            direction, pub_date, pk = raw.split('|')
+            pub_date = parse_datetime(pub_date)
+            pk = int(pk)
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if direction not in ('n', 'p') or pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return direction == 'p', pub_date, pk
@@ -0,0 +1,68 @@
+"""
+Статистика запросов к API по маршрутам.
+
+Для каждого маршрута («метод имя-маршрута») в памяти процесса
+хранится скользящее окно последних REQUEST_TIMING_SAMPLES замеров:
+общее время, время SQL, время рендеринга ответа, остальное время
+приложения и число запросов к базе. Перцентили считаются только
+при чтении статистики, поэтому запись замера — это одно добавление
+в deque.
+"""
+
+from collections import deque
+
+from django.conf import settings
+
+# Метрики замера в порядке хранения
+METRICS = ('total_ms', 'db_ms', 'render_ms', 'app_ms', 'queries')
+PERCENTILES = (50, 90, 95, 99)
+
+_samples = {}
+
+
+def percentile(values, percent):
+    """
+    Возвращает перцентиль по методу ближайшего ранга.
+    """
+    ordered = sorted(values)
+    rank = max(0, round(percent / 100 * len(ordered) + 0.5) - 1)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def record(route, total_ms, db_ms, render_ms, app_ms, queries):
+    """
+    Добавляет замер запроса к маршруту route.
+    """
+    samples = _samples.get(route)
+    if samples is None:
+        samples = _samples.setdefault(
+            route, deque(maxlen=settings.REQUEST_TIMING_SAMPLES)
+        )
+    samples.append((total_ms, db_ms, render_ms, app_ms, queries))
+
+
+def get_stats():
+    """
+    Возвращает перцентили метрик по каждому маршруту.
+    """
+    stats = {}
+    for route, samples in list(_samples.items()):
+        rows = list(samples)
+        if not rows:
+            continue
+        stats[route] = {'count': len(rows)}
+        for position, metric in enumerate(METRICS):
+            values = [row[position] for row in rows]
+            stats[route][metric] = {
+                f'p{percent}': round(percentile(values, percent), 3)
+                for percent in PERCENTILES
+            }
+            stats[route][metric]['max'] = round(max(values), 3)
+    return stats
+
+
+def reset_stats():
+    """
+    Очищает накопленную статистику процесса.
+    """
+    _samples.clear()
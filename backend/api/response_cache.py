@@ -0,0 +1,146 @@
+"""
+Кеш готовых ответов ленты и страниц рецептов для анонимных
+пользователей.
+
+Ответ анонимному пользователю одинаков для всех анонимных
+посетителей с теми же параметрами запроса, поэтому он хранится
+целиком в общем кеше справочников. Ключ включает нормализованные
+параметры запроса и поколения данных, от которых зависит ответ:
+поколение ленты — для списков, поколение рецепта и поколение
+всех страниц рецептов — для страницы рецепта, а также версии
+справочников тегов и ингредиентов. Обработчики сигналов меняют
+поколения, и старые ответы перестают читаться и истекают сами.
+
+Защита от одновременной пересборки: ответ считается свежим
+RECIPE_RESPONSE_CACHE_TIMEOUT секунд и хранится еще
+RECIPE_RESPONSE_CACHE_STALE. Устаревший ответ пересобирает только
+процесс, получивший блокировку (cache.add), остальные в это время
+отдают устаревший. Если ответа в кеше нет, остальные процессы
+ждут его до LOCK_WAIT секунд и только потом собирают сами.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import status
+
+from api.cache import get_catalog_cache
+
+# Поколения: лента рецептов и все страницы рецептов
+FEED_GENERATION = 'feed'
+RECIPES_GENERATION = 'recipes'
+
+# Блокировка пересборки: время жизни, ожидание ответа другого
+# процесса и интервал проверки (в секундах)
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 0.5
+LOCK_POLL = 0.05
+
+
+def _generation_key(name):
+    return f'response:{name}:generation'
+
+
+def recipe_generation(pk):
+    """
+    Возвращает имя поколения страницы рецепта.
+    """
+    return f'recipe:{pk}'
+
+
+def get_generations(*names):
+    """
+    Возвращает текущие поколения по именам.
+    При первом обращении поколение создается.
+    """
+    cache = get_catalog_cache()
+    keys = [_generation_key(name) for name in names]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump_generations(*names):
+    """
+    Меняет поколения: закешированные под ними ответы
+    перестают использоваться.
+    """
+    version = time.time_ns()
+    get_catalog_cache().set_many(
+        {_generation_key(name): version for name in names}, timeout=None
+    )
+
+
+def make_key(*parts):
+    """
+    Возвращает ключ кеша ответа по частям ключа.
+    """
+    source = '\n'.join(str(part) for part in parts)
+    digest = hashlib.md5(source.encode()).hexdigest()
+    return f'response:{digest}'
+
+
+def _to_response(entry):
+    _, content, headers = entry
+    response = HttpResponse(content)
+    for name, value in headers:
+        response[name] = value
+    return response
+
+
+def _wait_for(cache, key):
+    """
+    Ждет, пока другой процесс сохранит ответ.
+    """
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def get_or_build(key, build):
+    """
+    Возвращает ответ из кеша или ответ, собранный build().
+
+    build() должен вернуть отрендеренный ответ; кешируются
+    только ответы со статусом 200.
+    """
+    cache = get_catalog_cache()
+    entry = cache.get(key)
+    if entry is not None and entry[0] > time.time():
+        return _to_response(entry)
+
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        if entry is None:
+            entry = _wait_for(cache, key)
+        if entry is not None:
+            return _to_response(entry)
+        return build()
+
+    try:
+        response = build()
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(
+                key,
+                (
+                    time.time() + settings.RECIPE_RESPONSE_CACHE_TIMEOUT,
+                    response.content,
+                    list(response.items()),
+                ),
+                timeout=(
+                    settings.RECIPE_RESPONSE_CACHE_TIMEOUT
+                    + settings.RECIPE_RESPONSE_CACHE_STALE
+                ),
+            )
+    finally:
+        cache.delete(lock_key)
+    return response
@@ -3,11 +3,21 @@
 пользователями, ингредиентами, тегами и подписками.
 """
 
+import logging
+
 from django.db import transaction
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from api.bulk import MAX_BULK_IDS
+from api.fields import (
+    BulkPrimaryKeyRelatedField,
+    ImageVariantsField,
+    StreamingBase64ImageField,
+    resolve_pks,
+)
+from recipes.constants import MAX_AMOUNT, MIN_AMOUNT
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -16,8 +26,12 @@ from recipes.models import (
     Tag,
     ShoppingCart,
 )
+from recipes.search import update_search_documents
+from users.constants import DEFAULT_RECIPES_LIMIT
 from users.models import User, Subscription
 
+logger = logging.getLogger(__name__)
+
 
 class UserSerializer(serializers.ModelSerializer):
     """
@@ -42,7 +56,10 @@ class UserSerializer(serializers.ModelSerializer):
     def get_is_subscribed(self, obj):
         """
         Проверяет, подписан ли текущий пользователь на автора.
+        Использует аннотацию из queryset, если она есть.
         """
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
         request = self.context.get("request")
         if request and request.user.is_authenticated:
             return Subscription.objects.filter(
@@ -120,7 +137,7 @@ class TagSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Tag
-        fields = ["id", "name", "color", "slug"]
+        fields = ["id", "name", "slug"]
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -140,7 +157,7 @@ class IngredientInRecipeSerializer(serializers.ModelSerializer):
     Используется для отображения количества ингредиентов в рецепте.
     """
 
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.ReadOnlyField(source="ingredient_id")
     name = serializers.ReadOnlyField(source="ingredient.name")
     measurement_unit = serializers.ReadOnlyField(
         source="ingredient.measurement_unit"
@@ -151,18 +168,34 @@ class IngredientInRecipeSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "measurement_unit", "amount"]
 
 
+class IngredientAmountSerializer(serializers.Serializer):
+    """
+    Сериализатор ингредиента с количеством при записи рецепта.
+    Существование ингредиентов проверяется сразу для всего списка
+    в RecipeWriteSerializer.validate_ingredients.
+    """
+
+    id = serializers.IntegerField(min_value=1)
+    amount = serializers.IntegerField(
+        min_value=MIN_AMOUNT, max_value=MAX_AMOUNT
+    )
+
+
 class RecipeSmallSerializer(serializers.ModelSerializer):
     """
     Упрощенный сериализатор для отображения краткой информации о рецепте.
     Используется в подписках и других местах, где нужен минимум данных.
     """
 
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Recipe
         fields = [
             "id",
             "name",
             "image",
+            "image_variants",
             "cooking_time",
         ]
 
@@ -176,11 +209,12 @@ class RecipeReadSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     author = UserSerializer(read_only=True)
     ingredients = IngredientInRecipeSerializer(
-        many=True, source="ingredients_in_recipe"
+        many=True, source="ingredient_in_recipe"
     )
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     image = Base64ImageField()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
@@ -193,26 +227,42 @@ class RecipeReadSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "image_variants",
             "text",
             "cooking_time",
         ]
 
+    def to_representation(self, instance):
+        """
+        Передает автору флаг подписки, аннотированный на рецепте,
+        чтобы не проверять подписку отдельным запросом.
+        """
+        if hasattr(instance, "author_is_subscribed"):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
+
     def get_is_favorited(self, obj):
         """
         Проверяет, добавлен ли рецепт в избранное у текущего пользователя.
+        Использует аннотацию из queryset, если она есть.
         """
+        if hasattr(obj, "is_favorited"):
+            return obj.is_favorited
         user = self.context["request"].user
         if user.is_authenticated:
-            return obj.favorites.filter(user=user).exists()
+            return Favorite.objects.filter(user=user, recipe=obj).exists()
         return False
 
     def get_is_in_shopping_cart(self, obj):
         """
         Проверяет, добавлен ли рецепт в корзину у текущего пользователя.
+        Использует аннотацию из queryset, если она есть.
         """
+        if hasattr(obj, "is_in_shopping_cart"):
+            return obj.is_in_shopping_cart
         user = self.context["request"].user
         if user.is_authenticated:
-            return obj.shopping_carts.filter(user=user).exists()
+            return ShoppingCart.objects.filter(user=user, recipe=obj).exists()
         return False
 
 
@@ -221,11 +271,9 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
     Сериализатор для создания и обновления рецептов.
     Используется для обработки данных при создании или изменении рецепта.
     """
-    ingredients = IngredientInRecipeSerializer(many=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True
-    )
-    image = Base64ImageField()
+    ingredients = IngredientAmountSerializer(many=True)
+    tags = BulkPrimaryKeyRelatedField(queryset=Tag.objects.all(), many=True)
+    image = StreamingBase64ImageField()
     author = serializers.PrimaryKeyRelatedField(read_only=True)
 
     # Переносим class Meta к началу определения класса RecipeWriteSerializer
@@ -255,7 +303,16 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Ингредиенты должны быть уникальными."
             )
-        return value
+        # Все ингредиенты проверяются одним запросом.
+        found = resolve_pks(
+            Ingredient.objects.all(),
+            ingredients,
+            "Ингредиенты с id {} не найдены.",
+        )
+        return [
+            {"id": ingredient, "amount": item["amount"]}
+            for ingredient, item in zip(found, value)
+        ]
 
     @transaction.atomic
     def create(self, validated_data):
@@ -267,19 +324,48 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
         self._create_ingredients(recipe, ingredients)
+        update_search_documents([recipe.pk])
         return recipe
 
     @transaction.atomic
     def update(self, instance, validated_data):
         """
         Обновляет рецепт с ингредиентами и тегами.
+
+        Ингредиенты и теги сравниваются с сохраненными, и в базу
+        записываются только изменения. Связи, которых нет в частичном
+        обновлении, не затрагиваются.
         """
-        ingredients = validated_data.pop("ingredients")
-        tags = validated_data.pop("tags")
-        instance.tags.set(tags)
-        instance.ingredients_in_recipe.all().delete()
-        self._create_ingredients(instance, ingredients)
-        return super().update(instance, validated_data)
+        ingredients = validated_data.pop("ingredients", None)
+        tags = validated_data.pop("tags", None)
+        self.rows_written = {"ingredients": 0, "tags": 0}
+        if tags is not None:
+            self.rows_written["tags"] = self._update_tags(instance, tags)
+        if ingredients is not None:
+            self.rows_written["ingredients"] = self._update_ingredients(
+                instance, ingredients
+            )
+        logger.debug(
+            "Рецепт %s: записано строк ингредиентов %s, тегов %s",
+            instance.pk,
+            self.rows_written["ingredients"],
+            self.rows_written["tags"],
+        )
+        recipe = super().update(instance, validated_data)
+        # Название индексируется напрямую, текст для поиска зависит
+        # только от описания и ингредиентов.
+        if ingredients is not None or "text" in validated_data:
+            update_search_documents([recipe.pk])
+        return recipe
+
+    def to_representation(self, instance):
+        """
+        Возвращает сохраненный рецепт в формате сериализатора чтения.
+        """
+        recipe = Recipe.objects.for_read(
+            self.context["request"].user
+        ).get(pk=instance.pk)
+        return RecipeReadSerializer(recipe, context=self.context).data
 
     def _create_ingredients(self, recipe, ingredients):
         """
@@ -296,6 +382,74 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             ]
         )
 
+    def _update_tags(self, recipe, tags):
+        """
+        Добавляет новые и удаляет лишние теги рецепта.
+
+        :return: Количество записанных строк.
+        """
+        through = Recipe.tags.through
+        current = set(
+            through.objects.filter(recipe=recipe).values_list(
+                "tag_id", flat=True
+            )
+        )
+        new = {tag.pk for tag in tags}
+        through.objects.bulk_create(
+            [through(recipe=recipe, tag_id=tag_id) for tag_id in new - current]
+        )
+        removed = current - new
+        if removed:
+            through.objects.filter(recipe=recipe, tag_id__in=removed).delete()
+        return len(new - current) + len(removed)
+
+    def _update_ingredients(self, recipe, ingredients):
+        """
+        Создает, изменяет и удаляет только отличающиеся
+        записи ингредиентов рецепта.
+
+        :return: Количество записанных строк.
+        """
+        current = {
+            item.ingredient_id: item
+            for item in IngredientInRecipe.objects.filter(recipe=recipe)
+        }
+        created, changed = [], []
+        for ingredient in ingredients:
+            item = current.pop(ingredient["id"].pk, None)
+            if item is None:
+                created.append(ingredient)
+            elif item.amount != ingredient["amount"]:
+                item.amount = ingredient["amount"]
+                changed.append(item)
+        self._create_ingredients(recipe, created)
+        IngredientInRecipe.objects.bulk_update(changed, ["amount"])
+        # Оставшиеся записи в новом составе отсутствуют.
+        if current:
+            IngredientInRecipe.objects.filter(
+                pk__in=[item.pk for item in current.values()]
+            ).delete()
+        return len(created) + len(changed) + len(current)
+
+
+class BulkIdsSerializer(serializers.Serializer):
+    """
+    Сериализатор списка идентификаторов для пакетных действий.
+    Повторяющиеся идентификаторы отбрасываются.
+    """
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_IDS,
+    )
+
+    def validate_ids(self, value):
+        """
+        Убирает повторы, сохраняя порядок идентификаторов.
+        """
+        return list(dict.fromkeys(value))
+
 
 class FavoriteSerializer(serializers.ModelSerializer):
     """
@@ -376,23 +530,23 @@ class SubShowSerializer(UserSerializer):
     """
 
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta(UserSerializer.Meta):
         fields = UserSerializer.Meta.fields + ["recipes", "recipes_count"]
 
     def get_recipes(self, obj):
         """
-        Возвращает список рецептов автора.
+        Возвращает последние рецепты автора.
+        Использует список, подготовленный в queryset, если он есть.
         """
         request = self.context.get("request")
-        recipes = obj.recipes.all()[:3]
+        if hasattr(obj, "latest_recipes"):
+            recipes = obj.latest_recipes
+        else:
+            recipes = obj.recipes.order_by("-pub_date", "-id")[
+                :DEFAULT_RECIPES_LIMIT
+            ]
         return RecipeSmallSerializer(
             recipes, many=True, context={"request": request}
         ).data
-
-    def get_recipes_count(self, obj):
-        """
-        Возвращает общее количество рецептов автора.
-        """
-        return obj.recipes.count()
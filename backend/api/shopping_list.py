@@ -0,0 +1,134 @@
+"""
+Модуль выгрузки списка покупок.
+
+Список покупок собирается одним агрегирующим запросом в строки
+(название, единица измерения, количество), которые затем отдаются
+одним из рендереров: PDF, CSV, обычный текст или JSON. Формат
+выбирается параметром ?format= или заголовком Accept. Текст, CSV
+и JSON формируются построчно и отдаются потоком.
+"""
+
+import csv
+import json
+
+from django.db.models import Sum
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from api.utils import render_shopping_list_pdf
+from recipes.models import IngredientInRecipe
+
+
+def aggregate_shopping_cart(user):
+    """
+    Возвращает ингредиенты из корзины пользователя
+    в виде кортежей (название, единица измерения, количество).
+    """
+    return (
+        IngredientInRecipe.objects
+        .filter(recipe__shoppingcart__user=user)
+        .values_list('ingredient__name', 'ingredient__measurement_unit')
+        .annotate(total_amount=Sum('amount'))
+        .order_by('ingredient__name')
+    )
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """
+    Базовый рендерер списка покупок.
+
+    Наследники реализуют stream(rows) — генератор фрагментов
+    документа в байтах.
+    """
+    charset = 'utf-8'
+
+    def stream(self, rows):
+        raise NotImplementedError
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Ошибки (например, 401) приходят словарем — отдаем их как JSON.
+        if isinstance(data, dict):
+            return JSONRenderer().render(data)
+        return b''.join(self.stream(data))
+
+
+class ShoppingListPDFRenderer(ShoppingListRenderer):
+    """
+    PDF-документ. Готовые документы кешируются по содержимому.
+    """
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+
+    def stream(self, rows):
+        yield render_shopping_list_pdf(list(rows))
+
+
+class ShoppingListTextRenderer(ShoppingListRenderer):
+    """
+    Легкий текстовый список для мобильных клиентов.
+    """
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, rows):
+        yield 'Список покупок\n\n'.encode(self.charset)
+        for name, measurement_unit, amount in rows:
+            yield f'• {name} — {amount} {measurement_unit}\n'.encode(
+                self.charset
+            )
+
+
+class Echo:
+    """
+    Псевдобуфер для csv.writer: возвращает записанную строку.
+    """
+
+    def write(self, value):
+        return value
+
+
+class ShoppingListCSVRenderer(ShoppingListRenderer):
+    """
+    Таблица CSV с заголовком.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(
+            ('name', 'measurement_unit', 'amount')
+        ).encode(self.charset)
+        for row in rows:
+            yield writer.writerow(row).encode(self.charset)
+
+
+class ShoppingListJSONRenderer(ShoppingListRenderer):
+    """
+    Массив объектов JSON, формируемый построчно.
+    """
+    media_type = 'application/json'
+    format = 'json'
+
+    def stream(self, rows):
+        separator = b'['
+        for name, measurement_unit, amount in rows:
+            yield separator + json.dumps(
+                {
+                    'name': name,
+                    'measurement_unit': measurement_unit,
+                    'amount': amount,
+                },
+                ensure_ascii=False,
+            ).encode(self.charset)
+            separator = b','
+        yield b']' if separator == b',' else b'[]'
+
+
+# Первый рендерер используется по умолчанию
+SHOPPING_LIST_RENDERERS = [
+    ShoppingListPDFRenderer,
+    ShoppingListTextRenderer,
+    ShoppingListCSVRenderer,
+    ShoppingListJSONRenderer,
+]
@@ -0,0 +1,142 @@
+"""
+Обработчики сигналов, сбрасывающие кеш справочников
+и обновляющие индекс поиска ингредиентов при изменении
+тегов и ингредиентов, меняющие поколения кеша ответов
+при изменении рецептов и их авторов, а также поддерживающие
+денормализованные счетчики (api.counters).
+
+Версия меняется после фиксации транзакции, чтобы параллельный
+запрос не закешировал под новой версией еще старые данные.
+"""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.cache import INGREDIENTS_CATALOG, TAGS_CATALOG, bump_catalog_version
+from api.counters import COUNTERS, change_counter, counters_are_manual
+from api.ingredient_index import apply_ingredient_change
+from api.response_cache import (
+    FEED_GENERATION,
+    RECIPES_GENERATION,
+    bump_generations,
+    recipe_generation,
+)
+from recipes.images import variants_generated
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from users.models import Subscription, User
+
+# Поля пользователя, которые выводятся в рецептах
+AUTHOR_FIELDS = {'username', 'email', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags_catalog(sender, **kwargs):
+    """
+    Сбрасывает кеш тегов.
+    """
+    transaction.on_commit(partial(bump_catalog_version, TAGS_CATALOG))
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredients_catalog(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш ингредиентов и обновляет индекс поиска.
+    """
+    def on_commit(pk, name, measurement_unit):
+        version = bump_catalog_version(INGREDIENTS_CATALOG)
+        apply_ingredient_change(pk, version, name, measurement_unit)
+
+    transaction.on_commit(partial(
+        on_commit, instance.pk, instance.name, instance.measurement_unit
+    ))
+
+
+@receiver(post_delete, sender=Ingredient)
+def remove_from_ingredients_catalog(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш ингредиентов и убирает ингредиент из индекса поиска.
+    """
+    def on_commit(pk):
+        version = bump_catalog_version(INGREDIENTS_CATALOG)
+        apply_ingredient_change(pk, version)
+
+    transaction.on_commit(partial(on_commit, instance.pk))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe_responses(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш ленты и страницы рецепта.
+
+    Теги и ингредиенты рецепта API и админка меняют вместе
+    с сохранением рецепта, поэтому отдельный обработчик
+    m2m_changed не нужен: он отключил бы быструю вставку тегов
+    без предварительного SELECT.
+    """
+    transaction.on_commit(partial(
+        bump_generations, FEED_GENERATION, recipe_generation(instance.pk)
+    ))
+
+
+@receiver(variants_generated, sender=Recipe)
+def invalidate_recipe_variants(sender, recipe_id, **kwargs):
+    """
+    Сбрасывает кеш ответов с вариантами изображения рецепта.
+    """
+    bump_generations(FEED_GENERATION, recipe_generation(recipe_id))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_responses(sender, created, update_fields, **kwargs):
+    """
+    Сбрасывает кеш ленты и всех страниц рецептов при изменении
+    данных пользователя, которые выводятся как данные автора.
+    """
+    if created or (
+        update_fields is not None and not AUTHOR_FIELDS & set(update_fields)
+    ):
+        return
+    transaction.on_commit(
+        partial(bump_generations, FEED_GENERATION, RECIPES_GENERATION)
+    )
+
+
+def update_counters(instance, delta):
+    """
+    Меняет на delta счетчики объектов, на которые ссылается instance.
+    """
+    if counters_are_manual():
+        return
+    for model, field, related_model, related_field in COUNTERS:
+        if isinstance(instance, related_model):
+            target = getattr(instance, f'{related_field}_id')
+            change_counter(model, [target], field, delta)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Subscription)
+def count_created(sender, instance, created, raw=False, **kwargs):
+    """
+    Увеличивает счетчики при создании рецепта, записи избранного,
+    корзины или подписки.
+    """
+    if created and not raw:
+        update_counters(instance, 1)
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Subscription)
+def count_deleted(sender, instance, **kwargs):
+    """
+    Уменьшает счетчики при удалении, в том числе каскадном.
+    """
+    update_counters(instance, -1)
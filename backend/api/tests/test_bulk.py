@@ -0,0 +1,87 @@
+from api.bulk import (
+    ADDED,
+    EXISTS,
+    MISSING,
+    NOT_FOUND,
+    REMOVED,
+    SELF_SUBSCRIPTION,
+)
+from api.counters import recount_counters
+from api.tests.utils import APIDataTestCase
+from recipes.models import Favorite
+
+
+class BulkEndpointsTest(APIDataTestCase):
+    """
+    Пакетные добавление и удаление возвращают результат
+    для каждого идентификатора и меняют счетчики один раз.
+    """
+
+    missing_id = 10 ** 6
+
+    def setUp(self):
+        super().setUp()
+        recount_counters()
+
+    def post(self, url, ids):
+        response = self.client.post(url, {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return {
+            item['id']: item['status'] for item in response.json()['results']
+        }
+
+    def delete(self, url, ids):
+        response = self.client.delete(url, {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return {
+            item['id']: item['status'] for item in response.json()['results']
+        }
+
+    def test_favorites(self):
+        url = '/api/recipes/favorite/bulk/'
+        # Рецепты с четными индексами уже в избранном.
+        favorite, other = self.recipes[0], self.recipes[1]
+        ids = [favorite.pk, other.pk, self.missing_id]
+        self.assertEqual(self.post(url, ids), {
+            favorite.pk: EXISTS,
+            other.pk: ADDED,
+            self.missing_id: NOT_FOUND,
+        })
+        # Повторная вставка ничего не добавляет и не меняет счетчик.
+        self.assertEqual(self.post(url, ids)[other.pk], EXISTS)
+        other.refresh_from_db()
+        self.assertEqual(other.favorites_count, 1)
+
+        self.assertEqual(self.delete(url, ids), {
+            favorite.pk: REMOVED,
+            other.pk: REMOVED,
+            self.missing_id: NOT_FOUND,
+        })
+        self.assertEqual(self.delete(url, ids)[other.pk], MISSING)
+        other.refresh_from_db()
+        self.assertEqual(other.favorites_count, 0)
+        self.assertFalse(Favorite.objects.filter(
+            user=self.user, recipe__in=[favorite, other]
+        ).exists())
+
+    def test_subscriptions(self):
+        url = '/api/users/subscribe/bulk/'
+        # Пользователь подписан на авторов с четными индексами.
+        subscribed, other = self.authors[0], self.authors[1]
+        ids = [subscribed.pk, other.pk, self.user.pk, self.missing_id]
+        self.assertEqual(self.post(url, ids), {
+            subscribed.pk: EXISTS,
+            other.pk: ADDED,
+            self.user.pk: SELF_SUBSCRIPTION,
+            self.missing_id: NOT_FOUND,
+        })
+        self.assertEqual(self.post(url, ids)[other.pk], EXISTS)
+        other.refresh_from_db()
+        self.assertEqual(other.subscribers_count, 1)
+
+        results = self.delete(url, ids)
+        self.assertEqual(results[other.pk], REMOVED)
+        self.assertEqual(results[self.missing_id], NOT_FOUND)
+        self.assertEqual(self.delete(url, ids)[other.pk], MISSING)
+        other.refresh_from_db()
+        self.assertEqual(other.subscribers_count, 0)
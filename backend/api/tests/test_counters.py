@@ -0,0 +1,101 @@
+from api.counters import recount_counters
+from api.tests.utils import IMAGE, APIDataTestCase, token_client
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription
+
+
+class CounterClampTest(APIDataTestCase):
+    """
+    Удаление записи, созданной в обход API, не опускает
+    счетчик ниже нуля и не приводит к ошибке.
+    """
+
+    def test_remove_favorite_created_in_bulk(self):
+        recipe = self.recipes[0]
+        self.assertTrue(
+            Favorite.objects.filter(user=self.user, recipe=recipe).exists()
+        )
+        response = self.client.delete(f'/api/recipes/{recipe.pk}/favorite/')
+        self.assertEqual(response.status_code, 204)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 0)
+
+    def test_delete_recipe_of_author_without_counter(self):
+        author = self.authors[1]
+        recipe = Recipe.objects.filter(author=author).first()
+        response = token_client(author).delete(f'/api/recipes/{recipe.pk}/')
+        self.assertEqual(response.status_code, 204)
+        author.refresh_from_db()
+        self.assertEqual(author.recipes_count, 0)
+
+
+class CounterSignalsTest(APIDataTestCase):
+    """
+    Счетчики остаются верными при изменениях через ORM и админку,
+    при каскадном удалении и при изменениях через API.
+    """
+
+    def setUp(self):
+        super().setUp()
+        # Тестовые данные созданы bulk_create без счетчиков.
+        recount_counters()
+
+    def assertCountersActual(self):
+        drift = recount_counters(dry_run=True)
+        self.assertFalse(any(drift.values()), drift)
+
+    def test_orm_changes(self):
+        recipe = self.recipes[1]
+        favorite = Favorite.objects.create(user=self.user, recipe=recipe)
+        ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        Subscription.objects.create(user=self.user, author=self.authors[1])
+        Recipe.objects.create(
+            author=self.user, name='Новый', text='Текст',
+            cooking_time=5, image=IMAGE,
+        )
+        self.assertCountersActual()
+        favorite.delete()
+        self.assertCountersActual()
+
+    def test_cascade_delete(self):
+        """
+        Удаление пользователя уменьшает счетчики рецептов
+        в его избранном и корзине и счетчики подписчиков авторов.
+        """
+        self.user.delete()
+        self.assertCountersActual()
+        self.assertEqual(
+            Recipe.objects.filter(favorites_count__gt=0).count(), 0
+        )
+
+    def test_api_changes(self):
+        recipe = self.recipes[1]
+        author = self.authors[1]
+        self.client.post(f'/api/recipes/{recipe.pk}/favorite/')
+        self.client.post('/api/recipes/shopping_cart/bulk/', {
+            'ids': [recipe.pk for recipe in self.recipes[:6]]
+        }, format='json')
+        self.client.post(f'/api/users/{author.pk}/subscribe/')
+        self.assertCountersActual()
+        self.client.delete('/api/recipes/shopping_cart/bulk/', {
+            'ids': [recipe.pk for recipe in self.recipes[:6]]
+        }, format='json')
+        self.client.delete(f'/api/users/{author.pk}/subscribe/')
+        token_client(author).delete(f'/api/recipes/{recipe.pk}/')
+        self.assertCountersActual()
+
+    def test_api_user_delete(self):
+        """
+        Удаление пользователя через API, которое меняет счетчики
+        само, оставляет их верными.
+        """
+        response = self.client.delete(
+            f'/api/users/{self.user.pk}/',
+            {'current_password': 'reader-password'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertCountersActual()
+        self.assertEqual(
+            Recipe.objects.filter(favorites_count__gt=0).count(), 0
+        )
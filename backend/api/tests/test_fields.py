@@ -0,0 +1,98 @@
+import base64
+import io
+import os
+
+from django.test import SimpleTestCase
+from PIL import Image
+from rest_framework import serializers
+
+from api.fields import StreamingBase64ImageField
+
+
+def encode_image(size, image_format='PNG'):
+    """
+    Возвращает изображение из случайных пикселей в base64: такие
+    данные почти не сжимаются и занимают несколько порций декодера.
+    """
+    width, height = size
+    image = Image.frombytes('RGB', size, os.urandom(width * height * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, image_format)
+    return buffer.getvalue()
+
+
+class StreamingBase64ImageFieldTest(SimpleTestCase):
+    """
+    Декодирование изображения порциями: переносы строк
+    и ошибки размера, разрешения и формата.
+    """
+
+    def decode(self, data, **kwargs):
+        return StreamingBase64ImageField(**kwargs).to_internal_value(data)
+
+    def assertFails(self, code, data, **kwargs):
+        with self.assertRaises(serializers.ValidationError) as error:
+            self.decode(data, **kwargs)
+        self.assertEqual(error.exception.detail[0].code, code)
+
+    def test_wrapped_base64(self):
+        """
+        Строки по 76 символов не совпадают с границами порций,
+        остаток переносится в следующую порцию.
+        """
+        content = encode_image((200, 200))
+        encoded = base64.encodebytes(content).decode()
+        self.assertGreater(
+            len(encoded), StreamingBase64ImageField.CHUNK_SIZE * 2
+        )
+        for data in (
+            encoded,
+            encoded.replace('\n', '\r\n'),
+            'data:image/png;base64,' + encoded,
+        ):
+            with self.subTest(data=data[:30]):
+                file = self.decode(data)
+                self.assertEqual(file.size, len(content))
+                self.assertEqual(file.read(), content)
+                self.assertTrue(file.name.endswith('.png'))
+
+    def test_size_limit_ignores_line_breaks(self):
+        content = encode_image((100, 100))
+        encoded = base64.encodebytes(content).decode()
+        file = self.decode(encoded, max_size=len(content))
+        self.assertEqual(file.size, len(content))
+
+    def test_too_large(self):
+        content = encode_image((100, 100))
+        for data in (
+            base64.b64encode(content).decode(),
+            base64.encodebytes(content).decode(),
+        ):
+            with self.subTest(wrapped='\n' in data):
+                self.assertFails(
+                    'too_large', data, max_size=len(content) - 1
+                )
+
+    def test_too_large_with_spaces(self):
+        """
+        Пробелы не входят в оценку по длине строки,
+        размер проверяется и при декодировании.
+        """
+        content = encode_image((100, 100))
+        data = ' '.join(base64.b64encode(content).decode())
+        self.assertFails('too_large', data, max_size=len(content) - 1)
+
+    def test_too_many_pixels(self):
+        data = base64.b64encode(encode_image((20, 20))).decode()
+        self.assertFails('too_many_pixels', data, max_pixels=399)
+        self.assertEqual(self.decode(data, max_pixels=400).size, len(
+            base64.b64decode(data)
+        ))
+
+    def test_unsupported_format(self):
+        data = base64.b64encode(encode_image((20, 20), 'BMP')).decode()
+        self.assertFails('unsupported_format', data)
+
+    def test_truncated_base64(self):
+        data = base64.b64encode(encode_image((20, 20))).decode()
+        self.assertFails('invalid_image', data[:-1])
@@ -0,0 +1,64 @@
+from django.test import override_settings
+
+from api.tests.utils import IMAGE, APIDataTestCase, create_users
+from recipes.models import Recipe
+
+
+@override_settings(RECIPE_RESPONSE_CACHE_ENABLED=False)
+class TagsFilterTest(APIDataTestCase):
+    """
+    Фильтр по тегам в режимах any и all и проверка слагов
+    по справочнику тегов.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.author, = create_users(1, prefix='tagged')
+        cls.first, cls.last, cls.both, cls.untagged = (
+            Recipe.objects.bulk_create([
+                Recipe(
+                    author=cls.author,
+                    name=f'Рецепт с тегами {number}',
+                    text='Описание рецепта.',
+                    cooking_time=10,
+                    image=IMAGE,
+                )
+                for number in range(4)
+            ])
+        )
+        cls.first.tags.add(cls.tags[0])
+        cls.last.tags.add(cls.tags[2])
+        cls.both.tags.add(cls.tags[0], cls.tags[2])
+
+    def filter(self, **params):
+        return self.anonymous.get('/api/recipes/', {
+            'author': self.author.pk,
+            'tags': [self.tags[0].slug, self.tags[2].slug],
+            **params,
+        })
+
+    def found(self, **params):
+        response = self.filter(**params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return {recipe['id'] for recipe in response.json()['results']}
+
+    def test_any(self):
+        expected = {self.first.pk, self.last.pk, self.both.pk}
+        self.assertEqual(self.found(), expected)
+        self.assertEqual(self.found(tags_mode='any'), expected)
+
+    def test_all(self):
+        self.assertEqual(self.found(tags_mode='all'), {self.both.pk})
+        self.assertEqual(
+            self.found(tags=[self.tags[2].slug], tags_mode='all'),
+            {self.last.pk, self.both.pk},
+        )
+
+    def test_unknown_slug(self):
+        response = self.filter(tags=[self.tags[0].slug, 'missing'])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tags', response.json())
+
+    def test_unknown_mode(self):
+        self.assertEqual(self.filter(tags_mode='some').status_code, 400)
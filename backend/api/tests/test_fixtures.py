@@ -0,0 +1,57 @@
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from api.management.fixtures import FAST_HASHER, FixtureLoader
+from users.models import User
+
+
+class FixtureLoaderPasswordsTest(TestCase):
+    """
+    Пароли пользователей при пакетной загрузке.
+    """
+
+    def load_users(self, passwords, **kwargs):
+        loader = FixtureLoader(**kwargs)
+        loader.load('users', [
+            {
+                'username': f'user{number}',
+                'email': f'user{number}@example.com',
+                'password': password,
+            }
+            for number, password in enumerate(passwords)
+        ])
+        return {
+            user.username: user.password
+            for user in User.objects.order_by('username')
+        }
+
+    def test_prehashed_password_is_kept(self):
+        hashed = make_password('secret')
+        stored = self.load_users([hashed])
+        self.assertEqual(stored['user0'], hashed)
+
+    def test_same_password_is_hashed_once(self):
+        stored = self.load_users(['secret', 'secret', 'other'])
+        self.assertEqual(stored['user0'], stored['user1'])
+        self.assertTrue(check_password('secret', stored['user0']))
+        self.assertTrue(check_password('other', stored['user2']))
+
+    def test_empty_password_is_unusable(self):
+        stored = self.load_users([''])
+        self.assertFalse(check_password('', stored['user0']))
+
+    @override_settings(PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    ])
+    def test_fast_passwords_require_test_settings(self):
+        with self.assertRaises(CommandError):
+            FixtureLoader(fast_passwords=True)
+
+    @override_settings(PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher', FAST_HASHER,
+    ])
+    def test_fast_passwords(self):
+        stored = self.load_users(['secret'], fast_passwords=True)
+        self.assertTrue(stored['user0'].startswith('md5$'))
+        self.assertTrue(check_password('secret', stored['user0']))
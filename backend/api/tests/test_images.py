@@ -0,0 +1,20 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from recipes import images
+
+
+@override_settings(IMAGE_VARIANTS_ASYNC=False)
+class SyncVariantsTest(SimpleTestCase):
+    """
+    Ошибка обработки изображения без очереди попадает в лог
+    и не прерывает запрос, сохранивший рецепт.
+    """
+
+    def test_error_is_logged(self):
+        with mock.patch.object(
+            images, 'generate_variants', side_effect=OSError('broken')
+        ), self.assertLogs(images.logger, 'ERROR') as logs:
+            images.enqueue_variants(42)
+        self.assertIn('42', logs.output[0])
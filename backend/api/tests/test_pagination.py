@@ -0,0 +1,50 @@
+from django.test import override_settings
+
+from api.tests.utils import APIDataTestCase
+
+
+@override_settings(RECIPE_RESPONSE_CACHE_ENABLED=False)
+class CursorPaginationTest(APIDataTestCase):
+    """
+    Keyset-пагинация ленты рецептов по курсору.
+    """
+
+    url = '/api/recipes/'
+
+    def get_ids(self, response):
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def test_round_trip(self):
+        first = self.anonymous.get(self.url, {'cursor': '', 'limit': 6})
+        self.assertEqual(first.status_code, 200)
+        self.assertIsNone(first.json()['previous'])
+
+        second = self.anonymous.get(first.json()['next'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(len(self.get_ids(second)), 6)
+        self.assertFalse(
+            set(self.get_ids(first)) & set(self.get_ids(second))
+        )
+
+        back = self.anonymous.get(second.json()['previous'])
+        self.assertEqual(back.status_code, 200)
+        self.assertEqual(self.get_ids(back), self.get_ids(first))
+        self.assertIsNone(back.json()['previous'])
+
+    def test_matches_page_order(self):
+        pages = self.anonymous.get(self.url, {'page': 2, 'limit': 6})
+        first = self.anonymous.get(self.url, {'cursor': '', 'limit': 6})
+        second = self.anonymous.get(first.json()['next'])
+        self.assertEqual(self.get_ids(second), self.get_ids(pages))
+
+    def test_last_page_has_no_next(self):
+        response = self.anonymous.get(
+            self.url, {'cursor': '', 'limit': len(self.recipes)}
+        )
+        self.assertIsNone(response.json()['next'])
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-base64!', 'eHl6', 'cXwyMDI0fDE='):
+            with self.subTest(cursor=cursor):
+                response = self.anonymous.get(self.url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
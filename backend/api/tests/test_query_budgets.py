@@ -0,0 +1,220 @@
+import io
+import re
+import tempfile
+
+from django.core.management import call_command
+from django.test import override_settings
+
+from api.management.commands.check_query_budgets import Command
+from api.tests.utils import APIDataTestCase, token_client
+from api.views import (
+    IngredientsViewSet,
+    RecipesViewSet,
+    RequestStatsView,
+    TagsViewSet,
+)
+from users.models import User
+from users.views import CustomUserViewSet
+
+
+@override_settings(
+    QUERY_BUDGET_STRICT=True, RECIPE_RESPONSE_CACHE_ENABLED=False
+)
+class QueryBudgetsTest(APIDataTestCase):
+    """
+    Действия выполняют ровно столько запросов, сколько указано
+    в их бюджетах, с аутентификацией токеном. Бюджет, который
+    больше фактического числа запросов, тоже ошибка: он скроет
+    регрессию.
+    """
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media = override_settings(MEDIA_ROOT=media_root.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def assertBudget(self, view, action, method, url, data=None,
+                     client=None, queries=None):
+        """
+        Выполняет запрос и проверяет число запросов к базе:
+        по умолчанию — бюджет действия.
+        """
+        if queries is None:
+            handler = getattr(view, action, None)
+            queries = getattr(handler, 'query_budget', None)
+            if queries is None:
+                queries = view.query_budgets[action]
+        client = client or self.client
+        with self.assertNumQueries(queries):
+            response = getattr(client, method)(url, data, format='json')
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 400, response)
+        return response
+
+    def recipe_payload(self, tags, ingredients):
+        return {
+            'name': 'Проверка бюджета',
+            'text': 'Рецепт для проверки бюджета запросов.',
+            'cooking_time': 10,
+            'image': Command.get_image(),
+            'tags': [tag.pk for tag in tags],
+            'ingredients': [
+                {'id': ingredient.pk, 'amount': 5}
+                for ingredient in ingredients
+            ],
+        }
+
+    def test_catalogs(self):
+        for view, url, pk in (
+            (TagsViewSet, '/api/tags/', self.tags[0].pk),
+            (
+                IngredientsViewSet, '/api/ingredients/',
+                self.ingredients[0].pk,
+            ),
+        ):
+            with self.subTest(view=view.__name__):
+                self.assertBudget(view, 'list', 'get', url)
+                self.assertBudget(view, 'retrieve', 'get', f'{url}{pk}/')
+
+    def test_recipes_read(self):
+        self.assertBudget(
+            RecipesViewSet, 'list', 'get', '/api/recipes/', {'limit': 100}
+        )
+        self.assertBudget(
+            RecipesViewSet, 'retrieve', 'get',
+            f'/api/recipes/{self.recipes[0].pk}/'
+        )
+
+    def test_recipes_write(self):
+        author = self.authors[0]
+        client = token_client(author)
+        url = f'/api/recipes/{self.recipes[0].pk}/'
+        self.assertBudget(
+            RecipesViewSet, 'create', 'post', '/api/recipes/',
+            self.recipe_payload(self.tags, self.ingredients), client=client
+        )
+        # У рецепта первые два тега и ингредиента: при замене
+        # на последние два одни связи удаляются, другие добавляются.
+        payload = self.recipe_payload(self.tags[1:], self.ingredients[1:])
+        self.assertBudget(
+            RecipesViewSet, 'update', 'put', url, payload, client=client
+        )
+        self.assertBudget(
+            RecipesViewSet, 'partial_update', 'patch', url, {
+                'name': 'Новое название',
+                'ingredients': payload['ingredients'][:1],
+            },
+            client=client
+        )
+        self.assertBudget(
+            RecipesViewSet, 'destroy', 'delete', url, client=client
+        )
+
+    def test_user_recipes(self):
+        recipe = self.recipes[1]
+        for action in ('favorite', 'shopping_cart'):
+            with self.subTest(action=action):
+                url = f'/api/recipes/{recipe.pk}/{action}/'
+                self.assertBudget(RecipesViewSet, action, 'post', url)
+                self.assertBudget(RecipesViewSet, action, 'delete', url)
+
+    def test_user_recipes_bulk(self):
+        ids = {'ids': [recipe.pk for recipe in self.recipes[:10]]}
+        for action, url in (
+            ('favorite_bulk', '/api/recipes/favorite/bulk/'),
+            ('shopping_cart_bulk', '/api/recipes/shopping_cart/bulk/'),
+        ):
+            with self.subTest(action=action):
+                # Удаление читает строки перед DELETE, вставке это не нужно.
+                self.assertBudget(
+                    RecipesViewSet, action, 'post', url, ids, queries=6
+                )
+                self.assertBudget(RecipesViewSet, action, 'delete', url, ids)
+
+    def test_download_shopping_cart(self):
+        """
+        Запрос списка покупок выполняется при отдаче потокового
+        ответа и тоже входит в бюджет.
+        """
+        self.assertBudget(
+            RecipesViewSet, 'download_shopping_cart', 'get',
+            '/api/recipes/download_shopping_cart/?format=txt'
+        )
+
+    def test_users(self):
+        author = self.authors[1]
+        self.assertBudget(
+            CustomUserViewSet, 'list', 'get', '/api/users/', {'limit': 100}
+        )
+        self.assertBudget(
+            CustomUserViewSet, 'retrieve', 'get', f'/api/users/{author.pk}/'
+        )
+        self.assertBudget(CustomUserViewSet, 'me', 'get', '/api/users/me/')
+        self.assertBudget(
+            CustomUserViewSet, 'create', 'post', '/api/users/', {
+                'email': 'budget@example.com',
+                'username': 'budget',
+                'first_name': 'Проверка',
+                'last_name': 'Бюджета',
+                'password': 'budget-check-password',
+            },
+        )
+
+    def test_subscriptions(self):
+        author = self.authors[1]
+        self.assertBudget(
+            CustomUserViewSet, 'subscriptions', 'get',
+            '/api/users/subscriptions/', {'page_size': 100}
+        )
+        url = f'/api/users/{author.pk}/subscribe/'
+        self.assertBudget(CustomUserViewSet, 'subscribe', 'post', url)
+        self.assertBudget(
+            CustomUserViewSet, 'subscribe', 'delete', url, queries=7
+        )
+        ids = {'ids': [author.pk for author in self.authors]}
+        url = '/api/users/subscribe/bulk/'
+        self.assertBudget(
+            CustomUserViewSet, 'subscribe_bulk', 'post', url, ids, queries=6
+        )
+        self.assertBudget(
+            CustomUserViewSet, 'subscribe_bulk', 'delete', url, ids
+        )
+
+    def test_request_stats(self):
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        url = '/api/stats/requests/'
+        self.assertBudget(RequestStatsView, 'get', 'get', url)
+        self.assertBudget(RequestStatsView, 'delete', 'delete', url)
+
+
+@override_settings(RECIPE_RESPONSE_CACHE_ENABLED=False)
+class CheckQueryBudgetsCommandTest(APIDataTestCase):
+    """
+    Команда check_query_budgets обходит все маршруты на тестовых
+    данных и находит тело запроса для изменения пользователей,
+    смены пароля и email.
+    """
+
+    def test_all_routes_within_budgets(self):
+        out = io.StringIO()
+        call_command('check_query_budgets', stdout=out)
+        output = out.getvalue()
+        self.assertIn('Все маршруты укладываются в бюджеты.', output)
+        skipped = [
+            line for line in output.splitlines()
+            if line.endswith('нет примера')
+        ]
+        for pattern in (
+            r'/api/users/\d+/:',
+            '/api/users/set_password/',
+            '/api/users/set_email/',
+            '/api/users/reset_email_confirm/',
+        ):
+            with self.subTest(pattern=pattern):
+                self.assertFalse(
+                    [line for line in skipped if re.search(pattern, line)]
+                )
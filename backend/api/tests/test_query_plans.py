@@ -0,0 +1,42 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+
+from api.management.commands.explain_hot_queries import Command
+from api.tests.utils import APIDataTestCase
+
+
+@override_settings(RECIPE_RESPONSE_CACHE_ENABLED=False)
+class HotQueryPlansTest(APIDataTestCase):
+    """
+    Запросы основных эндпоинтов читают таблицы по индексам.
+
+    Проверка выполняется командой explain_hot_queries. На маленьких
+    таблицах PostgreSQL выбирает Seq Scan независимо от индексов,
+    поэтому в тесте он отключается: Seq Scan остается в плане,
+    только если подходящего индекса нет.
+    """
+
+    def test_no_full_scans(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        out = StringIO()
+        call_command('explain_hot_queries', stdout=out)
+        self.assertIn('Все запросы используют индексы.', out.getvalue())
+
+    @skipUnless(connection.vendor == 'sqlite', 'План в формате SQLite.')
+    def test_full_scans_are_detected(self):
+        plan = [
+            'SCAN recipes_recipe',
+            'SEARCH recipes_tag USING INTEGER PRIMARY KEY (rowid=?)',
+            'SCAN recipes_favorite USING INDEX favorite_user_idx',
+            'USE TEMP B-TREE FOR ORDER BY',
+        ]
+        self.assertEqual(
+            Command().find_full_scans(plan),
+            ['recipes_recipe', 'recipes_favorite'],
+        )
@@ -0,0 +1,116 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import RecipeWriteSerializer
+from api.tests.utils import APIDataTestCase
+from recipes.models import IngredientInRecipe
+
+
+class RecipeUpdateRowsTest(APIDataTestCase):
+    """
+    Обновление рецепта записывает только изменившиеся связи
+    с тегами и ингредиентами, а неизменные строки сохраняют ключи.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = self.recipes[0]
+        request = APIRequestFactory().patch('/')
+        request.user = self.recipe.author
+        self.context = {'request': request}
+
+    def update(self, data):
+        """
+        Выполняет частичное обновление и возвращает сериализатор.
+        """
+        serializer = RecipeWriteSerializer(
+            self.recipe, data=data, partial=True, context=self.context
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return serializer
+
+    def ingredient_rows(self):
+        """
+        Возвращает строки ингредиентов рецепта: id ингредиента -> (pk, amount).
+        """
+        return {
+            ingredient_id: (pk, amount)
+            for pk, ingredient_id, amount in IngredientInRecipe.objects.filter(
+                recipe=self.recipe
+            ).values_list('pk', 'ingredient_id', 'amount')
+        }
+
+    def amounts(self, amounts):
+        return [
+            {'id': self.ingredients[number].pk, 'amount': amount}
+            for number, amount in amounts
+        ]
+
+    def test_without_relations(self):
+        rows = self.ingredient_rows()
+        serializer = self.update({'name': 'Новое название'})
+        self.assertEqual(
+            serializer.rows_written, {'ingredients': 0, 'tags': 0}
+        )
+        self.assertEqual(self.ingredient_rows(), rows)
+
+    def test_same_relations(self):
+        rows = self.ingredient_rows()
+        serializer = self.update({
+            'tags': [tag.pk for tag in self.tags[:2]],
+            'ingredients': self.amounts(((0, 10), (1, 10))),
+        })
+        self.assertEqual(
+            serializer.rows_written, {'ingredients': 0, 'tags': 0}
+        )
+        self.assertEqual(self.ingredient_rows(), rows)
+
+    def test_amount_change(self):
+        """
+        Изменение количества — один bulk_update без пересоздания строк.
+        """
+        rows = self.ingredient_rows()
+        table = IngredientInRecipe._meta.db_table
+        with CaptureQueriesContext(connection) as queries:
+            serializer = self.update({
+                'ingredients': self.amounts(((0, 25), (1, 10))),
+            })
+        writes = [
+            query['sql'] for query in queries.captured_queries
+            if table in query['sql']
+            and query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        self.assertEqual(len(writes), 1, writes)
+        self.assertTrue(writes[0].startswith('UPDATE'), writes)
+        self.assertEqual(serializer.rows_written['ingredients'], 1)
+        first, second = self.ingredients[0].pk, self.ingredients[1].pk
+        self.assertEqual(
+            self.ingredient_rows(),
+            {first: (rows[first][0], 25), second: rows[second]},
+        )
+
+    def test_removed_rows(self):
+        rows = self.ingredient_rows()
+        serializer = self.update({
+            'tags': [self.tags[1].pk, self.tags[2].pk],
+            'ingredients': self.amounts(((1, 10), (2, 5))),
+        })
+        # Тег: одна связь удалена и одна добавлена, ингредиент так же.
+        self.assertEqual(
+            serializer.rows_written, {'ingredients': 2, 'tags': 2}
+        )
+        current = self.ingredient_rows()
+        second, third = self.ingredients[1].pk, self.ingredients[2].pk
+        self.assertEqual(set(current), {second, third})
+        self.assertEqual(current[second], rows[second])
+        self.assertFalse(
+            IngredientInRecipe.objects.filter(
+                pk=rows[self.ingredients[0].pk][0]
+            ).exists()
+        )
+        self.assertEqual(
+            set(self.recipe.tags.values_list('pk', flat=True)),
+            {self.tags[1].pk, self.tags[2].pk},
+        )
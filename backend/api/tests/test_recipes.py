@@ -0,0 +1,56 @@
+from django.test import override_settings
+
+from api.tests.utils import TOKEN_QUERIES, APIDataTestCase
+
+# Число запросов списка рецептов: COUNT для пагинации, рецепты
+# с автором и флагами, теги, ингредиенты
+LIST_QUERIES = 4
+
+
+@override_settings(RECIPE_RESPONSE_CACHE_ENABLED=False)
+class RecipeListQueriesTest(APIDataTestCase):
+    """
+    Список рецептов выполняет одно и то же число запросов
+    при любом размере страницы.
+    """
+
+    page_sizes = (1, 6, 50)
+
+    def test_anonymous_list(self):
+        for limit in self.page_sizes:
+            with self.subTest(limit=limit):
+                with self.assertNumQueries(LIST_QUERIES):
+                    response = self.anonymous.get(
+                        '/api/recipes/', {'limit': limit}
+                    )
+                self.assertEqual(len(response.json()['results']), limit)
+
+    def test_authenticated_list(self):
+        for limit in self.page_sizes:
+            with self.subTest(limit=limit):
+                with self.assertNumQueries(LIST_QUERIES + TOKEN_QUERIES):
+                    response = self.client.get(
+                        '/api/recipes/', {'limit': limit}
+                    )
+                self.assertEqual(len(response.json()['results']), limit)
+
+    def test_user_flags(self):
+        """
+        Флаги текущего пользователя берутся из аннотаций
+        и совпадают с данными.
+        """
+        favorited = {recipe.pk for recipe in self.recipes[::2]}
+        in_cart = {recipe.pk for recipe in self.recipes[::3]}
+        response = self.client.get('/api/recipes/', {'limit': 50})
+        for recipe in response.json()['results']:
+            self.assertEqual(
+                recipe['is_favorited'], recipe['id'] in favorited
+            )
+            self.assertEqual(
+                recipe['is_in_shopping_cart'], recipe['id'] in in_cart
+            )
+
+        response = self.anonymous.get('/api/recipes/', {'limit': 50})
+        for recipe in response.json()['results']:
+            self.assertFalse(recipe['is_favorited'])
+            self.assertFalse(recipe['is_in_shopping_cart'])
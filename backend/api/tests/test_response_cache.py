@@ -0,0 +1,156 @@
+import time
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import get_catalog_cache
+from api.response_cache import get_or_build, make_key
+from api.tests.utils import APIDataTestCase
+
+
+class AnonymousResponseCacheTest(APIDataTestCase):
+    """
+    Кеш ответов для анонимных пользователей хранит только JSON.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.url = f'/api/recipes/{self.recipes[0].pk}/'
+
+    def test_json_is_cached(self):
+        first = self.anonymous.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.anonymous.get(self.url)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+
+    def test_browsable_api_is_not_cached(self):
+        self.anonymous.get(self.url, {'format': 'api'})
+        with CaptureQueriesContext(connection) as captured:
+            response = self.anonymous.get(self.url, {'format': 'api'})
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(captured), 0)
+
+
+class ResponseCacheInvalidationTest(APIDataTestCase):
+    """
+    Изменения данных, которые выводятся в ответе, сбрасывают
+    кеш ленты и страницы рецепта, а изменение другого рецепта
+    страницу не сбрасывает.
+    """
+
+    def setUp(self):
+        super().setUp()
+        # Файла изображения нет: варианты при сохранении не строятся.
+        patcher = mock.patch('recipes.signals.enqueue_variants')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.recipe = self.recipes[0]
+        # Лента автора: на первой странице общей ленты рецепта нет.
+        self.urls = (
+            f'/api/recipes/?author={self.recipe.author_id}&limit=10',
+            f'/api/recipes/{self.recipe.pk}/',
+        )
+        for url in self.urls:
+            self.anonymous.get(url)
+
+    def assertCached(self, url):
+        with self.assertNumQueries(0):
+            self.anonymous.get(url)
+
+    def assertRebuilt(self, url):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.anonymous.get(url)
+        self.assertGreater(len(captured), 0, url)
+        return response
+
+    def change(self, function):
+        """
+        Выполняет изменение с обработчиками on_commit,
+        которые меняют поколения кеша.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            function()
+
+    def test_warm_cache(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertCached(url)
+
+    def assertRebuiltWith(self, text):
+        """
+        Проверяет, что лента и страница рецепта собраны заново
+        и содержат text.
+        """
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertIn(text, self.assertRebuilt(url).content.decode())
+
+    def test_recipe_save(self):
+        self.recipe.name = 'Новое название'
+        self.change(self.recipe.save)
+        self.assertRebuiltWith('Новое название')
+
+    def test_other_recipe_save(self):
+        other = self.recipes[1]
+        other.name = 'Другой рецепт'
+        self.change(other.save)
+        self.assertRebuilt(self.urls[0])
+        self.assertCached(self.urls[1])
+
+    def test_recipe_delete(self):
+        self.change(self.recipe.delete)
+        self.assertRebuilt(self.urls[0])
+        self.assertEqual(self.assertRebuilt(self.urls[1]).status_code, 404)
+
+    def test_tag_change(self):
+        tag = self.tags[0]
+        tag.name = 'Новый тег'
+        self.change(tag.save)
+        self.assertRebuiltWith('Новый тег')
+
+    def test_ingredient_rename(self):
+        ingredient = self.ingredients[0]
+        ingredient.name = 'Новый ингредиент'
+        self.change(ingredient.save)
+        self.assertRebuiltWith('Новый ингредиент')
+
+    def test_author_rename(self):
+        author = self.recipe.author
+        author.first_name = 'Переименованный'
+        self.change(lambda: author.save(update_fields=['first_name']))
+        self.assertRebuiltWith('Переименованный')
+
+
+class StampedeGuardTest(TestCase):
+    """
+    Пока ответ пересобирает процесс с блокировкой, остальные
+    отдают устаревший ответ и не собирают его сами.
+    """
+
+    def setUp(self):
+        self.cache = get_catalog_cache()
+        self.cache.clear()
+        self.key = make_key('stampede', 1)
+        self.cache.set(
+            self.key, (time.time() - 1, b'stale', []), timeout=60
+        )
+
+    def test_stale_served_while_locked(self):
+        self.cache.add(f'{self.key}:lock', 1)
+        build = mock.Mock()
+        response = get_or_build(self.key, build)
+        self.assertEqual(response.content, b'stale')
+        build.assert_not_called()
+
+    def test_lock_holder_rebuilds(self):
+        build = mock.Mock(return_value=mock.Mock(
+            status_code=200, content=b'fresh', items=lambda: []
+        ))
+        self.assertEqual(get_or_build(self.key, build).content, b'fresh')
+        build.assert_called_once_with()
+        self.assertIsNone(self.cache.get(f'{self.key}:lock'))
+        self.assertEqual(get_or_build(self.key, build).content, b'fresh')
+        build.assert_called_once_with()
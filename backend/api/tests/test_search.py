@@ -0,0 +1,88 @@
+from django.test import override_settings
+
+from api.tests.utils import IMAGE, APIDataTestCase
+from recipes.models import Ingredient, IngredientInRecipe, Recipe
+from recipes.search import update_search_documents
+
+
+@override_settings(RECIPE_RESPONSE_CACHE_ENABLED=False)
+class RecipeSearchTest(APIDataTestCase):
+    """
+    Поиск ?search= по названию, описанию и ингредиентам:
+    совпадение в названии важнее, фильтры сужают результат.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        ingredient = Ingredient.objects.create(
+            name='Заправка для борща', measurement_unit='г'
+        )
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                author=author,
+                name=name,
+                text=text,
+                cooking_time=30,
+                image=IMAGE,
+            )
+            for author, name, text in (
+                (cls.authors[0], 'Борщ', 'Сварить и подать.'),
+                (cls.authors[1], 'Свекольник', 'Почти как борщ, но холодный.'),
+                (cls.authors[2], 'Суп дня', 'Сварить и подать.'),
+            )
+        ])
+        # Рецепт с совпадением в названии — самый старый.
+        cls.by_name, cls.by_text, cls.by_ingredient = recipes
+        IngredientInRecipe.objects.create(
+            recipe=cls.by_ingredient, ingredient=ingredient, amount=100
+        )
+        for recipe, tag in (
+            (cls.by_ingredient, cls.tags[0]),
+            (cls.by_text, cls.tags[1]),
+            (cls.by_name, cls.tags[0]),
+        ):
+            recipe.tags.add(tag)
+        update_search_documents([
+            cls.by_ingredient.pk, cls.by_text.pk, cls.by_name.pk
+        ])
+
+    def search(self, **params):
+        response = self.anonymous.get(
+            '/api/recipes/', {'search': 'борщ', 'limit': 50, **params}
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def test_name_ranked_first(self):
+        """
+        Самый новый рецепт найден по ингредиенту, но первым
+        идет рецепт, в названии которого есть слово запроса.
+        """
+        found = self.search()
+        self.assertEqual(
+            set(found),
+            {self.by_name.pk, self.by_text.pk, self.by_ingredient.pk},
+        )
+        self.assertEqual(found[0], self.by_name.pk)
+
+    def test_all_terms_required(self):
+        self.assertEqual(self.search(search='борщ холодный'), [
+            self.by_text.pk
+        ])
+        self.assertEqual(self.search(search='щавель'), [])
+
+    def test_with_tags(self):
+        self.assertEqual(
+            self.search(tags=[self.tags[1].slug]), [self.by_text.pk]
+        )
+        self.assertEqual(
+            self.search(tags=[self.tags[0].slug])[0], self.by_name.pk
+        )
+
+    def test_with_author(self):
+        for recipe in (self.by_name, self.by_text, self.by_ingredient):
+            with self.subTest(recipe=recipe.name):
+                self.assertEqual(
+                    self.search(author=recipe.author_id), [recipe.pk]
+                )
@@ -0,0 +1,17 @@
+from api.tests.utils import APIDataTestCase
+from api.utils import FONT_NAME
+
+
+class ShoppingListPDFTest(APIDataTestCase):
+    """
+    PDF со списком покупок использует шрифт с кириллицей.
+    """
+
+    def test_pdf_embeds_cyrillic_font(self):
+        response = self.client.get(
+            '/api/recipes/download_shopping_cart/', {'format': 'pdf'}
+        )
+        self.assertEqual(response.status_code, 200)
+        pdf = b''.join(response.streaming_content)
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertIn(FONT_NAME.replace(' ', '').encode(), pdf)
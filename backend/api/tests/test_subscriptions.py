@@ -0,0 +1,54 @@
+from api.tests.utils import TOKEN_QUERIES, APIDataTestCase
+
+# Число запросов ленты подписок: COUNT для пагинации, авторы,
+# последние рецепты всех авторов страницы
+SUBSCRIPTIONS_QUERIES = 3
+
+
+class SubscriptionsQueriesTest(APIDataTestCase):
+    """
+    Лента подписок выполняет одно и то же число запросов
+    при любом размере страницы и recipes_limit.
+    """
+
+    url = '/api/users/subscriptions/'
+    page_sizes = (1, 100)
+    recipes_limits = (1, 10)
+
+    def test_queries_do_not_depend_on_page(self):
+        for page_size in self.page_sizes:
+            for recipes_limit in self.recipes_limits:
+                with self.subTest(
+                    page_size=page_size, recipes_limit=recipes_limit
+                ):
+                    with self.assertNumQueries(
+                        SUBSCRIPTIONS_QUERIES + TOKEN_QUERIES
+                    ):
+                        response = self.client.get(self.url, {
+                            'page_size': page_size,
+                            'recipes_limit': recipes_limit,
+                        })
+                    self.assertEqual(response.status_code, 200)
+                    authors = response.json()['results']
+                    self.assertEqual(
+                        len(authors),
+                        min(page_size, len(self.authors[::2]))
+                    )
+                    for author in authors:
+                        self.assertEqual(
+                            len(author['recipes']),
+                            min(recipes_limit, self.recipes_per_author)
+                        )
+
+    def test_only_subscribed_authors(self):
+        response = self.client.get(self.url, {'page_size': 100})
+        self.assertEqual(
+            {author['id'] for author in response.json()['results']},
+            {author.pk for author in self.authors[::2]}
+        )
+        for author in response.json()['results']:
+            self.assertTrue(author['is_subscribed'])
+
+    def test_requires_authentication(self):
+        response = self.anonymous.get(self.url)
+        self.assertEqual(response.status_code, 401)
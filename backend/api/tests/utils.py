@@ -0,0 +1,129 @@
+"""
+Общие данные и клиенты для тестов API.
+"""
+
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.cache import get_catalog_cache
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Subscription, User
+
+# Изображение рецепта: файл не нужен, в ответе только его адрес
+IMAGE = 'recipes/images/test.png'
+# Для пользователя с токеном добавляется поиск токена
+TOKEN_QUERIES = 1
+
+
+def create_users(count, prefix='user'):
+    """
+    Создает пользователей одним запросом.
+    """
+    return User.objects.bulk_create([
+        User(
+            username=f'{prefix}{number}',
+            email=f'{prefix}{number}@example.com',
+            first_name=f'Имя{number}',
+            last_name=f'Фамилия{number}',
+        )
+        for number in range(count)
+    ])
+
+
+def create_recipes(authors, per_author, tags, ingredients):
+    """
+    Создает рецепты авторов с тегами и ингредиентами.
+    Рецепты создаются пакетно, без сигналов сохранения.
+    """
+    recipes = Recipe.objects.bulk_create([
+        Recipe(
+            author=author,
+            name=f'Рецепт {author.username} {number}',
+            text='Описание рецепта.',
+            cooking_time=number + 1,
+            image=IMAGE,
+        )
+        for author in authors
+        for number in range(per_author)
+    ])
+    Recipe.tags.through.objects.bulk_create([
+        Recipe.tags.through(recipe=recipe, tag=tag)
+        for recipe in recipes
+        for tag in tags
+    ])
+    IngredientInRecipe.objects.bulk_create([
+        IngredientInRecipe(recipe=recipe, ingredient=ingredient, amount=10)
+        for recipe in recipes
+        for ingredient in ingredients
+    ])
+    return recipes
+
+
+def token_client(user):
+    """
+    Возвращает клиент, аутентифицированный токеном, как настоящий
+    клиент API: поиск токена входит в число запросов.
+    """
+    token, _ = Token.objects.get_or_create(user=user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+class APIDataTestCase(TestCase):
+    """
+    Тесты на общем наборе данных: теги, ингредиенты, авторы
+    с рецептами и пользователь с избранным, корзиной и подписками.
+    """
+
+    authors_count = 6
+    recipes_per_author = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tags = Tag.objects.bulk_create([
+            Tag(name=f'Тег {number}', slug=f'tag{number}')
+            for number in range(3)
+        ])
+        cls.ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(3)
+        ])
+        cls.authors = create_users(cls.authors_count, prefix='author')
+        cls.recipes = create_recipes(
+            cls.authors, cls.recipes_per_author, cls.tags[:2],
+            cls.ingredients[:2]
+        )
+        cls.user = User.objects.create_user(
+            username='reader',
+            email='reader@example.com',
+            password='reader-password',
+            first_name='Читатель',
+            last_name='Рецептов',
+        )
+        Favorite.objects.bulk_create([
+            Favorite(user=cls.user, recipe=recipe)
+            for recipe in cls.recipes[::2]
+        ])
+        ShoppingCart.objects.bulk_create([
+            ShoppingCart(user=cls.user, recipe=recipe)
+            for recipe in cls.recipes[::3]
+        ])
+        Subscription.objects.bulk_create([
+            Subscription(user=cls.user, author=author)
+            for author in cls.authors[::2]
+        ])
+
+    def setUp(self):
+        # Кеш справочников и ответов общий для всех тестов процесса.
+        get_catalog_cache().clear()
+        self.anonymous = APIClient()
+        self.client = token_client(self.user)
@@ -3,7 +3,12 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from api.views import IngredientsViewSet, RecipesViewSet, TagsViewSet
+from api.views import (
+    IngredientsViewSet,
+    RecipesViewSet,
+    RequestStatsView,
+    TagsViewSet,
+)
 
 # Определяем app_name для использования namespace
 app_name = "api"
@@ -36,4 +41,10 @@ router.register(
 urlpatterns = [
     # Включаем маршруты, сгенерированные роутером
     path('', include(router.urls)),
+    # Пользователи и подписки
+    path('', include('users.urls')),
+    # Статистика запросов для персонала
+    path(
+        'stats/requests/', RequestStatsView.as_view(), name='request-stats'
+    ),
 ]
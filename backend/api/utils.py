@@ -1,78 +1,118 @@
 """
 Модуль для генерации PDF-файлов.
 
-Этот модуль предоставляет функцию `generate_pdf`, которая создает PDF-файл
-с использованием библиотеки ReportLab. Файл содержит текст, переданный
-в качестве аргумента, и может быть использован для генерации списка покупок
-или других документов.
+Этот модуль предоставляет функцию `render_shopping_list_pdf`, которая
+создает PDF со списком покупок с использованием библиотеки ReportLab.
+Шрифт с кириллицей (DejaVu Sans, api/fonts) регистрируется один раз
+при старте приложения (`register_fonts`),
+а готовые документы кешируются по хешу содержимого списка, поэтому
+повторная выгрузка неизменной корзины не требует новой генерации.
 """
 
+import hashlib
+import io
 import os
-import reportlab
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.units import cm
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
-from django.http import HttpResponse
-from django.conf import settings
 
 
-def generate_shopping_list_pdf(text, filename="shopping_list.pdf"):
+# Шрифт поставляется вместе с кодом: встроенные шрифты PDF
+# (Helvetica и другие) не содержат кириллицы
+FONT_NAME = 'DejaVu Sans'
+FONT_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'fonts', 'DejaVuSans.ttf'
+)
+
+_styles = {}
+
+
+def register_fonts():
+    """
+    Регистрирует шрифт для PDF и готовит стили текста.
+    Вызывается один раз при запуске приложения. Без файла шрифта
+    приложение не запускается: PDF без кириллицы нечитаем.
+    """
+    if not os.path.exists(FONT_FILE):
+        raise ImproperlyConfigured(
+            f'Не найден шрифт для PDF со списком покупок: {FONT_FILE}'
+        )
+    pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_FILE))
+
+    _styles.update(
+        title=ParagraphStyle(
+            name='TitleStyle',
+            fontName=FONT_NAME,
+            fontSize=16,
+            leading=20,
+            textColor=colors.darkblue,
+            alignment=TA_CENTER
+        ),
+        content=ParagraphStyle(
+            name='ContentStyle',
+            fontName=FONT_NAME,
+            fontSize=12,
+            textColor=colors.black,
+            alignment=TA_LEFT,
+            leading=14
+        ),
+        footer=ParagraphStyle(
+            name='FooterStyle',
+            fontName=FONT_NAME,
+            fontSize=10,
+            textColor=colors.grey,
+            alignment=TA_CENTER
+        ),
+    )
+
+
+def shopping_list_cache_key(rows):
+    """
+    Возвращает ключ кеша PDF для содержимого списка покупок.
+    """
+    digest = hashlib.sha256(repr(list(rows)).encode()).hexdigest()
+    return f'shopping_list_pdf:{digest}'
+
+
+def render_shopping_list_pdf(rows):
     """
-    Генерирует PDF-файл на лету с использованием переданного текста.
+    Возвращает PDF со списком покупок в виде байтов.
 
     Args:
-        text (str): Текст, который будет добавлен в PDF.
-        filename (str): Имя файла для сохранения PDF.
-        По умолчанию "shopping_list.pdf".
+        rows: Последовательность кортежей
+            (название, единица измерения, количество).
 
     Returns:
-        HttpResponse: Ответ с PDF-файлом.
+        bytes: Содержимое PDF-файла.
+    """
+    key = shopping_list_cache_key(rows)
+    pdf = cache.get(key)
+    if pdf is None:
+        pdf = build_shopping_list_pdf(rows)
+        cache.set(key, pdf, timeout=settings.SHOPPING_LIST_PDF_CACHE_TIMEOUT)
+    return pdf
+
+
+def build_shopping_list_pdf(rows):
     """
-    # Добавляем путь к шрифтам
-    reportlab.rl_config.TTFSearchPath.append(
-        os.path.join(settings.MEDIA_ROOT, 'fonts'))
-
-    # Регистрируем шрифт
-    pdfmetrics.registerFont(TTFont('Open Sans', 'opensans.ttf'))
-
-    # Создаем стили для текста
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(
-        name='TitleStyle',
-        fontName='Open Sans',
-        fontSize=16,
-        leading=20,
-        textColor=colors.darkblue,
-        alignment=TA_CENTER
-    ))
-    styles.add(ParagraphStyle(
-        name='ContentStyle',
-        fontName='Open Sans',
-        fontSize=12,
-        textColor=colors.black,
-        alignment=TA_LEFT,
-        leading=14
-    ))
-    styles.add(ParagraphStyle(
-        name='FooterStyle',
-        fontName='Open Sans',
-        fontSize=10,
-        textColor=colors.grey,
-        alignment=TA_CENTER
-    ))
-
-    # Создаем HTTP-ответ с PDF
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-    # Создаем PDF-документ
+    Генерирует PDF со списком покупок без обращения к кешу.
+    """
+    if not _styles:
+        register_fonts()
+
+    buffer = io.BytesIO()
     pdf = SimpleDocTemplate(
-        response,
+        buffer,
         pagesize=A4,
         rightMargin=2 * cm,
         leftMargin=2 * cm,
@@ -81,22 +121,23 @@ def generate_shopping_list_pdf(text, filename="shopping_list.pdf"):
     )
 
     # Содержимое PDF
-    content = []
-
-    # Добавляем заголовок
-    title = "Список покупок"
-    content.append(Paragraph(title, styles['TitleStyle']))
-    content.append(Spacer(1, 24))
-
-    # Добавляем основной текст
-    content.append(Paragraph(text, styles['ContentStyle']))
+    content = [
+        Paragraph('Список покупок', _styles['title']),
+        Spacer(1, 24),
+    ]
+
+    # Добавляем по строке на каждый ингредиент
+    for name, measurement_unit, amount in rows:
+        content.append(Paragraph(
+            escape(f'• {name} — {amount} {measurement_unit}'),
+            _styles['content']
+        ))
     content.append(Spacer(1, 24))
 
     # Добавляем футер с информацией о сайте
-    footer = f"Сгенерировано на сайте {settings.SITE_NAME}"
-    content.append(Paragraph(footer, styles['FooterStyle']))
+    footer = f'Сгенерировано на сайте {settings.SITE_NAME}'
+    content.append(Paragraph(escape(footer), _styles['footer']))
 
     # Собираем PDF
     pdf.build(content)
-
-    return response
+    return buffer.getvalue()
@@ -3,77 +3,265 @@
 связанных с рецептами, ингредиентами и тегами.
 """
 
-from django.db.models import Sum
-from django.http import HttpResponse
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.filters import SearchFilter
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from api.budgets import QueryBudgetMixin, query_budget
+from api.bulk import add_recipes, remove_recipes
+from api.cache import (
+    INGREDIENTS_CATALOG,
+    TAGS_CATALOG,
+    get_catalog_version,
+)
+from api.counters import change_counter, manual_counters
 from api.filter import RecipesFilter
-from api.mixins import ReadOnlyViewSet
-from .utils import generate_shopping_list_pdf
+from api.ingredient_index import (
+    DEFAULT_SEARCH_LIMIT,
+    MAX_SEARCH_LIMIT,
+    get_ingredient_index,
+)
+from api.mixins import (
+    AnonymousResponseCacheMixin,
+    CachedCatalogMixin,
+    ConditionalGetMixin,
+    ReadOnlyViewSet,
+)
+from api.pagination import RecipePagination
 from api.permissions import AuthorAdminOrReadOnlyPermission
+from api.request_stats import get_stats, reset_stats
+from api.response_cache import (
+    FEED_GENERATION,
+    RECIPES_GENERATION,
+    get_generations,
+    recipe_generation,
+)
+from api.shopping_list import SHOPPING_LIST_RENDERERS, aggregate_shopping_cart
 from api.serializers import (
+    BulkIdsSerializer,
     TagSerializer,
     IngredientSerializer,
     RecipeReadSerializer,
     RecipeWriteSerializer,
-    FavoriteSerializer,
-    ShoppingCartSerializer,
+    RecipeSmallSerializer,
 )
 from recipes.models import (
     ShoppingCart,
     Favorite,
     Ingredient,
-    IngredientInRecipe,
     Recipe,
     Tag,
 )
+from users.models import User
 
 
-class IngredientFilter(SearchFilter):
-    """
-    Фильтр для поиска ингредиентов по названию.
-    """
-    search_param = 'name'  # Параметр для поиска
-
-
-class TagsViewSet(ReadOnlyViewSet):
+class TagsViewSet(
+    QueryBudgetMixin, ConditionalGetMixin, CachedCatalogMixin, ReadOnlyViewSet
+):
     """
     ViewSet для работы с тегами.
     Поддерживает только чтение (GET-запросы).
+    Список тегов отдается из кеша справочников,
+    ETag и Last-Modified — по версии справочника.
     """
+    catalog_name = TAGS_CATALOG
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None  # Отключаем пагинацию для тегов
+    query_budgets = {'list': 2, 'retrieve': 2}
 
 
-class IngredientsViewSet(ReadOnlyViewSet):
+class IngredientsViewSet(
+    QueryBudgetMixin, ConditionalGetMixin, CachedCatalogMixin, ReadOnlyViewSet
+):
     """
     ViewSet для работы с ингредиентами.
     Поддерживает только чтение (GET-запросы).
+    Полный список ингредиентов отдается из кеша справочников,
+    поиск по названию выполняется по индексу в памяти.
+    ETag и Last-Modified — по версии справочника.
     """
+    catalog_name = INGREDIENTS_CATALOG
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = [IngredientFilter]
-    search_fields = ['^name']  # Поиск по началу названия
     pagination_class = None  # Отключаем пагинацию для ингредиентов
+    search_param = 'name'  # Параметр для поиска
+    limit_param = 'limit'  # Параметр для ограничения выдачи
+    query_budgets = {'list': 2, 'retrieve': 2}
+
+    def list(self, request, *args, **kwargs):
+        """
+        Возвращает ингредиенты, название которых начинается
+        с переданной строки, а затем содержащие ее.
+        """
+        query = request.query_params.get(self.search_param)
+        if query is None:
+            return super().list(request, *args, **kwargs)
+        return self.conditional_get(request, lambda: Response(
+            get_ingredient_index().search(query, self.get_search_limit())
+        ))
+
+    def get_search_limit(self):
+        """
+        Возвращает размер выдачи поиска из параметра limit.
+        """
+        try:
+            limit = int(self.request.query_params[self.limit_param])
+        except (KeyError, ValueError):
+            return DEFAULT_SEARCH_LIMIT
+        return max(1, min(limit, MAX_SEARCH_LIMIT))
 
 
-class RecipesViewSet(viewsets.ModelViewSet):
+# Поля рецепта, от которых зависит ответ retrieve, кроме тегов
+# и ингредиентов: их изменения учитываются версиями справочников
+RECIPE_VALIDATOR_FIELDS = (
+    'updated_at',
+    'author__username',
+    'author__email',
+    'author__first_name',
+    'author__last_name',
+    'is_favorited',
+    'is_in_shopping_cart',
+    'author_is_subscribed',
+)
+
+
+class RecipesViewSet(
+    QueryBudgetMixin,
+    AnonymousResponseCacheMixin,
+    ConditionalGetMixin,
+    viewsets.ModelViewSet,
+):
     """
     ViewSet для работы с рецептами.
     Поддерживает все CRUD-операции.
+    Лента и страницы рецептов для анонимных пользователей
+    отдаются из кеша ответов.
     """
     queryset = Recipe.objects.all()
+    conditional_actions = ('retrieve',)
+    # Флаги в ответе зависят от пользователя
+    conditional_vary = ('Accept', 'Authorization')
+    response_cache_params = (
+        'search',
+        'title',
+        'author',
+        'tags',
+        'tags_mode',
+        'cooking_time_min',
+        'cooking_time_max',
+        'page',
+        'limit',
+        'cursor',
+        'format',
+    )
+    response_cache_multi_params = ('tags',)
     permission_classes = [AuthorAdminOrReadOnlyPermission]
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipesFilter
-    pagination_class = PageNumberPagination
+    pagination_class = RecipePagination
+    # Запись рецепта: теги и ингредиенты пишутся пакетно,
+    # поэтому бюджет не зависит от их числа
+    query_budgets = {
+        'list': 5,
+        'retrieve': 4,
+        'create': 19,
+        'update': 23,
+        'partial_update': 17,
+        'destroy': 14,
+    }
+
+    def get_queryset(self):
+        """
+        Возвращает рецепты, подготовленные для чтения:
+        связанные объекты и флаги текущего пользователя
+        загружаются фиксированным числом запросов.
+        """
+        return Recipe.objects.for_read(self.request.user)
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        """
+        Сохраняет рецепт от имени текущего пользователя.
+        Счетчик рецептов автора увеличивает обработчик сигнала.
+        """
+        serializer.save(author=self.request.user)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        """
+        Удаляет рецепт и уменьшает счетчик рецептов автора.
+
+        Счетчики удаляемого рецепта менять незачем, поэтому
+        обработчики сигналов для каскадно удаляемых записей
+        избранного и корзины отключены.
+        """
+        with manual_counters():
+            instance.delete()
+        change_counter(User, [instance.author_id], 'recipes_count', -1)
+
+    def get_response_cache_parts(self):
+        """
+        Возвращает поколение ленты для списка или поколения рецепта
+        и всех страниц рецептов для retrieve, а также версии
+        справочников тегов и ингредиентов.
+        """
+        if self.action == 'list':
+            names = (FEED_GENERATION,)
+        else:
+            try:
+                pk = int(self.kwargs['pk'])
+            except ValueError:
+                return None
+            names = (recipe_generation(pk), RECIPES_GENERATION)
+        return (
+            *names,
+            *get_generations(*names),
+            get_catalog_version(TAGS_CATALOG),
+            get_catalog_version(INGREDIENTS_CATALOG),
+        )
+
+    def get_validators(self, instance=None):
+        """
+        Возвращает валидаторы рецепта: время изменения, данные
+        автора, флаги текущего пользователя и версии справочников
+        тегов и ингредиентов. Без загруженного рецепта они читаются
+        одним запросом по первичному ключу.
+
+        Last-Modified отдается только анонимным пользователям:
+        флаги избранного и корзины времени изменения не имеют.
+        Изменения профиля автора учитываются только в ETag.
+        """
+        if instance is None:
+            values = get_object_or_404(
+                Recipe.objects.with_user_flags(self.request.user).values_list(
+                    *RECIPE_VALIDATOR_FIELDS
+                ),
+                pk=self.kwargs['pk'],
+            )
+        else:
+            values = attrgetter(*(
+                field.replace('__', '.') for field in RECIPE_VALIDATOR_FIELDS
+            ))(instance)
+        versions = (
+            get_catalog_version(TAGS_CATALOG),
+            get_catalog_version(INGREDIENTS_CATALOG),
+        )
+        last_modified = None
+        if not self.request.user.is_authenticated:
+            last_modified = max(
+                int(values[0].timestamp()),
+                *(version // 10 ** 9 for version in versions),
+            )
+        return (*values, *versions), last_modified
 
     def get_serializer_class(self):
         """
@@ -83,107 +271,155 @@ class RecipesViewSet(viewsets.ModelViewSet):
             return RecipeWriteSerializer
         return RecipeReadSerializer
 
-    @action(detail=True, methods=['post', 'delete'],
-            permission_classes=[permissions.IsAuthenticated])
-    def favorite(self, request, pk=None):
+    # Сообщения об ошибках: рецепт уже добавлен / рецепта нет в списке
+    user_recipe_messages = {
+        Favorite: (
+            'Рецепт уже в избранном.',
+            'Рецепт не найден в избранном.',
+        ),
+        ShoppingCart: (
+            'Рецепт уже в корзине.',
+            'Рецепт не найден в корзине.',
+        ),
+    }
+
+    def change_user_recipe(self, model, pk):
         """
-        Добавляет или удаляет рецепт из избранного.
+        Добавляет рецепт в избранное или корзину либо удаляет его.
+        Общий код действий favorite и shopping_cart.
         """
-        recipe = get_object_or_404(Recipe, id=pk)
-        user = request.user
-
-        if request.method == 'POST':
-            # Проверяем, не добавлен ли рецепт уже в избранное
-            favorite, created = Favorite.objects.get_or_create(
-                user=user, recipe=recipe)
-            if not created:
+        exists_message, missing_message = self.user_recipe_messages[model]
+        try:
+            recipe_id = int(pk)
+            if self.request.method == 'POST':
+                recipe = model.add_recipe(self.request.user, recipe_id)
+                if recipe is None:
+                    return Response(
+                        {'detail': exists_message},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                serializer = RecipeSmallSerializer(
+                    recipe, context=self.get_serializer_context()
+                )
                 return Response(
-                    {'detail': 'Рецепт уже в избранном.'},
-                    status=status.HTTP_400_BAD_REQUEST
+                    serializer.data, status=status.HTTP_201_CREATED
                 )
-            serializer = FavoriteSerializer(favorite)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-
-        if request.method == 'DELETE':
-            # Удаляем рецепт из избранного
-            favorite = Favorite.objects.filter(user=user, recipe=recipe)
-            if not favorite.exists():
+            if not model.remove_recipe(self.request.user, recipe_id):
                 return Response(
-                    {'detail': 'Рецепт не найден в избранном.'},
+                    {'detail': missing_message},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            favorite.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
+        except (ValueError, Recipe.DoesNotExist):
+            raise Http404('Рецепт не найден.')
+
+    @query_budget(5)
+    @action(detail=True, methods=['post', 'delete'],
+            permission_classes=[permissions.IsAuthenticated])
+    def favorite(self, request, pk=None):
+        """
+        Добавляет или удаляет рецепт из избранного.
+        """
+        return self.change_user_recipe(Favorite, pk)
 
+    @query_budget(5)
     @action(detail=True, methods=['post', 'delete'],
             permission_classes=[permissions.IsAuthenticated])
     def shopping_cart(self, request, pk=None):
         """
         Добавляет или удаляет рецепт из корзины покупок.
         """
-        recipe = get_object_or_404(Recipe, id=pk)
-        user = request.user
+        return self.change_user_recipe(ShoppingCart, pk)
 
-        if request.method == 'POST':
-            # Проверяем, не добавлен ли рецепт уже в корзину
-            cart, created = ShoppingCart.objects.get_or_create(
-                user=user, recipe=recipe)
-            if not created:
-                return Response(
-                    {'detail': 'Рецепт уже в корзине.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            serializer = ShoppingCartSerializer(cart)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+    def change_user_recipes(self, model):
+        """
+        Пакетно добавляет рецепты в избранное или корзину
+        либо удаляет их. Возвращает результат для каждого рецепта.
+        """
+        serializer = BulkIdsSerializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        change = add_recipes if self.request.method == 'POST' else (
+            remove_recipes
+        )
+        outcomes = change(
+            model, self.request.user, serializer.validated_data['ids']
+        )
+        return Response({'results': [
+            {'id': recipe_id, 'status': outcome}
+            for recipe_id, outcome in outcomes.items()
+        ]})
 
-        if request.method == 'DELETE':
-            # Удаляем рецепт из корзины
-            cart = ShoppingCart.objects.filter(user=user, recipe=recipe)
-            if not cart.exists():
-                return Response(
-                    {'detail': 'Рецепт не найден в корзине.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            cart.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
+    @query_budget(7)
+    @action(detail=False, methods=['post', 'delete'],
+            url_path='favorite/bulk',
+            permission_classes=[permissions.IsAuthenticated])
+    def favorite_bulk(self, request):
+        """
+        Пакетно добавляет или удаляет рецепты из избранного.
+        """
+        return self.change_user_recipes(Favorite)
 
-    @action(detail=False, methods=['get'],
+    @query_budget(7)
+    @action(detail=False, methods=['post', 'delete'],
+            url_path='shopping_cart/bulk',
             permission_classes=[permissions.IsAuthenticated])
+    def shopping_cart_bulk(self, request):
+        """
+        Пакетно добавляет или удаляет рецепты из корзины покупок.
+        """
+        return self.change_user_recipes(ShoppingCart)
+
+    @query_budget(2)
+    @action(detail=False, methods=['get'],
+            permission_classes=[permissions.IsAuthenticated],
+            renderer_classes=SHOPPING_LIST_RENDERERS)
     def download_shopping_cart(self, request):
         """
-        Генерирует и возвращает PDF-файл со списком покупок.
+        Возвращает список покупок в формате, выбранном
+        параметром ?format= (pdf, txt, csv, json). По умолчанию — PDF.
         """
         user = request.user
-
-        # Получаем список ингредиентов из корзины
-        ingredients = (
-            IngredientInRecipe.objects
-            .filter(recipe__carts__user=user)
-            .values('ingredient__name', 'ingredient__measurement_unit')
-            .annotate(total_amount=Sum('amount'))
-            .order_by('ingredient__name')
+        renderer = request.accepted_renderer
+        rows = aggregate_shopping_cart(user).iterator()
+        response = StreamingHttpResponse(
+            renderer.stream(rows),
+            content_type=(
+                f'{renderer.media_type}; charset={renderer.charset}'
+                if renderer.charset else renderer.media_type
+            ),
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{user.username}_shopping_list.'
+            f'{renderer.format}"'
         )
+        return response
 
-        # Формируем данные для PDF
-        shopping_list = [
-            {
-                'name': item['ingredient__name'],
-                'amount': (
-                    f"{item['total_amount']} "
-                    f"{item['ingredient__measurement_unit']}"
-                )
-            }
-            for item in ingredients
-        ]
-
-        # Генерируем PDF
-        pdf_path = generate_shopping_list_pdf(user, shopping_list)
-
-        # Возвращаем PDF как ответ
-        with open(pdf_path, 'rb') as pdf_file:
-            response = HttpResponse(
-                pdf_file.read(), content_type='application/pdf')
-            response['Content-Disposition'] = (
-                f'attachment; filename="{user.username}_shopping_list.pdf"'
-            )
-            return response
+
+class RequestStatsView(QueryBudgetMixin, APIView):
+    """
+    Статистика времени и числа SQL-запросов по маршрутам
+    текущего процесса. Доступна только персоналу.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    query_budgets = {'get': 1, 'delete': 1}
+
+    def initial(self, request, *args, **kwargs):
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise Http404
+        super().initial(request, *args, **kwargs)
+
+    def get(self, request):
+        """
+        Возвращает перцентили метрик по каждому маршруту.
+        """
+        return Response({
+            'samples': settings.REQUEST_TIMING_SAMPLES,
+            'routes': get_stats(),
+        })
+
+    def delete(self, request):
+        """
+        Очищает накопленную статистику.
+        """
+        reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 
 # Промежуточные слои (middleware)
 MIDDLEWARE = [
+    'api.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -121,6 +122,74 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Генерировать варианты изображений рецептов в фоновом потоке.
+# При False варианты строятся сразу после сохранения рецепта.
+IMAGE_VARIANTS_ASYNC = os.getenv('IMAGE_VARIANTS_ASYNC', 'True') == 'True'
+
+# Ограничения загружаемых изображений рецептов:
+# размер файла в байтах и количество пикселей.
+RECIPE_IMAGE_MAX_SIZE = int(
+    os.getenv('RECIPE_IMAGE_MAX_SIZE', 10 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_PIXELS = int(os.getenv('RECIPE_IMAGE_MAX_PIXELS', 40_000_000))
+
+# Тело JSON-запроса вмещает изображение в base64 (на треть больше)
+# и остальные поля рецепта.
+DATA_UPLOAD_MAX_MEMORY_SIZE = RECIPE_IMAGE_MAX_SIZE * 4 // 3 + 1024 * 1024
+
+# Замер времени и числа SQL-запросов по маршрутам
+# (api.middleware.RequestTimingMiddleware). Статистика хранится
+# в памяти каждого процесса: последние REQUEST_TIMING_SAMPLES
+# запросов на маршрут. REQUEST_TIMING_HEADER добавляет в ответы
+# заголовок Server-Timing; он показывает время и число SQL-запросов
+# любому клиенту, поэтому по умолчанию выключен.
+REQUEST_TIMING_ENABLED = os.getenv('REQUEST_TIMING_ENABLED', 'True') == 'True'
+REQUEST_TIMING_HEADER = os.getenv('REQUEST_TIMING_HEADER', 'False') == 'True'
+REQUEST_TIMING_SAMPLES = int(os.getenv('REQUEST_TIMING_SAMPLES', 1000))
+
+# Превышение бюджета SQL-запросов представления (api.budgets):
+# при True — исключение QueryBudgetExceeded, иначе предупреждение в лог.
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', 'False') == 'True'
+
+# Настройки кеша
+# Справочники (теги, ингредиенты) хранятся в отдельном кеше: по умолчанию
+# в памяти процесса, для нескольких воркеров можно указать общий бэкенд,
+# например django.core.cache.backends.redis.RedisCache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalog': {
+        'BACKEND': os.getenv(
+            'CATALOG_CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv(
+            'CATALOG_CACHE_LOCATION', default='foodgram-catalog'
+        ),
+    },
+}
+
+# Алиас кеша справочников и время жизни закешированных данных (в секундах)
+CATALOG_CACHE_ALIAS = 'catalog'
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Кеш ответов ленты и страниц рецептов для анонимных пользователей
+# (api.response_cache): свежесть ответа и сколько еще отдавать
+# устаревший ответ, пока другой процесс его пересобирает (в секундах)
+RECIPE_RESPONSE_CACHE_ENABLED = os.getenv(
+    'RECIPE_RESPONSE_CACHE_ENABLED', 'True'
+) == 'True'
+RECIPE_RESPONSE_CACHE_TIMEOUT = int(
+    os.getenv('RECIPE_RESPONSE_CACHE_TIMEOUT', 60)
+)
+RECIPE_RESPONSE_CACHE_STALE = int(
+    os.getenv('RECIPE_RESPONSE_CACHE_STALE', 60 * 5)
+)
+
+# Время жизни закешированных PDF со списком покупок (в секундах)
+SHOPPING_LIST_PDF_CACHE_TIMEOUT = 60 * 60
+
 # Модель пользователя
 AUTH_USER_MODEL = 'users.User'
 
@@ -165,3 +234,21 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Название сайта
 SITE_NAME = 'foodgramraul245.strangled.net'
+
+# Логирование. Уровень DEBUG для api показывает, в частности,
+# сколько строк записало обновление рецепта.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api': {
+            'handlers': ['console'],
+            'level': os.getenv('API_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
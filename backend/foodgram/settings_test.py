@@ -0,0 +1,18 @@
+"""
+Настройки для тестов и нагрузочных замеров.
+
+Пароли хешируются быстрым MD5PasswordHasher: он небезопасен,
+но позволяет командам seed_data и load_fixtures с флагом
+--fast-passwords создавать сотни тысяч пользователей за минуты.
+Использовать только на тестовых базах:
+
+    python manage.py seed_data --fast-passwords \\
+        --settings=foodgram.settings_test
+"""
+
+from foodgram.settings import *  # noqa: F401,F403
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+]
@@ -4,6 +4,7 @@
 """
 
 from django.contrib import admin
+from django.core.files.storage import default_storage
 from django.utils.html import format_html
 
 from .models import (
@@ -14,6 +15,7 @@ from .models import (
     Favorite,
     IngredientInRecipe,
 )
+from .search import update_search_documents
 
 
 @admin.register(Ingredient)
@@ -61,21 +63,30 @@ class RecipeAdmin(admin.ModelAdmin):
     search_fields = ('name', 'author__username', 'tags__name')
     list_filter = ('author', 'tags', 'pub_date')
     inlines = (IngredientInRecipeInline,)
-    readonly_fields = ('pub_date', 'image_preview')
+    readonly_fields = ('pub_date', 'image_preview',
+                       'favorites_count', 'in_cart_count')
     empty_value_display = '-пусто-'
 
-    @admin.display(description='В избранном (раз)')
+    @admin.display(description='В избранном (раз)',
+                   ordering='favorites_count')
     def is_favorite_count(self, obj):
         """
-        Возвращает количество добавлений рецепта в избранное.
+        Возвращает количество добавлений рецепта в избранное
+        из счетчика favorites_count.
         """
-        return obj.favorites.count()
+        return obj.favorites_count
 
     @admin.display(description='Превью изображения')
     def image_preview(self, obj):
         """
         Возвращает HTML-превью изображения рецепта.
         """
+        preview = obj.image_variants.get('admin', {}).get('jpeg')
+        if preview:
+            # Готовое превью весит единицы килобайт.
+            return format_html(
+                '<img src="{}" />', default_storage.url(preview)
+            )
         if obj.image:
             return format_html(
                 '<img src="{}" width="100" height="100" />',
@@ -94,7 +105,16 @@ class RecipeAdmin(admin.ModelAdmin):
         """
         Оптимизация запросов к базе данных.
         """
-        return super().get_queryset(request).prefetch_related('favorites')
+        return super().get_queryset(request).select_related(
+            'author'
+        ).prefetch_related('tags')
+
+    def save_related(self, request, form, formsets, change):
+        """
+        Обновляет текст для поиска после сохранения ингредиентов.
+        """
+        super().save_related(request, form, formsets, change)
+        update_search_documents([form.instance.pk])
 
 
 @admin.register(ShoppingCart)
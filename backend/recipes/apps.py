@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class RecipesConfig(AppConfig):
@@ -7,3 +8,12 @@ class RecipesConfig(AppConfig):
 
     # Настраиваем человекочитаемое имя для отображения в админке
     verbose_name = 'Управление рецептами'
+
+    def ready(self):
+        """
+        Подключает обработчики сигналов приложения,
+        в том числе восстановление индекса поиска после migrate.
+        """
+        from recipes import signals
+
+        post_migrate.connect(signals.search_index_migrated, sender=self)
@@ -10,3 +10,4 @@ MAX_LENGTH_MEASUREMENT_UNIT = 64
 MIN_COOKING_TIME = 1
 MAX_COOKING_TIME = 32676  # Максимальное значение для PositiveSmallIntegerField
 MIN_AMOUNT = 1
+MAX_AMOUNT = 32767  # Максимальное значение для PositiveSmallIntegerField
@@ -0,0 +1,187 @@
+"""
+Обработка изображений рецептов.
+
+Из загруженного оригинала строятся уменьшенные варианты в форматах
+WebP и JPEG: карточка для лент, изображение для страницы рецепта
+и превью для админки. Варианты генерируются вне запроса — в фоновом
+потоке с локальной очередью. Пути к ним сохраняются в поле
+Recipe.image_variants вместе с именем исходного файла.
+"""
+
+import io
+import logging
+import os
+import queue
+import threading
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.dispatch import Signal
+from django.utils import timezone
+from PIL import Image
+
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+# Варианты изображения рецепта сохранены (аргумент recipe_id).
+# Запись идет через update() без post_save, а пути вариантов
+# входят в ответы API, поэтому кешам нужен отдельный сигнал.
+variants_generated = Signal()
+
+# Варианты изображения: имя → максимальные ширина и высота
+VARIANTS = {
+    'card': (480, 480),
+    'detail': (1280, 1280),
+    'admin': (100, 100),
+}
+
+# Форматы вариантов: расширение → параметры Pillow
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 80, 'optimize': True},
+}
+
+VARIANTS_DIR = 'recipes/variants'
+
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def render_variant(image, size, options):
+    """
+    Возвращает байты уменьшенной копии изображения.
+    """
+    variant = image.copy()
+    variant.thumbnail(size, Image.LANCZOS)
+    if variant.mode not in ('RGB', 'RGBA') or (
+        options['format'] == 'JPEG' and variant.mode == 'RGBA'
+    ):
+        # JPEG не поддерживает прозрачность и палитру.
+        variant = variant.convert('RGB')
+    buffer = io.BytesIO()
+    variant.save(buffer, **options)
+    return buffer.getvalue()
+
+
+def generate_variants(recipe_id):
+    """
+    Строит варианты изображения рецепта и сохраняет пути к ним.
+
+    Если изображение рецепта успело смениться, результат
+    не записывается: новую картинку обработает следующая задача.
+    """
+    recipe = Recipe.objects.filter(pk=recipe_id).only(
+        'image', 'image_variants'
+    ).first()
+    if recipe is None or not recipe.image:
+        return
+    source = recipe.image.name
+    stem = os.path.splitext(os.path.basename(source))[0]
+    variants = {'source': source}
+    with recipe.image.open('rb') as file, Image.open(file) as image:
+        image.load()
+        for name, size in VARIANTS.items():
+            variants[name] = {}
+            for extension, options in FORMATS.items():
+                path = f'{VARIANTS_DIR}/{recipe_id}/{stem}_{name}.{extension}'
+                if default_storage.exists(path):
+                    default_storage.delete(path)
+                variants[name][extension] = default_storage.save(
+                    path, ContentFile(render_variant(image, size, options))
+                )
+
+    updated = Recipe.objects.filter(pk=recipe_id, image=source).update(
+        image_variants=variants, updated_at=timezone.now()
+    )
+    if updated:
+        variants_generated.send(sender=Recipe, recipe_id=recipe_id)
+        # Удаляем варианты предыдущего изображения.
+        stale = set(variant_paths(recipe.image_variants)) - set(
+            variant_paths(variants)
+        )
+    else:
+        # Изображение сменилось во время обработки — результат не нужен.
+        stale = set(variant_paths(variants))
+    for path in stale:
+        default_storage.delete(path)
+
+
+def variant_paths(variants):
+    """
+    Возвращает пути всех файлов вариантов.
+    """
+    return [
+        path
+        for name in VARIANTS
+        for path in variants.get(name, {}).values()
+    ]
+
+
+def variant_urls(variants, request=None):
+    """
+    Возвращает адреса вариантов изображения по именам и форматам.
+    """
+    urls = {}
+    for name in VARIANTS:
+        if name not in variants:
+            continue
+        urls[name] = {}
+        for extension, path in variants[name].items():
+            url = default_storage.url(path)
+            urls[name][extension] = (
+                request.build_absolute_uri(url) if request else url
+            )
+    return urls
+
+
+def process_variants(recipe_id):
+    """
+    Строит варианты изображения и записывает ошибку в лог.
+
+    Рецепт к этому моменту уже сохранен, поэтому ошибка обработки
+    изображения не должна прерывать запрос или поток очереди:
+    без вариантов API отдает оригинал.
+    """
+    try:
+        generate_variants(recipe_id)
+    except Exception:
+        logger.exception(
+            'Не удалось обработать изображение рецепта %s', recipe_id
+        )
+
+
+def run_worker():
+    """
+    Обрабатывает задачи очереди, пока работает процесс.
+    """
+    while True:
+        recipe_id = _queue.get()
+        close_old_connections()
+        try:
+            process_variants(recipe_id)
+        finally:
+            close_old_connections()
+            _queue.task_done()
+
+
+def enqueue_variants(recipe_id):
+    """
+    Ставит рецепт в очередь на генерацию вариантов изображения.
+
+    При IMAGE_VARIANTS_ASYNC = False варианты строятся сразу.
+    """
+    if not settings.IMAGE_VARIANTS_ASYNC:
+        process_variants(recipe_id)
+        return
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(
+                target=run_worker, name='recipe-images', daemon=True
+            )
+            _worker.start()
+    _queue.put(recipe_id)
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import generate_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """
+    Команда для генерации вариантов изображений рецептов.
+
+    Обрабатывает рецепты без вариантов или с вариантами от прежнего
+    изображения: например, загруженные до появления обработки или
+    не обработанные из-за перезапуска процесса.
+    """
+
+    help = 'Генерирует уменьшенные варианты изображений рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перегенерировать варианты всех рецептов.'
+        )
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        recipes = Recipe.objects.exclude(image='').only(
+            'image', 'image_variants'
+        ).order_by('pk')
+        for recipe in recipes.iterator():
+            if not options['all'] and (
+                recipe.image_variants.get('source') == recipe.image.name
+            ):
+                continue
+            try:
+                generate_variants(recipe.pk)
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f'Рецепт {recipe.pk}: {error}')
+                continue
+            processed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано рецептов: {processed}, с ошибками: {failed}.'
+        ))
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.18 on 2026-10-17 06:37
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    """
+    Заполняет счетчики рецептов и пользователей по существующим данным.
+    """
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Favorite = apps.get_model('recipes', 'Favorite')
+    ShoppingCart = apps.get_model('recipes', 'ShoppingCart')
+    User = apps.get_model('users', 'User')
+    Subscription = apps.get_model('users', 'Subscription')
+
+    def count(model, field):
+        return Coalesce(
+            Subquery(
+                model.objects
+                .filter(**{field: OuterRef('pk')})
+                .order_by()
+                .values(field)
+                .annotate(total=Count('pk'))
+                .values('total')
+            ),
+            0,
+        )
+
+    Recipe.objects.update(
+        favorites_count=count(Favorite, 'recipe'),
+        in_cart_count=count(ShoppingCart, 'recipe'),
+    )
+    User.objects.update(
+        recipes_count=count(Recipe, 'author'),
+        subscribers_count=count(Subscription, 'author'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+        ('users', '0002_user_recipes_count_user_subscribers_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном (раз)'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_cart_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В корзине (раз)'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 4.2.18 on 2026-10-17 06:48
+
+from django.db import migrations, models
+
+# SQL индекса зафиксирован здесь, а не импортируется из recipes.search:
+# миграция должна выполняться одинаково и после изменений кода поиска.
+FTS_TABLE = 'recipes_recipe_search'
+
+POSTGRES_INDEX = [
+    """
+    ALTER TABLE recipes_recipe ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian'::regconfig,
+                              coalesce(name, '')), 'A')
+        || setweight(to_tsvector('russian'::regconfig,
+                                 coalesce(search_document, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX recipes_recipe_search_vector_idx '
+    'ON recipes_recipe USING GIN (search_vector)',
+]
+
+SQLITE_INDEX = [
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    "name, search_document, content='recipes_recipe', "
+    "content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, name, search_document)
+        VALUES (new.id, new.name, new.search_document);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, name, search_document)
+        VALUES ('delete', old.id, old.name, old.search_document);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_update
+    AFTER UPDATE OF name, search_document ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, name, search_document)
+        VALUES ('delete', old.id, old.name, old.search_document);
+        INSERT INTO {FTS_TABLE} (rowid, name, search_document)
+        VALUES (new.id, new.name, new.search_document);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+POSTGRES_DROP = ['ALTER TABLE recipes_recipe DROP COLUMN search_vector']
+
+SQLITE_DROP = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_update',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def fill_search_documents(apps, schema_editor):
+    """
+    Заполняет текст для поиска у существующих рецептов:
+    названия ингредиентов и описание.
+    """
+    Recipe = apps.get_model('recipes', 'Recipe')
+    IngredientInRecipe = apps.get_model('recipes', 'IngredientInRecipe')
+    names = {}
+    for recipe_id, name in (
+        IngredientInRecipe.objects
+        .order_by('pk')
+        .values_list('recipe_id', 'ingredient__name')
+    ):
+        names.setdefault(recipe_id, []).append(name)
+    recipes = list(Recipe.objects.only('text'))
+    for recipe in recipes:
+        recipe.search_document = '\n'.join(
+            [*names.get(recipe.pk, []), recipe.text]
+        )
+    Recipe.objects.bulk_update(recipes, ['search_document'], batch_size=1000)
+
+
+def run_for_vendor(postgres, sqlite):
+    """
+    Возвращает функцию для RunPython, которая выполняет запросы
+    для базы текущего подключения.
+    """
+    def run(apps, schema_editor):
+        statements = {'postgresql': postgres, 'sqlite': sqlite}.get(
+            schema_editor.connection.vendor, []
+        )
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Текст для поиска'),
+        ),
+        migrations.RunPython(fill_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_INDEX, SQLITE_INDEX),
+            run_for_vendor(POSTGRES_DROP, SQLITE_DROP),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.18 on 2026-10-17 07:02
+
+from django.db import migrations, models
+
+
+def fill_updated_at(apps, schema_editor):
+    """
+    Считает существующие рецепты измененными в момент публикации.
+    """
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Recipe.objects.update(updated_at=models.F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+    ]
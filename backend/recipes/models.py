@@ -1,7 +1,9 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Exists, F, OuterRef, Prefetch, Value
+from django.db.models.functions import Greatest
 
-from users.models import User
+from users.models import Subscription, User
 from .constants import (
     MAX_LENGTH_SLUG,
     MAX_LENGTH_TAG_NAME,
@@ -63,6 +65,53 @@ class Tag(models.Model):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    """QuerySet рецептов с аннотациями для текущего пользователя."""
+
+    def for_read(self, user):
+        """
+        Готовит рецепты к чтению: автор, теги и ингредиенты
+        загружаются фиксированным числом запросов вместе
+        с флагами текущего пользователя.
+        """
+        return self.select_related('author').defer(
+            'search_document'
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredient_in_recipe',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        ).with_user_flags(user)
+
+    def with_user_flags(self, user):
+        """
+        Добавляет флаги is_favorited, is_in_shopping_cart
+        и подписку на автора подзапросами EXISTS в основной запрос.
+        """
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+                author_is_subscribed=Value(False),
+            )
+        return self.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            author_is_subscribed=Exists(
+                Subscription.objects.filter(
+                    user=user, author=OuterRef('author')
+                )
+            ),
+        )
+
+
 class Recipe(models.Model):
     """Модель рецепта."""
     name = models.CharField(
@@ -79,6 +128,12 @@ class Recipe(models.Model):
         'Изображение рецепта',
         upload_to='recipes/images/'
     )
+    image_variants = models.JSONField(
+        'Варианты изображения',
+        default=dict,
+        blank=True,
+        editable=False
+    )
     text = models.TextField('Описание рецепта')
     ingredients = models.ManyToManyField(
         'Ingredient',
@@ -101,11 +156,48 @@ class Recipe(models.Model):
         ]
     )
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+    favorites_count = models.PositiveIntegerField(
+        'В избранном (раз)',
+        default=0,
+        editable=False
+    )
+    in_cart_count = models.PositiveIntegerField(
+        'В корзине (раз)',
+        default=0,
+        editable=False
+    )
+    search_document = models.TextField(
+        'Текст для поиска',
+        default='',
+        blank=True,
+        editable=False
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            # Лента рецептов и пагинация по курсору
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_idx'
+            ),
+            # Рецепты автора: фильтр author и последние рецепты
+            # в списке подписок
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='recipe_author_pub_date_idx'
+            ),
+            # Фильтры cooking_time_min и cooking_time_max
+            models.Index(
+                fields=['cooking_time'],
+                name='recipe_cooking_time_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -149,6 +241,10 @@ class IngredientInRecipe(models.Model):
 
 class BaseUserRecipeModel(models.Model):
     """Базовая абстрактная модель для избранного и корзины."""
+
+    # Поле рецепта со счетчиком записей этой модели
+    counter_field = None
+
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -165,10 +261,145 @@ class BaseUserRecipeModel(models.Model):
     class Meta:
         abstract = True
 
+    @classmethod
+    def sql_names(cls):
+        """
+        Возвращает экранированные имена таблиц и столбцов
+        для запросов добавления и удаления.
+        """
+        quote = connection.ops.quote_name
+        return {
+            'table': quote(cls._meta.db_table),
+            'user': quote(cls._meta.get_field('user').column),
+            'recipe': quote(cls._meta.get_field('recipe').column),
+            'recipes': quote(Recipe._meta.db_table),
+            'counter': quote(cls.counter_field),
+        }
+
+    @classmethod
+    def add_recipe(cls, user, recipe_id):
+        """
+        Добавляет рецепт пользователю и увеличивает счетчик рецепта.
+
+        Вставка выполняется через INSERT ... ON CONFLICT DO NOTHING,
+        а данные рецепта для ответа возвращает UPDATE ... RETURNING
+        счетчика. На PostgreSQL оба действия объединены в один запрос.
+
+        :return: Рецепт или None, если он уже был добавлен.
+        :raises Recipe.DoesNotExist: Рецепт не найден.
+        """
+        names = cls.sql_names()
+        insert = (
+            'INSERT INTO {table} ({user}, {recipe}) VALUES (%s, %s) '
+            'ON CONFLICT ({user}, {recipe}) DO NOTHING'
+        ).format(**names)
+        returning = (
+            'RETURNING {recipes}.id, name, image, image_variants, cooking_time'
+        ).format(**names)
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                if connection.vendor == 'postgresql':
+                    cursor.execute(
+                        'WITH inserted AS ({insert} RETURNING {recipe}) '
+                        'UPDATE {recipes} SET {counter} = {counter} + 1 '
+                        'FROM inserted WHERE {recipes}.id = inserted.{recipe} '
+                        .format(insert=insert, **names) + returning,
+                        [user.pk, recipe_id],
+                    )
+                    row = cursor.fetchone()
+                    # Пустой ответ — либо конфликт, либо рецепта нет.
+                    missing = row is None and not Recipe.objects.filter(
+                        pk=recipe_id
+                    ).exists()
+                else:
+                    cursor.execute(
+                        insert + ' RETURNING id', [user.pk, recipe_id]
+                    )
+                    if cursor.fetchone() is None:
+                        return None
+                    cursor.execute(
+                        'UPDATE {recipes} SET {counter} = {counter} + 1 '
+                        'WHERE id = %s '.format(**names) + returning,
+                        [recipe_id],
+                    )
+                    row = cursor.fetchone()
+                    missing = row is None
+                if missing:
+                    # Откатываем вставку со ссылкой на несуществующий рецепт.
+                    raise Recipe.DoesNotExist
+        except IntegrityError:
+            # Внешние ключи проверяются при фиксации транзакции:
+            # рецепт удалили одновременно с добавлением.
+            raise Recipe.DoesNotExist
+        if row is None:
+            return None
+        recipe_id, name, image, image_variants, cooking_time = row
+        return Recipe(
+            id=recipe_id,
+            name=name,
+            image=image,
+            image_variants=Recipe._meta.get_field(
+                'image_variants'
+            ).from_db_value(image_variants, None, connection),
+            cooking_time=cooking_time,
+        )
+
+    @classmethod
+    def remove_recipe(cls, user, recipe_id):
+        """
+        Удаляет рецепт у пользователя и уменьшает счетчик рецепта.
+
+        На PostgreSQL удаление и счетчик выполняются одним запросом
+        DELETE ... RETURNING в CTE. Существование рецепта проверяется
+        только если удалять было нечего. Счетчик не опускается ниже
+        нуля, если запись была создана в обход add_recipe.
+
+        :return: True, если запись удалена.
+        :raises Recipe.DoesNotExist: Рецепт не найден.
+        """
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'WITH deleted AS (DELETE FROM {table} '
+                        'WHERE {user} = %s AND {recipe} = %s '
+                        'RETURNING {recipe}) '
+                        'UPDATE {recipes} '
+                        'SET {counter} = GREATEST({counter} - 1, 0) '
+                        'FROM deleted WHERE {recipes}.id = deleted.{recipe}'
+                        .format(**cls.sql_names()),
+                        [user.pk, recipe_id],
+                    )
+                    deleted = cursor.rowcount
+            else:
+                # Сырой DELETE: удаление через ORM вызвало бы обработчик
+                # сигнала, который изменил бы счетчик второй раз.
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'DELETE FROM {table} '
+                        'WHERE {user} = %s AND {recipe} = %s'
+                        .format(**cls.sql_names()),
+                        [user.pk, recipe_id],
+                    )
+                    deleted = cursor.rowcount
+                if deleted:
+                    Recipe.objects.filter(pk=recipe_id).update(**{
+                        cls.counter_field: Greatest(
+                            F(cls.counter_field) - 1, 0
+                        )
+                    })
+        if deleted:
+            return True
+        if not Recipe.objects.filter(pk=recipe_id).exists():
+            raise Recipe.DoesNotExist
+        return False
+
 
 class Favorite(BaseUserRecipeModel):
     """Модель избранного."""
 
+    counter_field = 'favorites_count'
+
     class Meta(BaseUserRecipeModel.Meta):
         verbose_name = 'Избранное'
         verbose_name_plural = 'Избранное'
@@ -186,6 +417,8 @@ class Favorite(BaseUserRecipeModel):
 class ShoppingCart(BaseUserRecipeModel):
     """Модель корзины."""
 
+    counter_field = 'in_cart_count'
+
     class Meta(BaseUserRecipeModel.Meta):
         verbose_name = 'Корзина'
         verbose_name_plural = 'Корзины'
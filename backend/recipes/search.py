@@ -0,0 +1,180 @@
+"""
+Полнотекстовый поиск рецептов по названию, описанию
+и названиям ингредиентов.
+
+Текст для поиска хранится в поле Recipe.search_document
+и обновляется функцией update_search_documents после изменения
+рецепта или его ингредиентов. Индекс создается миграцией
+recipes 0005 средствами базы:
+- PostgreSQL: вычисляемый столбец search_vector (tsvector)
+  с GIN-индексом, название рецепта имеет больший вес;
+- SQLite: внешняя таблица FTS5, которую поддерживают триггеры;
+  ensure_sqlite_triggers восстанавливает их после migrate.
+Для остальных баз поиск сводится к icontains по search_document.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from recipes.models import IngredientInRecipe, Recipe
+
+# Конфигурация полнотекстового поиска PostgreSQL
+SEARCH_CONFIG = 'russian'
+# Таблица FTS5 для SQLite
+FTS_TABLE = 'recipes_recipe_search'
+# Веса названия и остального текста в ранжировании SQLite
+FTS_WEIGHTS = (10.0, 1.0)
+# Сколько слов запроса учитывается
+MAX_SEARCH_TERMS = 10
+
+BATCH_SIZE = 1000
+
+SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_insert': f"""
+    CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, name, search_document)
+        VALUES (new.id, new.name, new.search_document);
+    END
+    """,
+    f'{FTS_TABLE}_delete': f"""
+    CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, name, search_document)
+        VALUES ('delete', old.id, old.name, old.search_document);
+    END
+    """,
+    f'{FTS_TABLE}_update': f"""
+    CREATE TRIGGER {FTS_TABLE}_update
+    AFTER UPDATE OF name, search_document ON recipes_recipe BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, name, search_document)
+        VALUES ('delete', old.id, old.name, old.search_document);
+        INSERT INTO {FTS_TABLE} (rowid, name, search_document)
+        VALUES (new.id, new.name, new.search_document);
+    END
+    """,
+}
+
+
+def ensure_sqlite_triggers(db_connection):
+    """
+    Создает недостающие триггеры FTS5 и перестраивает индекс.
+
+    SQLite при изменении столбцов пересоздает таблицу рецептов,
+    и триггеры удаляются вместе со старой таблицей, поэтому функция
+    вызывается и после каждого migrate.
+    """
+    with db_connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master")
+        existing = {name for name, in cursor.fetchall()}
+        if FTS_TABLE not in existing:
+            return
+        missing = [
+            sql for name, sql in SQLITE_TRIGGERS.items()
+            if name not in existing
+        ]
+        if not missing:
+            return
+        for sql in missing:
+            cursor.execute(sql)
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')"
+        )
+
+
+def build_document(text, ingredient_names):
+    """
+    Собирает текст для поиска из описания и названий ингредиентов.
+    Название рецепта индексируется отдельно.
+    """
+    return '\n'.join([*ingredient_names, text])
+
+
+def update_search_documents(recipe_ids=None):
+    """
+    Пересобирает search_document у рецептов recipe_ids
+    (у всех рецептов, если None) пачками по BATCH_SIZE.
+
+    :return: Количество обновленных рецептов.
+    """
+    recipes = Recipe.objects.order_by('pk')
+    if recipe_ids is not None:
+        recipes = recipes.filter(pk__in=recipe_ids)
+    updated, last_pk = 0, 0
+    while True:
+        batch = list(
+            recipes.filter(pk__gt=last_pk).only('text', 'search_document')
+            [:BATCH_SIZE]
+        )
+        if not batch:
+            return updated
+        last_pk = batch[-1].pk
+        names = {}
+        for recipe_id, name in (
+            IngredientInRecipe.objects
+            .filter(recipe__in=batch)
+            .order_by('pk')
+            .values_list('recipe_id', 'ingredient__name')
+        ):
+            names.setdefault(recipe_id, []).append(name)
+        changed = []
+        for recipe in batch:
+            document = build_document(recipe.text, names.get(recipe.pk, []))
+            if document != recipe.search_document:
+                recipe.search_document = document
+                changed.append(recipe)
+        Recipe.objects.bulk_update(changed, ['search_document'])
+        updated += len(changed)
+
+
+def search_terms(query):
+    """
+    Разбивает запрос на слова в нижнем регистре.
+    """
+    return re.findall(r'\w+', query.casefold())[:MAX_SEARCH_TERMS]
+
+
+def search_recipes(queryset, query):
+    """
+    Оставляет рецепты, в которых есть все слова запроса
+    (по началу слова), и добавляет аннотацию search_rank —
+    чем больше, тем релевантнее.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset.annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        ).none()
+    table = connection.ops.quote_name(Recipe._meta.db_table)
+    if connection.vendor == 'postgresql':
+        tsquery = f"to_tsquery('{SEARCH_CONFIG}', %s)"
+        value = ' & '.join(f'{term}:*' for term in terms)
+        return queryset.filter(RawSQL(
+            f'{table}.search_vector @@ {tsquery}', [value],
+            output_field=BooleanField(),
+        )).annotate(search_rank=RawSQL(
+            f'ts_rank({table}.search_vector, {tsquery})', [value],
+            output_field=FloatField(),
+        ))
+    if connection.vendor == 'sqlite':
+        value = ' '.join(f'"{term}"*' for term in terms)
+        weights = ', '.join(map(str, FTS_WEIGHTS))
+        match = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+        return queryset.filter(RawSQL(
+            f'{table}.id IN ({match})', [value],
+            output_field=BooleanField(),
+        )).annotate(search_rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id',
+            [value],
+            output_field=FloatField(),
+        ))
+    condition = Q()
+    for term in terms:
+        condition &= Q(name__icontains=term) | Q(
+            search_document__icontains=term
+        )
+    return queryset.filter(condition).annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    )
@@ -0,0 +1,61 @@
+"""
+Обработчики сигналов моделей рецептов.
+"""
+
+from functools import partial
+
+from django.db import connections, transaction
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.images import enqueue_variants, variant_paths
+from recipes.models import Ingredient, Recipe
+from recipes.search import ensure_sqlite_triggers, update_search_documents
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, **kwargs):
+    """
+    Ставит в очередь генерацию вариантов, если у рецепта
+    новое изображение. Задача запускается после фиксации
+    транзакции, чтобы обработчик увидел сохраненный рецепт.
+    """
+    if instance.image and (
+        instance.image_variants.get('source') != instance.image.name
+    ):
+        transaction.on_commit(partial(enqueue_variants, instance.pk))
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_saved(sender, instance, created, **kwargs):
+    """
+    Обновляет текст для поиска у рецептов с переименованным
+    ингредиентом.
+    """
+    if not created:
+        update_search_documents(
+            Recipe.objects.filter(ingredients=instance).values('pk')
+        )
+
+
+def search_index_migrated(sender, using, **kwargs):
+    """
+    Восстанавливает триггеры поиска SQLite, удаленные
+    при пересоздании таблицы рецептов в миграциях.
+    """
+    db_connection = connections[using]
+    if db_connection.vendor == 'sqlite':
+        ensure_sqlite_triggers(db_connection)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    """
+    Удаляет файлы вариантов изображения удаленного рецепта.
+    """
+    def delete_files():
+        for path in variant_paths(instance.image_variants):
+            default_storage.delete(path)
+
+    transaction.on_commit(delete_files)
@@ -16,6 +16,8 @@ class UserAdmin(BaseUserAdmin):
         'email',
         'first_name',
         'last_name',
+        'recipes_count',
+        'subscribers_count',
         'is_staff',
         'is_active',
         'date_joined'
@@ -57,7 +59,8 @@ class UserAdmin(BaseUserAdmin):
             },
         ),
     )
-    readonly_fields = ('last_login', 'date_joined')
+    readonly_fields = ('last_login', 'date_joined',
+                       'recipes_count', 'subscribers_count')
 
     def get_queryset(self, request):
         """Оптимизация запросов к базе данных."""
@@ -3,3 +3,7 @@
 # Ограничения длины полей
 MAX_LENGTH_EMAIL = 254
 MAX_LENGTH_NAME = 150
+
+# Количество рецептов автора в ленте подписок
+DEFAULT_RECIPES_LIMIT = 3
+MAX_RECIPES_LIMIT = 100
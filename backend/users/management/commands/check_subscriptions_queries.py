@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from users.models import User
+from users.pagination import SubscriptionPagination
+
+
+class Command(BaseCommand):
+    """
+    Команда для проверки числа SQL-запросов ленты подписок.
+
+    Запрашивает /api/users/subscriptions/ с разным размером страницы
+    и разным recipes_limit от имени пользователя с наибольшим числом
+    подписок. Число запросов не должно зависеть от этих параметров.
+    """
+
+    help = 'Проверяет, что лента подписок выполняет постоянное число запросов.'
+
+    url = '/api/users/subscriptions/'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-queries', type=int, default=3,
+            help='Допустимое число запросов на страницу.'
+        )
+
+    def handle(self, *args, **options):
+        user = (
+            User.objects
+            .annotate(subscriptions_count=Count('subscriber'))
+            .filter(subscriptions_count__gt=0)
+            .order_by('-subscriptions_count')
+            .first()
+        )
+        if user is None:
+            raise CommandError('В базе нет пользователя с подписками.')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        counts = {}
+        for page_size in (1, SubscriptionPagination.max_page_size):
+            for recipes_limit in (1, 10):
+                with CaptureQueriesContext(connection) as captured:
+                    response = client.get(self.url, {
+                        'page_size': page_size,
+                        'recipes_limit': recipes_limit,
+                    })
+                if response.status_code != 200:
+                    raise CommandError(f'Статус ответа {response.status_code}')
+                counts[page_size, recipes_limit] = len(
+                    captured.captured_queries
+                )
+                self.stdout.write(
+                    f'page_size={page_size} recipes_limit={recipes_limit}: '
+                    f'{len(response.data["results"])} авторов, '
+                    f'{counts[page_size, recipes_limit]} запросов'
+                )
+
+        if len(set(counts.values())) > 1:
+            raise CommandError('Число запросов зависит от размера страницы.')
+        if max(counts.values()) > options['max_queries']:
+            raise CommandError(
+                f'Превышен лимит в {options["max_queries"]} запросов.'
+            )
+        self.stdout.write(self.style.SUCCESS('Число запросов постоянно.'))
@@ -25,6 +25,16 @@ class User(AbstractUser):
         max_length=MAX_LENGTH_NAME,
         unique=True,
     )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов',
+        default=0,
+        editable=False,
+    )
+    subscribers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+        editable=False,
+    )
 
     # Логин через email
     USERNAME_FIELD = 'email'
@@ -1,26 +1,121 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Value
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from api.serializers import SubShowSerializer
+from api.budgets import QueryBudgetMixin, query_budget
+from api.bulk import subscribe, unsubscribe
+from api.counters import change_counter, manual_counters
+from api.serializers import BulkIdsSerializer, SubShowSerializer
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.constants import DEFAULT_RECIPES_LIMIT, MAX_RECIPES_LIMIT
 from users.models import Subscription, User
 from users.pagination import SubscriptionPagination
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(QueryBudgetMixin, UserViewSet):
     """
     ViewSet для работы с пользователями и подписками.
     """
 
     pagination_class = SubscriptionPagination
+    recipes_limit_param = 'recipes_limit'
+    query_budgets = {
+        'list': 3,
+        'retrieve': 2,
+        'me': 2,
+        'create': 5,
+        'update': 6,
+        'partial_update': 4,
+        'destroy': 25,
+        'set_password': 2,
+        'set_username': 3,
+        'reset_username_confirm': 4,
+    }
 
+    def get_queryset(self):
+        """
+        Добавляет к пользователям флаг подписки текущего пользователя
+        подзапросом EXISTS, чтобы не проверять подписку для каждого.
+        """
+        queryset = super().get_queryset()
+        user = self.request.user
+        if self.action in ('list', 'retrieve') and user.is_authenticated:
+            queryset = queryset.annotate(is_subscribed=Exists(
+                Subscription.objects.filter(user=user, author=OuterRef('pk'))
+            ))
+        return queryset
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        """
+        Удаляет пользователя и уменьшает счетчики рецептов
+        из его избранного и корзины и авторов его подписок.
+
+        Каждый счетчик меняется одним запросом, а обработчики
+        сигналов для каскадно удаляемых записей отключены: иначе
+        они обновляли бы счетчики по запросу на каждую запись.
+        """
+        for model in (Favorite, ShoppingCart):
+            change_counter(
+                Recipe,
+                model.objects.filter(user=instance).values('recipe'),
+                model.counter_field,
+                -1,
+            )
+        change_counter(
+            User,
+            Subscription.objects.filter(user=instance).values('author'),
+            'subscribers_count',
+            -1,
+        )
+        with manual_counters():
+            instance.delete()
+
+    def get_recipes_limit(self):
+        """
+        Возвращает количество рецептов автора в ответе
+        из параметра recipes_limit.
+        """
+        try:
+            limit = int(
+                self.request.query_params.get(
+                    self.recipes_limit_param, DEFAULT_RECIPES_LIMIT
+                )
+            )
+        except ValueError:
+            return DEFAULT_RECIPES_LIMIT
+        return min(max(limit, 0), MAX_RECIPES_LIMIT)
+
+    def with_recipes(self, authors):
+        """
+        Добавляет авторам последние рецепты.
+
+        Последние рецепты всех авторов страницы выбираются одним
+        запросом: срез в Prefetch выполняется оконной функцией
+        ROW_NUMBER по автору. Количество рецептов хранится
+        в счетчике recipes_count.
+        """
+        return authors.annotate(is_subscribed=Value(True)).prefetch_related(
+            Prefetch(
+                'recipes',
+                queryset=Recipe.objects.order_by('-pub_date', '-id')[
+                    :self.get_recipes_limit()
+                ],
+                to_attr='latest_recipes',
+            )
+        )
+
+    @query_budget(9)
     @action(
         methods=['post', 'delete'],
         detail=True,
         permission_classes=[permissions.IsAuthenticated]
     )
+    @transaction.atomic
     def subscribe(self, request, id=None):
         """
         Обрабатывает подписку и отписку от пользователя.
@@ -41,20 +136,43 @@ class CustomUserViewSet(UserViewSet):
                 )
             Subscription.objects.create(user=user, author=author)
             serializer = SubShowSerializer(
-                author, context={'request': request})
+                self.with_recipes(User.objects.filter(pk=author.pk)).get(),
+                context={'request': request}
+            )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         if request.method == 'DELETE':
-            subscription = Subscription.objects.filter(
-                user=user, author=author).first()
-            if not subscription:
+            deleted, _ = Subscription.objects.filter(
+                user=user, author=author).delete()
+            if not deleted:
                 return Response(
                     {'error': 'Вы не подписаны на этого пользователя.'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            subscription.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @query_budget(7)
+    @action(
+        methods=['post', 'delete'],
+        detail=False,
+        url_path='subscribe/bulk',
+        permission_classes=[permissions.IsAuthenticated]
+    )
+    def subscribe_bulk(self, request):
+        """
+        Пакетно подписывает на авторов или отписывает от них.
+        Возвращает результат для каждого автора.
+        """
+        serializer = BulkIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        change = subscribe if request.method == 'POST' else unsubscribe
+        outcomes = change(request.user, serializer.validated_data['ids'])
+        return Response({'results': [
+            {'id': author_id, 'status': outcome}
+            for author_id, outcome in outcomes.items()
+        ]})
+
+    @query_budget(4)
     @action(
         methods=['get'],
         detail=False,
@@ -65,9 +183,9 @@ class CustomUserViewSet(UserViewSet):
         Возвращает список подписок текущего пользователя.
         """
         user = request.user
-        subscribed_authors = User.objects.filter(
-            subscribed__user=user
-        ).prefetch_related('recipes')
+        subscribed_authors = self.with_recipes(
+            User.objects.filter(subscribed__user=user)
+        )
         page = self.paginate_queryset(subscribed_authors)
         if page is not None:
             serializer = SubShowSerializer(